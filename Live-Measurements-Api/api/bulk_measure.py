@@ -0,0 +1,297 @@
+"""
+Measure a directory (or manifest) of photos offline, without Flask, on a pool of processes.
+
+Each worker process imports index.py and loads its own Holistic and MiDaS, then runs
+subjects through run_measurements - the same validation, depth, side-view and
+measurement code as POST /measurements - so results match the API exactly and two
+checkouts can be A/B'd on the same photo set.
+
+Input is either
+  - a directory laid out like a /measurements/batch zip: <id>/front.jpg, optional
+    <id>/side.jpg (.jpeg/.png too) at any depth, plus an optional manifest.csv at the
+    top with "id" and "height_cm" / "depth" columns, or
+  - a CSV file with a "front" column (paths relative to the CSV) and optional "id",
+    "side", "height_cm" and "depth" columns.
+
+    python api/bulk_measure.py photos/ --output results.jsonl --workers 4
+    python api/bulk_measure.py subjects.csv --output results.csv --height-cm 170
+
+Results are appended and flushed one subject at a time, so the output file is also the
+checkpoint: rerunning the same command skips subjects already in it (5xx rows, e.g.
+models failing to load, are retried). Use --restart to start over.
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+
+from measurement_batch import IMAGE_EXTENSIONS
+
+MEASUREMENT_FIELDS = (
+    "shoulder_width", "chest_width", "chest_circumference", "waist_width", "waist",
+    "natural_waist_width", "natural_waist", "hip_width", "hip", "neck_width", "neck",
+    "arm_length", "shirt_length", "thigh", "thigh_circumference", "trouser_length", "inseam",
+    "measurement_quality",
+)
+CSV_FIELDS = ("id", "status", "code", "error", "elapsed_ms") + MEASUREMENT_FIELDS + (
+    "warnings", "scale_factor", "depth_mode")
+
+
+class Subject:
+    __slots__ = ("id", "front", "side", "height_cm", "depth")
+
+    def __init__(self, subject_id, front, side=None, height_cm=None, depth=None):
+        self.id = subject_id
+        self.front = front
+        self.side = side
+        self.height_cm = height_cm
+        self.depth = depth
+
+
+def _read_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return list(csv.DictReader(f))
+
+
+def subjects_from_directory(root):
+    """
+    <id>/front.<ext> and <id>/side.<ext> anywhere under root; heights from root/manifest.csv.
+    The id is the directory's path relative to root ("001", or "a/001" when nested), so
+    same-named directories in different branches stay separate subjects.
+    """
+    manifest_path = os.path.join(root, "manifest.csv")
+    manifest = {row["id"].strip(): row for row in _read_csv(manifest_path) if row.get("id")} \
+        if os.path.exists(manifest_path) else {}
+    photos = {}
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith((".", "__MACOSX")))
+        for filename in filenames:
+            name, extension = os.path.splitext(filename.lower())
+            if name in ("front", "side") and extension in IMAGE_EXTENSIONS and directory != root:
+                subject_id = os.path.relpath(directory, root).replace(os.sep, "/")
+                photos.setdefault(subject_id, {})[name] = os.path.join(directory, filename)
+    return [
+        Subject(subject_id, views["front"], views.get("side"),
+                manifest.get(subject_id, {}).get("height_cm") or None,
+                manifest.get(subject_id, {}).get("depth") or None)
+        for subject_id, views in sorted(photos.items()) if "front" in views
+    ]
+
+
+def subjects_from_manifest(path):
+    """Rows with a front path (relative to the CSV), optional id/side/height_cm/depth."""
+    base = os.path.dirname(os.path.abspath(path))
+    subjects = []
+    for row in _read_csv(path):
+        front = (row.get("front") or "").strip()
+        if not front:
+            continue
+        side = (row.get("side") or "").strip()
+        subjects.append(Subject(
+            (row.get("id") or "").strip() or front,
+            os.path.join(base, front),
+            os.path.join(base, side) if side else None,
+            row.get("height_cm") or None,
+            row.get("depth") or None
+        ))
+    return subjects
+
+
+def load_subjects(source):
+    if os.path.isdir(source):
+        subjects = subjects_from_directory(source)
+    elif source.lower().endswith(".csv"):
+        subjects = subjects_from_manifest(source)
+    else:
+        raise SystemExit(f"{source} is neither a directory nor a .csv manifest")
+    # Ids key the output and resuming; a repeated id would overwrite or skip a subject
+    seen, duplicates = set(), set()
+    for subject in subjects:
+        (duplicates if subject.id in seen else seen).add(subject.id)
+    if duplicates:
+        raise SystemExit(f"Duplicate subject ids in {source}: {', '.join(sorted(duplicates))}")
+    return subjects
+
+
+# --- Output and checkpointing ---
+
+def _trim_partial_line(path):
+    """A crash can leave half a row at the end; cut the file back to its last complete line."""
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def completed_ids(path, output_format):
+    """Ids already in the output with a final (non-5xx) status."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return set()
+    _trim_partial_line(path)
+    done = set()
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = csv.DictReader(f) if output_format == "csv" else (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            if int(row["status"]) < 500:
+                done.add(str(row["id"]))
+    return done
+
+
+class ResultWriter:
+    """Appends one row per subject and flushes it, so a killed run loses at most the row in progress."""
+
+    def __init__(self, path, output_format):
+        self.format = output_format
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a", newline="", encoding="utf-8")
+        if output_format == "csv":
+            self._csv = csv.DictWriter(self._file, CSV_FIELDS, extrasaction="ignore")
+            if is_new:
+                self._csv.writeheader()
+
+    def write(self, row):
+        if self.format == "csv":
+            self._csv.writerow(csv_row(row))
+        else:
+            self._file.write(json.dumps(row, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def csv_row(row):
+    flat = {key: row.get(key) for key in ("id", "status", "code", "error", "elapsed_ms")}
+    measurements = row.get("measurements") or {}
+    flat.update({key: measurements.get(key) for key in MEASUREMENT_FIELDS})
+    flat["warnings"] = "; ".join(measurements.get("warnings", []))
+    debug = row.get("debug_info") or {}
+    flat["scale_factor"] = debug.get("scale_factor")
+    flat["depth_mode"] = debug.get("depth_mode")
+    return flat
+
+
+# --- Worker processes ---
+
+_index = None
+_models_error = None
+
+
+def init_worker(processes, model_timeout):
+    """Pool initializer: one process-sized thread budget and a private copy of every model."""
+    global _index, _models_error
+    os.environ["WEB_CONCURRENCY"] = str(processes)  # thread_budget splits the CPUs between workers
+    os.environ["GUNICORN_THREADS"] = "1"
+    os.environ.setdefault("HOLISTIC_POOL_SIZE", "1")
+    os.environ.setdefault("PIPELINE_WORKERS", "1")
+    os.environ.setdefault("RESULT_CACHE_ENTRIES", "0")  # Every photo is new; don't hold artifacts
+    os.environ.setdefault("DEPTH_MAX_WAIT_MS", "0")  # One subject at a time: nothing to batch with
+    os.environ.setdefault("EVENT_LOG", "off")  # Results go to the output file, not per-subject log lines
+    with contextlib.redirect_stdout(io.StringIO()):
+        import index
+    logging.getLogger().setLevel(logging.WARNING)
+    _index = index
+    if not index.model_registry.wait_ready(("holistic", "midas"), model_timeout):
+        _models_error = {name: entry["error"] or entry["state"] for name, entry in index.model_registry.status().items()
+                         if entry["required"] and entry["state"] != "ready"}
+
+
+def measure_subject(subject):
+    """Runs in a worker; returns the output row for one subject."""
+    from werkzeug.datastructures import FileStorage
+
+    row = {"id": subject.id}
+    if _models_error:
+        row.update(status=503, error=f"Models not ready: {_models_error}")
+        return row
+    started = time.perf_counter()
+    files = []
+    try:
+        def open_photo(path):
+            f = open(path, "rb")
+            files.append(f)
+            return FileStorage(stream=f, filename=os.path.basename(path))
+
+        body, status = _index.run_measurements(
+            open_photo(subject.front),
+            open_photo(subject.side) if subject.side else None,
+            subject.height_cm,
+            subject.depth
+        )
+    except OSError as e:
+        body, status = {"error": f"Could not read photo: {e}", "code": "INVALID_IMAGE"}, 400
+    except Exception as e:
+        body, status = {"error": f"{type(e).__name__}: {e}"}, 500
+    finally:
+        for f in files:
+            f.close()
+    row["status"] = status
+    row["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    row.update(body)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="Photo directory or manifest .csv")
+    parser.add_argument("--output", required=True, help="Results file (.csv or .jsonl)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="Defaults to the --output extension")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Worker processes, each with its own models")
+    parser.add_argument("--height-cm", help="Height for subjects without one (else the API default)")
+    parser.add_argument("--depth", choices=("off", "fast", "full"), help="Depth mode for subjects without one")
+    parser.add_argument("--model-timeout", type=float, default=600, help="Seconds a worker waits for its models")
+    parser.add_argument("--limit", type=int, help="Only the first N pending subjects")
+    parser.add_argument("--restart", action="store_true", help="Discard existing results instead of resuming")
+    args = parser.parse_args()
+
+    output_format = args.format or ("csv" if args.output.lower().endswith(".csv") else "jsonl")
+    if args.restart and os.path.exists(args.output):
+        os.remove(args.output)
+
+    subjects = load_subjects(args.source)
+    done = completed_ids(args.output, output_format)
+    pending = [s for s in subjects if s.id not in done]
+    for subject in pending:
+        subject.height_cm = subject.height_cm or args.height_cm
+        subject.depth = subject.depth or args.depth
+    if args.limit is not None:
+        pending = pending[:args.limit]
+    print(f"{len(subjects)} subjects, {len(done)} already done, {len(pending)} to measure "
+          f"with {args.workers} worker(s)", file=sys.stderr)
+    if not pending:
+        return 0
+
+    writer = ResultWriter(args.output, output_format)
+    statuses = {}
+    started = time.perf_counter()
+    # spawn: MediaPipe graphs and torch thread pools don't survive fork, so each worker builds its own
+    context = multiprocessing.get_context("spawn")
+    workers = min(args.workers, len(pending))
+    try:
+        with context.Pool(workers, initializer=init_worker, initargs=(workers, args.model_timeout)) as pool:
+            for n, row in enumerate(pool.imap_unordered(measure_subject, pending), 1):
+                writer.write(row)
+                statuses[row["status"]] = statuses.get(row["status"], 0) + 1
+                print(f"[{n}/{len(pending)}] {row['id']}: {row['status']} {row.get('code', '')} "
+                      f"{row.get('elapsed_ms', '')} ms", file=sys.stderr)
+    except KeyboardInterrupt:
+        print("Interrupted; rerun the same command to resume", file=sys.stderr)
+        return 130
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"Done: {sum(statuses.values())} subjects in {elapsed:.1f}s "
+          f"({sum(statuses.values()) / elapsed:.2f}/s), statuses {dict(sorted(statuses.items()))}", file=sys.stderr)
+    return 1 if any(status >= 500 for status in statuses) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Local fast path for /chat: question normalization and a small FAQ index.
+
+The index is built from the platform facts in the chatbot's system instruction
+(the "- " bullets under its numbered sections). A question is answered locally
+only when every content word in it appears somewhere in the fact sheet, one fact
+all but fully covers them and no other fact comes close; everything else goes to
+Gemini as before. A word the facts never mention ("cost", "cancel", "India") is the
+part of the question a fact can't answer, however well the rest matches.
+"""
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_SECTION = re.compile(r"^\d+\.\s+\*\*(.+?)\*\*:?\s*$")
+_BULLET = re.compile(r"^-\s+(.+)$")
+
+# Question scaffolding and filler carry no topic; dropping them lets "how long does shipping take?" match on "ship"
+STOPWORDS = frozenset("""
+a about an and any are as at be can could do does for from get have how i if in is it its long me my of on or
+our please so take takes tell that the their them there this to us use what when where which who why will with
+would you your youngin hi hello hey know want need much many
+""".split())
+
+
+def normalize_question(text):
+    """Cache key for a chat message: case, punctuation and whitespace differences collapse together."""
+    text = unicodedata.normalize("NFKC", text).lower()
+    return " ".join(_TOKEN.findall(text))
+
+
+def _stem(token):
+    # Just enough folding for the fact sheet: ships/shipping -> ship, fabrics -> fabric, photos -> photo
+    if len(token) > 5 and token.endswith("ing"):
+        token = token[:-3]
+        if len(token) > 2 and token[-1] == token[-2]:
+            token = token[:-1]
+    elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        token = token[:-1]
+    return token
+
+
+def content_tokens(text):
+    return {_stem(token) for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS}
+
+
+class _Fact:
+    __slots__ = ("answer", "weights")
+
+    def __init__(self, answer, weights):
+        self.answer = answer
+        self.weights = weights  # token -> 1.0 (fact text) or SECTION_WEIGHT (section title only)
+
+
+class FaqIndex:
+    """Token-overlap retrieval over instruction facts, weighted by inverse document frequency."""
+
+    SECTION_WEIGHT = 0.5
+
+    def __init__(self, facts, min_score=0.8, min_margin=0.25, max_query_tokens=8):
+        """`facts` is a list of (section_title, fact_text)."""
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.max_query_tokens = max_query_tokens
+        self._facts = []
+        for section, text in facts:
+            weights = dict.fromkeys(content_tokens(section), self.SECTION_WEIGHT)
+            weights.update(dict.fromkeys(content_tokens(text), 1.0))
+            self._facts.append(_Fact(text.replace("**", ""), weights))
+        document_frequency = Counter(token for fact in self._facts for token in fact.weights)
+        self._idf = {token: math.log(1 + len(self._facts) / df) for token, df in document_frequency.items()}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+
+    @classmethod
+    def from_instruction(cls, instruction, **kwargs):
+        """Facts are the bullets under numbered '1. **Section**:' headings; other text is ignored."""
+        facts, section = [], None
+        for line in instruction.splitlines():
+            line = line.strip()
+            heading = _SECTION.match(line)
+            if heading:
+                section = heading.group(1)
+            elif line.startswith("**"):
+                section = None  # An unnumbered bold heading (e.g. Guidelines) ends the fact sheet
+            elif section:
+                bullet = _BULLET.match(line)
+                if bullet:
+                    facts.append((section, bullet.group(1)))
+        return cls(facts, **kwargs)
+
+    def __len__(self):
+        return len(self._facts)
+
+    def _score(self, fact, query):
+        """IDF-weighted share of the query's tokens the fact covers (every token is in the vocabulary)."""
+        total = sum(self._idf[token] for token in query)
+        matched = sum(fact.weights.get(token, 0.0) * self._idf[token] for token in query)
+        return matched / total
+
+    def answer(self, question):
+        """The matching fact's text, or None unless one fact covers the question with high confidence."""
+        query = content_tokens(question)
+        best, runner_up, best_fact = 0.0, 0.0, None
+        # Any content word outside the fact vocabulary sends the question to the model
+        if 0 < len(query) <= self.max_query_tokens and query <= self._idf.keys():
+            for fact in self._facts:
+                score = self._score(fact, query)
+                if score > best:
+                    best, runner_up, best_fact = score, best, fact
+                elif score > runner_up:
+                    runner_up = score
+        hit = best_fact is not None and best >= self.min_score and best - runner_up >= self.min_margin
+        with self._lock:
+            self.lookups += 1
+            self.hits += hit
+        return best_fact.answer if hit else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "facts": len(self._facts),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+            }
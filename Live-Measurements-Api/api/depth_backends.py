@@ -0,0 +1,143 @@
+"""
+MiDaS depth backends behind one interface, chosen with DEPTH_BACKEND.
+
+  torch      MiDaS_small in PyTorch: TorchScript export, torch.hub cache, or a hub download
+  onnx       the same weights exported to ONNX (export_models.py --onnx), on ONNX Runtime
+  onnx-int8  that export with dynamically quantized INT8 weights (export_models.py --onnx-int8)
+  none       no depth model; every request runs as depth=off
+
+Backends take an (N, 3, S, S) float32 NumPy batch (RGB in 0..1) and return (N, S, S) relative
+inverse depth as NumPy. Only the torch backend imports torch, so an ONNX or "none"
+deployment can leave torch and timm out of the image entirely.
+"""
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class DepthBackend:
+    """Interface: load() once, then warm() and infer() from any thread."""
+
+    name = None
+    # Loaded weights may be inherited by forked gunicorn workers (shared copy-on-write)
+    fork_safe = False
+    enabled = True
+
+    def load(self):
+        return self
+
+    def warm(self, input_size):
+        """One dummy forward pass so the first request doesn't pay for lazy kernel init."""
+        self.infer(np.zeros((1, 3, input_size, input_size), dtype=np.float32))
+
+    def infer(self, batch):
+        raise NotImplementedError
+
+
+class TorchDepthBackend(DepthBackend):
+    """
+    MiDaS_small without network access when a local copy exists:
+    1. model_path - TorchScript file, fully offline
+    2. repo_dir - torch.hub checkout cache (weights come from the hub checkpoint cache)
+    3. torch.hub download (needs network)
+    """
+
+    name = "torch"
+    fork_safe = True  # Plain tensors
+
+    def __init__(self, model_path="", repo_dir=""):
+        self.model_path = model_path
+        self.repo_dir = repo_dir
+        self.source = None
+        self.model = None
+
+    def load(self):
+        import torch
+
+        repo_dir = self.repo_dir or os.path.join(torch.hub.get_dir(), "intel-isl_MiDaS_master")
+        if self.model_path and os.path.exists(self.model_path):
+            model = torch.jit.load(self.model_path, map_location="cpu")
+            self.source = self.model_path
+        elif os.path.isdir(repo_dir):
+            model = torch.hub.load(repo_dir, "MiDaS_small", source="local")
+            self.source = repo_dir
+        else:
+            logger.warning("No local MiDaS found, downloading from torch.hub")
+            model = torch.hub.load("intel-isl/MiDaS", "MiDaS_small")
+            self.source = "torch.hub"
+        model.eval()
+        # Channels-last lets the HWC frame from OpenCV feed the convolutions without a layout copy
+        self.model = model.to(memory_format=torch.channels_last)
+        return self
+
+    def infer(self, batch):
+        import torch
+
+        # from_numpy keeps prepare_depth_input's channels-last strides, so this is usually a no-op
+        with torch.inference_mode():
+            return self.model(torch.from_numpy(batch).contiguous(memory_format=torch.channels_last)).numpy()
+
+
+class OnnxDepthBackend(DepthBackend):
+    """An ONNX export of MiDaS_small on ONNX Runtime's CPU provider."""
+
+    fork_safe = False  # A session owns thread pools that don't survive fork; each worker loads its own
+
+    def __init__(self, model_path, threads=1, name="onnx"):
+        self.model_path = model_path
+        self.threads = threads
+        self.name = name
+        self.source = model_path
+        self.session = None
+        self.input_name = None
+
+    def load(self):
+        import onnxruntime
+
+        if not self.model_path or not os.path.exists(self.model_path):
+            raise FileNotFoundError(f"No ONNX depth model at {self.model_path!r}; export one with "
+                                    f"api/export_models.py")
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = self.threads
+        options.inter_op_num_threads = 1  # Single-image inference; like torch's inter-op pool, it only adds contention
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        return self
+
+    def infer(self, batch):
+        return self.session.run(None, {self.input_name: np.ascontiguousarray(batch, dtype=np.float32)})[0]
+
+
+class NoDepthBackend(DepthBackend):
+    """No depth model: circumferences use the fixed depth-to-width ratio, as with depth=off."""
+
+    name = "none"
+    fork_safe = True
+    enabled = False
+    source = None
+
+    def warm(self, input_size):
+        pass
+
+    def infer(self, batch):
+        raise RuntimeError("Depth is disabled (DEPTH_BACKEND=none)")
+
+
+DEPTH_BACKENDS = ("torch", "onnx", "onnx-int8", "none")
+
+
+def create_depth_backend(name, torch_model_path="", torch_repo_dir="", onnx_path="", onnx_int8_path="", threads=1):
+    """The backend for DEPTH_BACKEND (not loaded yet)."""
+    if name == "torch":
+        return TorchDepthBackend(torch_model_path, torch_repo_dir)
+    if name == "onnx":
+        return OnnxDepthBackend(onnx_path, threads, name="onnx")
+    if name == "onnx-int8":
+        return OnnxDepthBackend(onnx_int8_path, threads, name="onnx-int8")
+    if name == "none":
+        return NoDepthBackend()
+    raise ValueError(f"Unknown DEPTH_BACKEND {name!r}; use one of: {', '.join(DEPTH_BACKENDS)}")
@@ -0,0 +1,146 @@
+"""
+Micro-batching scheduler for MiDaS depth inference.
+
+Request threads submit preprocessed (1, 3, S, S) float32 arrays and get a Future back.
+A single worker thread collects whatever is pending (up to max_batch_size, or
+until max_wait_ms after the first item arrived), groups it by input size and
+runs one batched forward pass per group, so concurrent requests share a pass
+instead of fighting over the same cores.
+"""
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class _Pending:
+    __slots__ = ("tensor", "future")
+
+    def __init__(self, tensor, future):
+        self.tensor = tensor
+        self.future = future
+
+
+class DepthBatcher:
+    """
+    `run_batch(batch)` takes an (N, 3, S, S) array and returns an (N, S, S) depth array.
+    The worker thread is started lazily on first use (so nothing runs before a fork).
+    """
+
+    def __init__(self, run_batch, max_batch_size=4, max_wait_ms=5.0):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._queue_depths = Counter()
+        self._batches = 0
+        self._items = 0
+
+    def _ensure_worker(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="depth-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, input_tensor):
+        """Queue one (1, 3, S, S) input; the Future resolves to its (S, S) depth array."""
+        future = Future()
+        self._ensure_worker()
+        self._queue.put(_Pending(input_tensor, future))
+        return future
+
+    def infer(self, input_tensor, timeout=None):
+        """Blocking convenience wrapper around submit()."""
+        return self.submit(input_tensor).result(timeout)
+
+    def _collect(self):
+        pending = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(pending) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                pending.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            try:
+                self._run_pending(pending)
+            except Exception as e:
+                # The only worker: whatever went wrong, fail this round's requests and keep serving
+                logger.exception(f"Depth batcher round of {len(pending)} failed: {e}")
+                for item in pending:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+
+    def _run_pending(self, pending):
+        queue_depth = len(pending) + self._queue.qsize()
+
+        # "fast" and "full" depth modes use different input sizes and can't share a pass
+        groups = {}
+        for item in pending:
+            groups.setdefault(tuple(item.tensor.shape[1:]), []).append(item)
+
+        batch_sizes = [self._run_group(items) for items in groups.values()]
+        with self._stats_lock:
+            self._queue_depths[queue_depth] += 1
+            for size in batch_sizes:
+                if size:
+                    self._batch_sizes[size] += 1
+                    self._batches += 1
+                    self._items += size
+
+    def _run_group(self, items):
+        live = [item for item in items if item.future.set_running_or_notify_cancel()]
+        if not live:
+            return 0
+        try:
+            if len(live) == 1:
+                batch = live[0].tensor
+            else:
+                batch = np.concatenate([item.tensor for item in live])
+            output = self.run_batch(batch)
+            if len(output) != len(live):
+                # e.g. an ONNX export with a fixed batch dimension of 1
+                raise RuntimeError(f"Depth backend returned {len(output)} maps for a batch of {len(live)}")
+            if len(live) == 1:
+                results = [output[0]]  # A batch of one: the slice is the whole output
+            else:
+                # A slice would keep the whole (N, S, S) batch alive for as long as any caller (or the
+                # result cache, which counts only the slice) holds its depth map
+                results = [output[i].copy() for i in range(len(live))]
+        except Exception as e:
+            logger.error(f"Depth batch of {len(live)} failed: {e}")
+            for item in live:
+                item.future.set_exception(e)
+            return len(live)
+        for item, result in zip(live, results):
+            item.future.set_result(result)
+        return len(live)
+
+    def stats(self):
+        """Queue depth plus batch-size / queue-depth histograms for tuning the wait window."""
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": self._batches,
+                "items": self._items,
+                "mean_batch_size": round(self._items / self._batches, 3) if self._batches else 0.0,
+                "batch_size_histogram": {str(k): v for k, v in sorted(self._batch_sizes.items())},
+                "queue_depth_histogram": {str(k): v for k, v in sorted(self._queue_depths.items())},
+            }
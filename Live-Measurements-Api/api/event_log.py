@@ -0,0 +1,111 @@
+"""
+Structured, non-blocking event logs (one JSON object per line).
+
+Request threads only put the log record on a bounded queue; a writer thread formats it
+as JSON and does the I/O, so a slow stdout pipe or disk never holds up a request. When
+the queue is full, records are dropped and counted instead of blocking. The writer
+thread starts with the first record, so nothing runs before a gunicorn fork, and each
+forked worker starts its own.
+
+    events = create_event_logger("youngin.events", "stdout")
+    events.info("measurements", extra={"fields": {"measurements": ..., "debug_info": ...}})
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+
+def _json_default(value):
+    # NumPy scalars and arrays, then anything else as its string form
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+class JsonLineFormatter(logging.Formatter):
+    """{"ts", "level", "logger", "event", ...the record's `fields`} on one line."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=_json_default, separators=(",", ":"))
+
+
+class AsyncQueueHandler(QueueHandler):
+    """A QueueHandler that never blocks the caller and starts its writer thread lazily."""
+
+    def __init__(self, handlers, max_queued=10000):
+        super().__init__(queue.Queue(max_queued))
+        self.targets = handlers
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def prepare(self, record):
+        # Same process: hand the record over as-is; formatting and JSON encoding happen on the writer
+        # thread, so callers must not mutate what they log afterwards (log a copy instead)
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._listener = QueueListener(self.queue, *self.targets, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def close(self):
+        """Write out everything queued, then stop the writer thread."""
+        with self._lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()
+                self._listener = None
+                self._pid = None
+        for handler in self.targets:
+            handler.close()
+        super().close()
+
+
+def create_event_logger(name, target, max_queued=10000):
+    """
+    A logger writing JSON lines to `target`: "stdout", "stderr", a file path (appended),
+    or "off"/"" to discard. It doesn't propagate to the root logger.
+    """
+    event_logger = logging.getLogger(name)
+    event_logger.propagate = False
+    event_logger.setLevel(logging.INFO)
+    if not target or target == "off":
+        event_logger.addHandler(logging.NullHandler())
+        event_logger.disabled = True
+        return event_logger
+    if target in ("stdout", "stderr"):
+        handler = logging.StreamHandler(sys.stdout if target == "stdout" else sys.stderr)
+    else:
+        handler = logging.FileHandler(target, encoding="utf-8")
+    handler.setFormatter(JsonLineFormatter())
+    queue_handler = AsyncQueueHandler([handler], max_queued)
+    event_logger.addHandler(queue_handler)
+    atexit.register(queue_handler.close)
+    return event_logger
@@ -0,0 +1,122 @@
+"""
+Export MiDaS_small for the API's depth backends (DEPTH_BACKEND), so none of them needs
+network access at runtime.
+
+Run once at image build time (this step downloads from torch.hub):
+
+    python api/export_models.py --torchscript /app/models/midas_small.pt \
+        --onnx /app/models/midas_small.onnx --onnx-int8 /app/models/midas_small.int8.onnx
+
+then point MIDAS_MODEL_PATH / MIDAS_ONNX_PATH / MIDAS_ONNX_INT8_PATH at the outputs.
+All exports come from the same weights; --from-torchscript reuses an earlier export
+instead of downloading again. The ONNX exports need the `onnx` package (build time only).
+"""
+import argparse
+import inspect
+import os
+
+import torch
+
+DEPTH_INPUT_SIZES = (256, 384)  # fast and full depth modes
+
+
+def load_hub_model():
+    model = torch.hub.load("intel-isl/MiDaS", "MiDaS_small")
+    model.eval()
+    return model
+
+
+def load_torchscript(path):
+    model = torch.jit.load(path, map_location="cpu")
+    model.eval()
+    return model
+
+
+def _makedirs_for(out_path):
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+
+
+def export_torchscript(model, out_path, input_size=384):
+    """Trace the model and check the trace still handles the other depth input size and batching."""
+    example = torch.zeros(1, 3, input_size, input_size)
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example)
+        for size, batch in ((256, 1), (input_size, 2)):
+            probe = torch.rand(batch, 3, size, size)
+            expected, got = model(probe), traced(probe)
+            if expected.shape != got.shape or not torch.allclose(expected, got, rtol=1e-3, atol=1e-3):
+                raise RuntimeError(f"Traced MiDaS diverges from eager for input {tuple(probe.shape)}")
+    _makedirs_for(out_path)
+    traced.save(out_path)
+    print(f"Saved TorchScript MiDaS_small to {out_path}")
+
+
+def _session(path):
+    import onnxruntime
+
+    return onnxruntime.InferenceSession(path, providers=["CPUExecutionProvider"])
+
+
+def export_onnx(model, out_path, input_size=384, opset=17):
+    """
+    Export with dynamic batch/height/width and check ONNX Runtime agrees with the
+    PyTorch model at both depth input sizes.
+    """
+    example = torch.zeros(1, 3, input_size, input_size)
+    kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        kwargs["dynamo"] = False  # The TorchScript-based exporter handles traced and scripted models alike
+    _makedirs_for(out_path)
+    with torch.no_grad():
+        torch.onnx.export(
+            model, example, out_path, opset_version=opset, input_names=["image"], output_names=["depth"],
+            dynamic_axes={"image": {0: "batch", 2: "height", 3: "width"},
+                          "depth": {0: "batch", 1: "height", 2: "width"}},
+            **kwargs
+        )
+        session = _session(out_path)
+        for size, batch in ((DEPTH_INPUT_SIZES[0], 1), (input_size, 2)):
+            probe = torch.rand(batch, 3, size, size)
+            expected = model(probe).numpy()
+            got = session.run(None, {"image": probe.numpy()})[0]
+            scale = max(float(abs(expected).max()), 1e-6)
+            if expected.shape != got.shape or float(abs(expected - got).max()) / scale > 1e-3:
+                raise RuntimeError(f"ONNX MiDaS diverges from PyTorch for input {tuple(probe.shape)}")
+    print(f"Saved ONNX MiDaS_small to {out_path}")
+
+
+def quantize_onnx(onnx_path, out_path):
+    """Dynamic INT8 quantization of the FP32 export's weights (activations are quantized per call)."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    _makedirs_for(out_path)
+    quantize_dynamic(onnx_path, out_path, weight_type=QuantType.QInt8)
+    # Load once so a broken graph fails the build, not the first request
+    session = _session(out_path)
+    session.run(None, {"image": torch.rand(1, 3, DEPTH_INPUT_SIZES[0], DEPTH_INPUT_SIZES[0]).numpy()})
+    print(f"Saved INT8 ONNX MiDaS_small to {out_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--torchscript", help="Output path for the traced model")
+    parser.add_argument("--onnx", help="Output path for the FP32 ONNX export")
+    parser.add_argument("--onnx-int8", help="Output path for the dynamically quantized INT8 ONNX export")
+    parser.add_argument("--from-torchscript", help="Export from this TorchScript file instead of torch.hub")
+    args = parser.parse_args()
+    if not (args.torchscript or args.onnx or args.onnx_int8):
+        parser.error("nothing to export: give --torchscript, --onnx and/or --onnx-int8")
+
+    model = load_torchscript(args.from_torchscript) if args.from_torchscript else load_hub_model()
+    if args.torchscript:
+        export_torchscript(model, args.torchscript)
+    if args.onnx or args.onnx_int8:
+        # INT8 is quantized from the FP32 graph; keep that intermediate next to it if not asked for
+        onnx_path = args.onnx or os.path.splitext(args.onnx_int8)[0] + ".fp32.onnx"
+        export_onnx(model, onnx_path)
+        if args.onnx_int8:
+            quantize_onnx(onnx_path, args.onnx_int8)
+
+
+if __name__ == "__main__":
+    main()
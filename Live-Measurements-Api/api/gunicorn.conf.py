@@ -0,0 +1,38 @@
+"""
+Gunicorn settings for the Youngin API (loaded from api/ via --chdir api).
+
+With more than one worker the app is preloaded: the master imports index.py and
+loads the MiDaS weights once, then every forked worker shares those pages
+copy-on-write instead of holding its own copy. Pieces that don't survive a fork
+(MediaPipe graphs, torch/OpenMP thread pools, HTTP clients) are built per worker
+in index.init_worker(), called from post_fork below.
+"""
+import os
+
+from dotenv import load_dotenv
+
+# The same .env index.py loads, so the worker/thread counts match its thread budget
+load_dotenv()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '7860')}"
+workers = int(os.getenv("WEB_CONCURRENCY") or 1)
+threads = int(os.getenv("GUNICORN_THREADS") or 2)
+# Allow 2 minutes for slow requests (model loading)
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+preload_app = (os.getenv("GUNICORN_PRELOAD") or ("1" if workers > 1 else "0")) == "1"
+
+if preload_app:
+    # Read by index.py at import time, which happens in the master after this file loads
+    os.environ["PRELOAD_MODELS"] = "1"
+
+if workers > 1:
+    # In-memory jobs are per process; share them so GET /measurements/jobs/<id> works on any worker
+    os.environ.setdefault("JOB_STORE", "sqlite:////tmp/youngin-jobs.db")
+
+
+def post_fork(server, worker):
+    if preload_app:
+        import index
+
+        index.init_worker()
@@ -0,0 +1,159 @@
+"""
+Bounded, thread-safe pool of pre-warmed MediaPipe Holistic instances.
+
+Building a Holistic graph reloads the TFLite models every time, so instances are
+created once per config (segmentation on/off, refine_face on/off) and checked
+out per request. Instances that raise while processing are closed and replaced
+instead of being handed to the next request.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import mediapipe as mp
+
+logger = logging.getLogger(__name__)
+
+mp_holistic = mp.solutions.holistic
+
+
+class PoolTimeoutError(RuntimeError):
+    """Raised when no Holistic instance becomes free within the acquire timeout."""
+
+
+class _PooledHolistic:
+    def __init__(self, instance):
+        self.instance = instance
+        self.uses = 0
+        self.healthy = True
+
+
+class HolisticPool:
+    """
+    Keeps up to `max_size` Holistic instances per config key.
+    Use `with pool.checkout(enable_segmentation=..., refine_face_landmarks=...) as holistic:`.
+    """
+
+    def __init__(self, max_size=2, model_complexity=2, max_uses=1000, acquire_timeout=60.0):
+        self.max_size = max(1, int(max_size))
+        self.model_complexity = model_complexity
+        self.max_uses = max_uses  # Recycle periodically so long-lived graphs can't drift
+        self.acquire_timeout = acquire_timeout
+        self._cond = threading.Condition()
+        self._idle = {}     # key -> [ _PooledHolistic ]
+        self._created = {}  # key -> number of live instances (idle + checked out)
+        self.stats = {"created": 0, "recycled": 0, "errors": 0, "waits": 0}
+
+    def _create(self, key):
+        enable_segmentation, refine_face_landmarks = key
+        instance = mp_holistic.Holistic(
+            static_image_mode=True,
+            model_complexity=self.model_complexity,
+            enable_segmentation=enable_segmentation,
+            refine_face_landmarks=refine_face_landmarks
+        )
+        self.stats["created"] += 1
+        return _PooledHolistic(instance)
+
+    def _acquire(self, key):
+        with self._cond:
+            idle = self._idle.setdefault(key, [])
+            self._created.setdefault(key, 0)
+            waited = False
+            while not idle and self._created[key] >= self.max_size:
+                waited = True
+                if not self._cond.wait(timeout=self.acquire_timeout):
+                    raise PoolTimeoutError(f"No Holistic instance available for {key} after {self.acquire_timeout}s")
+            if waited:
+                self.stats["waits"] += 1
+            if idle:
+                return idle.pop()
+            # Reserve the slot before building outside the lock
+            self._created[key] += 1
+
+        try:
+            return self._create(key)
+        except Exception:
+            with self._cond:
+                self._created[key] -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, key, pooled):
+        pooled.uses += 1
+        recycle = not pooled.healthy or pooled.uses >= self.max_uses
+        if recycle:
+            self._close(pooled)
+        with self._cond:
+            if recycle:
+                self._created[key] -= 1
+                self.stats["recycled"] += 1
+            else:
+                self._idle[key].append(pooled)
+            self._cond.notify()
+
+    @staticmethod
+    def _close(pooled):
+        try:
+            pooled.instance.close()
+        except Exception as e:
+            logger.warning(f"Error closing Holistic instance: {e}")
+
+    @contextmanager
+    def checkout(self, enable_segmentation=True, refine_face_landmarks=True):
+        """Borrow a Holistic instance; it is recycled if the block raises."""
+        key = (bool(enable_segmentation), bool(refine_face_landmarks))
+        pooled = self._acquire(key)
+        try:
+            yield pooled.instance
+        except Exception:
+            pooled.healthy = False
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self._release(key, pooled)
+
+    def warm(self, enable_segmentation=True, refine_face_landmarks=True, count=None):
+        """Pre-build `count` instances (default: max_size) and run a dummy frame through each."""
+        count = self.max_size if count is None else min(count, self.max_size)
+        key = (bool(enable_segmentation), bool(refine_face_landmarks))
+        dummy = np.zeros((256, 256, 3), dtype=np.uint8)
+        warmed = []
+        try:
+            for _ in range(count):
+                pooled = self._acquire(key)
+                warmed.append(pooled)
+                pooled.instance.process(dummy)
+        finally:
+            for pooled in warmed:
+                self._release(key, pooled)
+        logger.info(f"✅ Warmed {len(warmed)} Holistic instance(s) for config {key}")
+
+    def close(self):
+        """Close every idle instance (checked-out instances are closed on release)."""
+        with self._cond:
+            for key, idle in self._idle.items():
+                for pooled in idle:
+                    self._close(pooled)
+                self._created[key] -= len(idle)
+                idle.clear()
+            self._cond.notify_all()
+
+
+class PosePool(HolisticPool):
+    """
+    The same pool around static-image Pose graphs (body landmarks only, no face or hands),
+    for cheap passes such as locating the person before the full Holistic pass.
+    refine_face_landmarks is accepted and ignored so checkout/warm keep one signature.
+    """
+
+    def _create(self, key):
+        enable_segmentation, _ = key
+        instance = mp.solutions.pose.Pose(
+            static_image_mode=True,
+            model_complexity=self.model_complexity,
+            enable_segmentation=enable_segmentation
+        )
+        self.stats["created"] += 1
+        return _PooledHolistic(instance)
@@ -0,0 +1,160 @@
+"""
+Upload ingestion: read each upload once, sanity-check its header, decode it once.
+
+JPEG/PNG headers are parsed before decoding so oversized, truncated or
+absurd-dimension files are rejected without paying for a full decode. Given a
+working_side, large JPEGs are decoded at 1/2, 1/4 or 1/8 scale by libjpeg itself
+(a 12 MP photo never exists in memory at full size) and then fitted to that side.
+"""
+from time import perf_counter
+
+import cv2
+import numpy as np
+
+# Start-of-frame markers carry the image dimensions (C4/C8/CC are DHT/JPG/DAC)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# JPEG DCT-domain downscaling factors OpenCV exposes
+_REDUCED_DECODE_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+
+class ImageRejected(ValueError):
+    """Upload failed a size/header check; the message is safe to show to users."""
+
+
+class ImageDecodeError(ImageRejected):
+    """Upload passed the header checks but OpenCV could not decode it."""
+
+
+class IngestedImage:
+    """A decoded upload plus the numbers we report per request."""
+
+    def __init__(self, frame, nbytes, image_format, read_seconds=0.0, decode_seconds=0.0, source_size=None):
+        self.frame = frame
+        self.nbytes = nbytes
+        self.format = image_format
+        self.source_size = source_size or (frame.shape[1], frame.shape[0])  # (width, height) before downscaling
+        self.read_seconds = read_seconds
+        self.decode_seconds = decode_seconds  # Header checks + imdecode
+
+    @property
+    def pixels(self):
+        return int(self.frame.shape[0] * self.frame.shape[1])
+
+
+def _read_jpeg_header(buf):
+    n = len(buf)
+    i = 2
+    while i + 4 <= n:
+        if buf[i] != 0xFF:
+            raise ImageRejected("The image file is corrupted. Please upload a different photo.")
+        marker = buf[i + 1]
+        if marker == 0xFF:  # Fill byte
+            i += 1
+            continue
+        i += 2
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:  # Standalone markers have no length
+            continue
+        segment_length = int.from_bytes(buf[i:i + 2], "big")
+        if segment_length < 2:
+            raise ImageRejected("The image file is corrupted. Please upload a different photo.")
+        if marker in _JPEG_SOF_MARKERS:
+            if i + 7 > n:
+                break
+            height = int.from_bytes(buf[i + 3:i + 5], "big")
+            width = int.from_bytes(buf[i + 5:i + 7], "big")
+            # A complete baseline/progressive JPEG ends with EOI somewhere after the header
+            if buf.rfind(b"\xff\xd9", i) == -1:
+                break
+            return "jpeg", width, height
+        if marker == 0xDA:  # Start of scan before any frame header
+            raise ImageRejected("The image file is corrupted. Please upload a different photo.")
+        i += segment_length
+    raise ImageRejected("The image upload looks incomplete. Please try uploading it again.")
+
+
+def _read_png_header(buf):
+    if len(buf) < 24 or buf[12:16] != b"IHDR":
+        raise ImageRejected("The image upload looks incomplete. Please try uploading it again.")
+    width = int.from_bytes(buf[16:20], "big")
+    height = int.from_bytes(buf[20:24], "big")
+    if buf.rfind(b"IEND", 24) == -1:
+        raise ImageRejected("The image upload looks incomplete. Please try uploading it again.")
+    return "png", width, height
+
+
+def read_image_header(buf):
+    """
+    Return (format, width, height) for JPEG/PNG buffers, or None for other formats
+    (those are checked after decoding instead).
+    """
+    if buf[:3] == b"\xff\xd8\xff":
+        return _read_jpeg_header(buf)
+    if buf[:8] == _PNG_SIGNATURE:
+        return _read_png_header(buf)
+    return None
+
+
+def check_dimensions(width, height, max_pixels, max_side, min_side):
+    if width < min_side or height < min_side:
+        raise ImageRejected(f"Image is too small. Please upload a photo at least {min_side}px on each side.")
+    if width > max_side or height > max_side or width * height > max_pixels:
+        raise ImageRejected(
+            f"Image resolution is too large ({width}x{height}). Please upload a photo under {max_pixels // 1_000_000} megapixels."
+        )
+
+
+def fit_within(frame, max_side):
+    """The frame downscaled (INTER_AREA) so its long side is at most max_side; as-is if it already fits or max_side is 0."""
+    height, width = frame.shape[:2]
+    if not max_side or max(height, width) <= max_side:
+        return frame
+    scale = max_side / max(height, width)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+
+def _decode_flags(header, working_side):
+    """IMREAD flag decoding a JPEG at the smallest DCT scale that still covers working_side."""
+    if not working_side or not header or header[0] != "jpeg":
+        return cv2.IMREAD_COLOR
+    long_side = max(header[1], header[2])
+    for factor, flag in _REDUCED_DECODE_FLAGS:
+        if long_side / factor >= working_side:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def ingest_upload(file_storage, max_bytes, max_pixels, max_side=12000, min_side=64, working_side=None):
+    """
+    Read an uploaded file exactly once and decode it exactly once.
+    The returned frame is the only copy of the pixels; later stages share it.
+    With working_side, the frame's long side is at most working_side pixels.
+    """
+    start = perf_counter()
+    buf = file_storage.stream.read(max_bytes + 1)
+    read_done = perf_counter()
+    if not buf:
+        raise ImageRejected("The uploaded image is empty. Please select a photo and try again.")
+    if len(buf) > max_bytes:
+        raise ImageRejected(f"Image is too large. Please upload a photo under {max_bytes // (1024 * 1024)}MB.")
+
+    header = read_image_header(buf)
+    if header:
+        _, width, height = header
+        check_dimensions(width, height, max_pixels, max_side, min_side)
+
+    # np.frombuffer wraps the upload bytes without copying
+    frame = cv2.imdecode(np.frombuffer(buf, np.uint8), _decode_flags(header, working_side))
+    if frame is None:
+        raise ImageDecodeError("Could not decode image")
+    if not header:
+        check_dimensions(frame.shape[1], frame.shape[0], max_pixels, max_side, min_side)
+    # Decoded orientation (EXIF rotation applied), before fitting to the working size
+    source_size = (header[1], header[2]) if header else (frame.shape[1], frame.shape[0])
+    if (frame.shape[1] > frame.shape[0]) != (source_size[0] > source_size[1]):
+        source_size = source_size[::-1]
+
+    return IngestedImage(fit_within(frame, working_side), len(buf), header[0] if header else "other",
+                         read_seconds=read_done - start, decode_seconds=perf_counter() - read_done,
+                         source_size=source_size)
@@ -1,32 +1,93 @@
 ﻿import warnings
 warnings.filterwarnings("ignore", category=FutureWarning, module="timm.models.layers")
 
+from dotenv import load_dotenv
+
+# Load environment variables (before thread_budget, which reads WEB_CONCURRENCY, GUNICORN_THREADS
+# and INFERENCE_THREADS at import)
+load_dotenv()
+
+# Must come before cv2/torch/mediapipe so their native thread pools pick up the budget
+from thread_budget import PARALLEL_SIDE_IMAGE, apply_thread_budget
+
 import cv2
 import numpy as np
 import mediapipe as mp
-import torch
-from flask import Flask, request, jsonify
+from flask import Flask, Request, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-import torch.nn.functional as F
+from flask_sock import ConnectionClosed, Sock
+from werkzeug.datastructures import FileStorage
 
+import gc
+import hmac
+import io
+import json
 import os
-from dotenv import load_dotenv
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from contextlib import contextmanager
 import logging
-import razorpay
 
-# Load environment variables
-load_dotenv()
+from holistic_pool import HolisticPool, PosePool
+from image_ingest import ImageDecodeError, ImageRejected, fit_within, ingest_upload
+from chat_faq import FaqIndex, normalize_question
+from silhouette import SilhouetteProfile
+from depth_backends import create_depth_backend
+from depth_batcher import DepthBatcher
+from event_log import create_event_logger
+from jobs import JobQueueFull, JobRunner, create_job_store
+from live_session import LiveSession, TrackerPool
+from measurement_kernel import landmarks_to_array, measure_landmarks, probe_images, side_depths
+from measurement_batch import BatchError, items_from_form, items_from_zip, stream_batch
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry
+from model_registry import ModelNotReady, ModelRegistry
+from person_crop import person_box
+from payments import IdempotencyConflict, IdempotentOrders, create_client, verify_payment_signature
+from request_trace import RequestTrace, StageTimer, activate as activate_trace, submit_in_context
+from result_cache import ArtifactCache, ImageArtifacts, artifact_key
+from upstream import CircuitBreaker, SingleFlight, UpstreamGuard, UpstreamUnavailable
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# Per-request result dumps: JSON lines written off the request thread (stdout, stderr, a file path, or off)
+event_log = create_event_logger("youngin.events", os.getenv("EVENT_LOG", "stdout"))
 
 logger.info("🚀 Starting Youngin API Server...")
 
+# Only the torch depth backend needs torch; ONNX and "none" deployments never import it
+DEPTH_BACKEND = os.getenv("DEPTH_BACKEND", "torch")
+if DEPTH_BACKEND == "torch":
+    import torch
+else:
+    torch = None
+
+inference_threads = apply_thread_budget(torch, cv2)
+logger.info(f"🧵 Inference thread budget: {inference_threads} thread(s) per pipeline, "
+            f"side image {'in parallel' if PARALLEL_SIDE_IMAGE else 'after the front image'}")
+
 app = Flask(__name__)
 
 # Initialize Razorpay Client
-razorpay_client = razorpay.Client(auth=(os.getenv("RAZORPAY_KEY_ID"), os.getenv("RAZORPAY_KEY_SECRET")))
+RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID")
+RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET")
+
+def create_razorpay_client():
+    return create_client(
+        RAZORPAY_KEY_ID,
+        RAZORPAY_KEY_SECRET,
+        timeout=(float(os.getenv("RAZORPAY_CONNECT_TIMEOUT_SECONDS", "3.05")),
+                 float(os.getenv("RAZORPAY_READ_TIMEOUT_SECONDS", "10"))),
+        pool_size=int(os.getenv("RAZORPAY_POOL_SIZE") or os.getenv("GUNICORN_THREADS") or 4),
+        base_url=os.getenv("RAZORPAY_BASE_URL") or None  # e.g. benchmarks/fake_razorpay.py
+    )
+
+razorpay_client = create_razorpay_client()
+# Retries and double clicks with the same Idempotency-Key get the order already created
+razorpay_orders = IdempotentOrders(key_ttl_seconds=int(os.getenv("ORDER_IDEMPOTENCY_TTL_SECONDS", "86400")))
 
 # Configure CORS
 # SECURITY NOTE: For production, replace "*" with your specific frontend domain
@@ -34,12 +95,101 @@ razorpay_client = razorpay.Client(auth=(os.getenv("RAZORPAY_KEY_ID"), os.getenv(
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*").split(",")
 CORS(app, resources={r"/*": {"origins": ALLOWED_ORIGINS}})
 
+# Prometheus metrics, served at /metrics (values are per worker process)
+metrics_registry = MetricsRegistry()
+# Every stage observation also lands in the request's trace when profiling is on
+stage_seconds = StageTimer(metrics_registry.histogram(
+    "youngin_measurement_stage_seconds",
+    "Time spent in each /measurements pipeline stage",
+    ("stage",)
+))
+rejections_total = metrics_registry.counter(
+    "youngin_measurement_rejections_total",
+    "Measurement requests rejected by image or pose validation",
+    ("code", "pose")
+)
+fallbacks_total = metrics_registry.counter(
+    "youngin_measurement_fallbacks_total",
+    "Measurements where the segmentation contour was ignored in favour of a landmark estimate",
+    ("measurement", "reason")
+)
+upstream_seconds = metrics_registry.histogram(
+    "youngin_upstream_seconds",
+    "Latency of calls to external services",
+    ("service", "call", "outcome")
+)
+upstream_rejections_total = metrics_registry.counter(
+    "youngin_upstream_rejections_total",
+    "Upstream calls failed fast (circuit open, too many in flight) or abandoned at their deadline",
+    ("service", "reason")
+)
+chat_first_token_seconds = metrics_registry.histogram(
+    "youngin_chat_first_token_seconds",
+    "/chat/stream time from the upstream request to Gemini's first text chunk"
+)
+orders_total = metrics_registry.counter(
+    "youngin_orders_total",
+    "/create-order responses by source (created, replayed or coalesced)",
+    ("source",)
+)
+chat_answers_total = metrics_registry.counter(
+    "youngin_chat_answers_total",
+    "/chat replies by where they came from (cache, faq or gemini)",
+    ("source",)
+)
+
+def observe_ingest(upload):
+    stage_seconds.observe(upload.read_seconds, stage="upload_read")
+    stage_seconds.observe(upload.decode_seconds, stage="decode")
+
+@contextmanager
+def upstream_call(service, call):
+    """Time an external call; outcome is "error" if the block raised"""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        upstream_seconds.observe(time.perf_counter() - started, service=service, call=call, outcome=outcome)
+
 logger.info("📦 Initializing MediaPipe models...")
 mp_pose = mp.solutions.pose
 mp_holistic = mp.solutions.holistic
-pose = mp_pose.Pose(model_complexity=2)  # Improved accuracy
-holistic = mp_holistic.Holistic()  # For refining pose
-logger.info("✅ MediaPipe models initialized")
+
+# Pool of reusable Holistic instances (static_image_mode=True, so reuse carries no tracking state)
+# Sized to match gunicorn --threads so every request thread can hold one without waiting
+HOLISTIC_POOL_SIZE = int(os.getenv("HOLISTIC_POOL_SIZE", "2"))
+HOLISTIC_MODEL_COMPLEXITY = int(os.getenv("HOLISTIC_MODEL_COMPLEXITY", "2"))
+holistic_pool = HolisticPool(max_size=HOLISTIC_POOL_SIZE, model_complexity=HOLISTIC_MODEL_COMPLEXITY)
+
+# Photos are decoded and fitted to this long side before any model runs. Off (0, full resolution) by
+# default: downscaling shifts the measurements, so validate it on real photos before turning it on
+WORKING_MAX_SIDE = int(os.getenv("WORKING_MAX_SIDE") or 0)
+# Cheap first pass that crops the front photo to the person before Holistic and MiDaS. Off by default:
+# both models run at fixed input sizes, so the crop buys body resolution, not speed (see README)
+PERSON_CROP = os.getenv("PERSON_CROP", "0") == "1"
+PERSON_CROP_MARGIN = float(os.getenv("PERSON_CROP_MARGIN", "0.2"))  # Of the person's height, on every side; tighter boxes starve the pose detector of context
+PERSON_DETECT_SIDE = int(os.getenv("PERSON_DETECT_SIDE", "256"))  # Thumbnail long side for the first pass
+PERSON_DETECT_COMPLEXITY = int(os.getenv("PERSON_DETECT_COMPLEXITY", "0"))
+person_pool = PosePool(max_size=HOLISTIC_POOL_SIZE, model_complexity=PERSON_DETECT_COMPLEXITY)
+
+# Models load and warm in the background (see the MODEL LOADING section); /ready reports their state
+model_registry = ModelRegistry()
+
+def load_holistic_pool():
+    holistic_pool.warm(enable_segmentation=True, refine_face_landmarks=True)
+    return holistic_pool
+
+model_registry.register("holistic", load_holistic_pool)
+
+def load_person_detector():
+    person_pool.warm(enable_segmentation=False, refine_face_landmarks=False)
+    return person_pool
+
+if PERSON_CROP:
+    # Optional: without it the front photo is processed uncropped
+    model_registry.register("person_detector", load_person_detector, required=False)
 
 # Constants for measurement calculations
 KNOWN_OBJECT_WIDTH_CM = 21.0  # A4 paper width in cm
@@ -48,17 +198,61 @@ DEFAULT_HEIGHT_CM = 152.0  # Default height if not provided (5 feet)
 MIN_HEIGHT_CM = 100.0  # Minimum valid height (1 meter)
 MAX_HEIGHT_CM = 250.0  # Maximum valid height (2.5 meters)
 
+# Per-image work (decode + Holistic) for the side view runs here, concurrently with the front image.
+# MediaPipe and torch release the GIL during inference, so threads overlap real work.
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS") or os.getenv("GUNICORN_THREADS") or 2)
+pipeline_executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="pipeline")
+
+# Background measurement jobs (POST /measurements/jobs); JOB_STORE=memory or sqlite:///path/jobs.db
+job_store = create_job_store(os.getenv("JOB_STORE", "memory"), ttl_seconds=int(os.getenv("JOB_TTL_SECONDS", "3600")))
+job_runner = JobRunner(
+    job_store,
+    workers=int(os.getenv("JOB_WORKERS", "1")),
+    max_pending=int(os.getenv("JOB_MAX_PENDING", "32"))
+)
+JOB_MAX_WAIT_SECONDS = float(os.getenv("JOB_MAX_WAIT_SECONDS", "25"))
+# Queued jobs' uploads past this size wait in a temp file, so the queue doesn't hold
+# JOB_MAX_PENDING * 2 full-size photos in memory before any of them is worked on
+JOB_SPOOL_MEMORY_BYTES = int(os.getenv("JOB_SPOOL_MEMORY_KB", "256")) * 1024
+
+# Content-addressed cache of per-image artifacts so retries and height corrections skip inference.
+# Stores landmarks, compact width profiles and depth summaries only - never images or masks.
+result_cache = ArtifactCache(
+    max_entries=int(os.getenv("RESULT_CACHE_ENTRIES", "256")),
+    ttl_seconds=int(os.getenv("RESULT_CACHE_TTL_SECONDS", "600")),
+    max_bytes=int(os.getenv("RESULT_CACHE_MB", "64")) * 1024 * 1024
+)
+
+# Upload limits (two photos per request, so the request cap is a little over twice the per-image cap)
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_MB", "15")) * 1024 * 1024
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_MEGAPIXELS", "50")) * 1_000_000
+app.config["MAX_CONTENT_LENGTH"] = 2 * MAX_IMAGE_BYTES + 1024 * 1024
+
+# Depth backend (torch, onnx, onnx-int8 or none; see depth_backends.py). The torch backend tries
+# MIDAS_MODEL_PATH, then MIDAS_REPO_DIR (default: the torch.hub cache), then a torch.hub download
+MIDAS_MODEL_PATH = os.getenv("MIDAS_MODEL_PATH", "")  # TorchScript export from export_models.py
+MIDAS_REPO_DIR = os.getenv("MIDAS_REPO_DIR", "")
+MIDAS_ONNX_PATH = os.getenv("MIDAS_ONNX_PATH", "")  # export_models.py --onnx
+MIDAS_ONNX_INT8_PATH = os.getenv("MIDAS_ONNX_INT8_PATH", "")  # export_models.py --onnx-int8
+depth_backend = create_depth_backend(
+    DEPTH_BACKEND, MIDAS_MODEL_PATH, MIDAS_REPO_DIR, MIDAS_ONNX_PATH, MIDAS_ONNX_INT8_PATH,
+    threads=inference_threads
+)
+
 # Load depth estimation model
 def load_depth_model():
-    logger.info("🔄 Loading MiDaS depth estimation model...")
-    model = torch.hub.load("intel-isl/MiDaS", "MiDaS_small")
-    model.eval()
-    logger.info("✅ MiDaS model loaded successfully")
-    return model
+    logger.info(f"🔄 Loading {depth_backend.name} depth backend...")
+    depth_backend.load()
+    logger.info(f"✅ Depth backend {depth_backend.name} loaded from {depth_backend.source}")
+    return depth_backend
+
+def warm_depth_model(backend):
+    backend.warm(DEPTH_INPUT_SIZE)
 
-logger.info("🧠 Loading depth model (this may take a moment on first run)...")
-depth_model = load_depth_model()
-logger.info("🎉 All models loaded! API is ready to serve requests.")
+model_registry.register("midas", load_depth_model, warm_depth_model)
+
+# How long a measurement request waits for models that are still warming up
+MODEL_READY_TIMEOUT = float(os.getenv("MODEL_READY_TIMEOUT", "30"))
 
 def calibrate_focal_length(image, real_width_cm, detected_width_px):
     """Dynamically calibrates focal length using a known object."""
@@ -78,18 +272,103 @@ def detect_reference_object(image):
         return scale_factor, focal_length
     return 0.05, FOCAL_LENGTH
 
-def estimate_depth(image):
+DEPTH_INPUT_SIZE = 384  # MiDaS model input size
+
+# Depth modes a client can request: "off" skips MiDaS entirely, "fast" runs it at
+# MiDaS_small's native 256px, "full" keeps the original 384px input
+DEPTH_INPUT_SIZES = {"fast": 256, "full": DEPTH_INPUT_SIZE}
+DEPTH_MODES = ("off", "fast", "full")
+DEFAULT_DEPTH_MODE = os.getenv("DEFAULT_DEPTH_MODE", "full")
+
+def prepare_depth_input(image, input_size=DEPTH_INPUT_SIZE):
+    """
+    Resize the BGR frame to the MiDaS input size while still uint8, then convert
+    only the small result to float. The transpose is a zero-copy (1, 3, S, S) view
+    whose strides are channels-last, and astype keeps them.
+    """
+    small = cv2.resize(image, (input_size, input_size), interpolation=cv2.INTER_AREA)
+    small = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+    input_batch = small.transpose(2, 0, 1)[np.newaxis].astype(np.float32)
+    input_batch /= 255.0
+    return input_batch
+
+def run_depth_batch(input_batch):
+    """Forward an (N, 3, S, S) batch through the depth backend; returns (N, S, S) depth."""
+    return model_registry.get("midas").infer(input_batch)
+
+# Concurrent requests' depth inputs are coalesced into one forward pass
+depth_batcher = DepthBatcher(
+    run_depth_batch,
+    max_batch_size=int(os.getenv("DEPTH_MAX_BATCH", "4")),
+    max_wait_ms=float(os.getenv("DEPTH_MAX_WAIT_MS", "5"))
+)
+
+def estimate_depth(image, input_size=DEPTH_INPUT_SIZE):
     """Uses AI-based depth estimation to improve circumference calculations."""
-    input_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB) / 255.0
-    input_tensor = torch.tensor(input_image, dtype=torch.float32).permute(2, 0, 1).unsqueeze(0)
-    
-    # Resize input to match MiDaS model input size
-    input_tensor = F.interpolate(input_tensor, size=(384, 384), mode="bilinear", align_corners=False)
+    with stage_seconds.time(stage="midas"):
+        input_batch = prepare_depth_input(image, input_size)
+        return depth_batcher.infer(input_batch)
 
-    with torch.no_grad():
-        depth_map = depth_model(input_tensor)
-    
-    return depth_map.squeeze().numpy()
+class DepthSummary:
+    """
+    A depth map plus the statistics measurements derive from it, computed once.
+    Sample points are given in normalized landmark coordinates of the source image.
+    With a crop, the map covers only that PersonCrop of the image.
+    """
+
+    def __init__(self, depth_map, crop=None):
+        self.depth_map = depth_map
+        self.crop = crop
+        self.height, self.width = depth_map.shape[:2]
+        self.max_depth = np.max(depth_map)
+        self._ratios = {}
+
+    @classmethod
+    def from_image(cls, image, mode=DEFAULT_DEPTH_MODE, crop=None):
+        """Run MiDaS for the given mode (on the crop, if given); returns None when depth is off."""
+        if mode == "off" or not depth_backend.enabled:
+            return None
+        return cls(estimate_depth(crop.apply(image) if crop else image, DEPTH_INPUT_SIZES[mode]), crop)
+
+    def ratio_at(self, x, y, image_width, image_height):
+        """Circumference depth ratio at a landmark-space point (1.0 when outside the map)."""
+        key = (x, y, image_width, image_height)
+        if key not in self._ratios:
+            if self.depth_map is None:
+                raise LookupError(f"Compact depth summary has no ratio at {key}: only points read before compact()")
+            x_px = int(x * image_width)
+            y_px = int(y * image_height)
+            if self.crop is not None:
+                x_px -= self.crop.x0
+                y_px -= self.crop.y0
+                image_width, image_height = self.crop.width, self.crop.height
+            # Scale coordinates to match depth map size
+            y_scaled = int(y_px * (self.height / image_height))
+            x_scaled = int(x_px * (self.width / image_width))
+            ratio = 1.0
+            if 0 <= y_scaled < self.height and 0 <= x_scaled < self.width:
+                ratio = 1.0 + 0.5 * (1.0 - self.depth_map[y_scaled, x_scaled] / self.max_depth)
+            self._ratios[key] = ratio
+        return self._ratios[key]
+
+    def compact(self):
+        """
+        Map-free copy holding only the ratios read so far. Small enough to cache: the same
+        pixels give the same landmarks, so a cache hit reads exactly these sample points.
+        """
+        if self.depth_map is None:
+            return self
+        compact = DepthSummary.__new__(DepthSummary)
+        compact.depth_map = None
+        compact.crop = self.crop
+        compact.height, compact.width = self.height, self.width
+        compact.max_depth = self.max_depth
+        compact._ratios = dict(self._ratios)
+        return compact
+
+    @property
+    def nbytes(self):
+        return self.depth_map.nbytes if self.depth_map is not None else 64 * len(self._ratios)
 
 def calculate_distance_using_height(landmarks, image_height, user_height_cm):
     """Calculate distance using the user's known height."""
@@ -123,48 +402,11 @@ def get_width_from_segmentation(segmentation_mask, height_px, center_x, image_wi
     """
     Scan horizontally at a specific height using MediaPipe segmentation mask.
     This is more robust than color thresholding for dark clothing.
+    Single-row convenience wrapper; calculate_measurements builds one SilhouetteProfile per mask.
     """
     if segmentation_mask is None:
         return 0
-    
-    # Ensure height_px is within bounds
-    mask_height, mask_width = segmentation_mask.shape
-    if height_px >= mask_height:
-        height_px = mask_height - 1
-    
-    # Scale center_x to mask coordinates
-    center_x_px = int(center_x * mask_width)
-    
-    # Get horizontal line at the specified height
-    horizontal_line = segmentation_mask[height_px, :]
-    
-    # Find left and right edges starting from center
-    # Segmentation mask: values > 0.1 indicate person
-    left_edge, right_edge = center_x_px, center_x_px
-    
-    # Scan from center to left
-    for i in range(center_x_px, 0, -1):
-        if horizontal_line[i] < 0.1:  # Found background (not person)
-            left_edge = i
-            break
-    
-    # Scan from center to right
-    for i in range(center_x_px, mask_width):
-        if horizontal_line[i] < 0.1:  # Found background (not person)
-            right_edge = i
-            break
-            
-    width_px = right_edge - left_edge
-    
-    # Scale back to original image width
-    width_px = int(width_px * (image_width / mask_width))
-    
-    # If width is unreasonably small, return 0 (will trigger fallback)
-    min_width = 0.05 * image_width  # Minimum 5% of image width
-    if width_px < min_width:
-        return 0
-        
-    return width_px
+    return SilhouetteProfile(segmentation_mask).width_at(height_px, center_x, image_width)
 
 def calculate_side_measurements(results, scale_factor, image_width, image_height, user_height_cm=None):
     """
@@ -173,391 +415,219 @@ def calculate_side_measurements(results, scale_factor, image_width, image_height
     In a SIDE/PROFILE view:
     - X-axis = depth (front-to-back of body)
     - Y-axis = vertical position
+    The math is measurement_kernel.side_depths over a batch of one.
     """
-    landmarks = results.pose_landmarks.landmark
-    
     # If user's height is provided, use it to get a more accurate scale factor
     if user_height_cm:
-        _, scale_factor = calculate_distance_using_height(landmarks, image_height, user_height_cm)
-    
-    def pixel_to_cm(value):
-        return round(value * scale_factor, 2)
-    
-    # Get key landmarks
-    left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-    right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-    left_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
-    right_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value]
-    nose = landmarks[mp_pose.PoseLandmark.NOSE.value]
+        _, scale_factor = calculate_distance_using_height(results.pose_landmarks.landmark, image_height, user_height_cm)
     
-    # In side view, we measure the visible HORIZONTAL span (X-axis) which represents body depth
-    # The person is facing sideways, so front-to-back depth is visible as left-right span
-    
-    # CHEST DEPTH - Measure from front (nose/chest front) to back (spine area)
-    # Use the max and min X positions at shoulder height to get full depth
-    shoulder_y = (left_shoulder.y + right_shoulder.y) / 2
-    
-    # For side view, the depth is the horizontal distance visible
-    # Take the shoulder with larger x (front of chest) and smaller x (back)
-    front_x = max(left_shoulder.x, right_shoulder.x, nose.x)
-    back_x = min(left_shoulder.x, right_shoulder.x)
-    
-    chest_depth_px = abs(front_x - back_x) * image_width
-    # Chest depth should be approximately 60-70% of width, add 20% buffer for accuracy
-    chest_depth_cm = pixel_to_cm(chest_depth_px) * 1.2
-    
-    # WAIST DEPTH - Estimate from torso curvature
-    # Waist is narrower than chest, typically 80-90% of chest depth
-    waist_depth_cm = chest_depth_cm * 0.85
-    
-    # HIP DEPTH - Similar to chest or slightly larger
-    front_hip_x = max(left_hip.x, right_hip.x)
-    back_hip_x = min(left_hip.x, right_hip.x)
-    hip_depth_px = abs(front_hip_x - back_hip_x) * image_width
-    hip_depth_cm = pixel_to_cm(hip_depth_px) * 1.15
-    
-    return {
-        "chest_depth_cm": chest_depth_cm,
-        "waist_depth_cm": waist_depth_cm,
-        "hip_depth_cm": hip_depth_cm
-    }
+    depths = side_depths(landmarks_to_array(results.pose_landmarks), image_width, scale_factor)
+    return {key: float(values[0]) for key, values in depths.items()}
 
 def calculate_measurements(results, scale_factor, image_width, image_height, depth_map, segmentation_mask=None, user_height_cm=None, side_depth_data=None):
-    landmarks = results.pose_landmarks.landmark
+    """
+    Front-view body measurements in cm for one subject. The math is measurement_kernel's
+    batched kernel; this reads the silhouette widths and depth ratios at its sample
+    points, runs a batch of one and reports silhouette widths it had to ignore.
+    """
+    landmarks = landmarks_to_array(results.pose_landmarks)
+    # depth_map may be a raw MiDaS array, a DepthSummary, or None when depth is off
+    depth = DepthSummary(depth_map) if isinstance(depth_map, np.ndarray) else depth_map
+    # One silhouette analyzer per mask answers every measurement row (a prebuilt profile may be passed in)
+    silhouette = SilhouetteProfile(segmentation_mask) if isinstance(segmentation_mask, np.ndarray) else segmentation_mask
 
     # If user's height is provided, use it to get a more accurate scale factor
     if user_height_cm:
-        _, scale_factor = calculate_distance_using_height(landmarks, image_height, user_height_cm)
-
-    def pixel_to_cm(value):
-        return round(value * scale_factor, 2)
-    
-    def calculate_circumference(width_px, depth_ratio=1.0):
-        """
-        Estimate circumference using width and depth adjustment.
-        Using a simplified elliptical approximation: C Γëê 2╧Ç * sqrt((a┬▓ + b┬▓)/2)
-        where a is half the width and b is estimated depth
-        """
-        width_cm = width_px * scale_factor
-        estimated_depth_cm = width_cm * depth_ratio * 0.7  # Depth is typically ~70% of width for torso
-        half_width = width_cm / 2
-        half_depth = estimated_depth_cm / 2
-        return round(2 * np.pi * np.sqrt((half_width**2 + half_depth**2) / 2), 2)
-
-    measurements = {}
-
-    # Get key landmarks
-    left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-    right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-    left_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
-    right_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value]
-    left_knee = landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value]
-    left_ankle = landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value]
-    left_wrist = landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value]
-    nose = landmarks[mp_pose.PoseLandmark.NOSE.value]
-    left_ear = landmarks[mp_pose.PoseLandmark.LEFT_EAR.value]
-
-    # SHOULDER WIDTH - Most reliable measurement
-    shoulder_width_px = abs(left_shoulder.x - right_shoulder.x) * image_width
-    
-    # Apply a slight correction factor for shoulders (they're usually detected well)
-    shoulder_correction = 1.1  # 10% wider
-    shoulder_width_px *= shoulder_correction
-    
-    measurements["shoulder_width"] = pixel_to_cm(shoulder_width_px)
-
-    # CHEST/BUST MEASUREMENT
-    chest_y_ratio = 0.15  # Approximately 15% down from shoulder to hip
-    chest_y = left_shoulder.y + (left_hip.y - left_shoulder.y) * chest_y_ratio
-    
-    chest_correction = 1.08  # 8% wider - more conservative for varied body types
-    chest_width_px = abs((right_shoulder.x - left_shoulder.x) * image_width) * chest_correction
-    
-    if segmentation_mask is not None:
-        chest_y_px = int(chest_y * image_height)
-        center_x = (left_shoulder.x + right_shoulder.x) / 2
-        detected_width = get_width_from_segmentation(segmentation_mask, chest_y_px, center_x, image_width)
-        if detected_width > 0:
-            # SAFETY CHECK: Only accept contour width if it's reasonable
-            # If detected width is > 1.5x the landmark width, it's likely catching background (chair/shadow)
-            landmark_width = abs(right_shoulder.x - left_shoulder.x) * image_width
-            if detected_width < landmark_width * 1.5:  # Allow some expansion but clamp explosions
-                 chest_width_px = max(chest_width_px, detected_width)
-            else:
-                 logger.warning(f"Ignored chest contour width {detected_width}px (too large vs {landmark_width}px)")
-    
-    chest_depth_ratio = 1.0
-    if depth_map is not None:
-        chest_x = int(((left_shoulder.x + right_shoulder.x) / 2) * image_width)
-        chest_y_px = int(chest_y * image_height)
-        scale_y = 384 / image_height
-        scale_x = 384 / image_width
-        chest_y_scaled = int(chest_y_px * scale_y)
-        chest_x_scaled = int(chest_x * scale_x)
-        if 0 <= chest_y_scaled < 384 and 0 <= chest_x_scaled < 384:
-            chest_depth = depth_map[chest_y_scaled, chest_x_scaled]
-            max_depth = np.max(depth_map)
-            chest_depth_ratio = 1.0 + 0.5 * (1.0 - chest_depth / max_depth)
-    
-    measurements["chest_width"] = pixel_to_cm(chest_width_px)
-    measurements["chest_circumference"] = calculate_circumference(chest_width_px, chest_depth_ratio)
-
-    # WAIST MEASUREMENT
-    # Adjust waist_y_ratio to better reflect the natural waistline
-    waist_y_ratio = 0.35  # 35% down from shoulder to hip (higher than before)
-    waist_y = left_shoulder.y + (left_hip.y - left_shoulder.y) * waist_y_ratio
-    
-    # Use contour detection to dynamically estimate waist width
-    if segmentation_mask is not None:
-        waist_y_px = int(waist_y * image_height)
-        center_x = (left_hip.x + right_hip.x) / 2
-        detected_width = get_width_from_segmentation(segmentation_mask, waist_y_px, center_x, image_width)
-        
-        # Calculate expected width from landmarks for safety check
-        hip_landmark_width = abs(right_hip.x - left_hip.x) * image_width
-        
-        if detected_width > 0 and detected_width < hip_landmark_width * 1.5:
-             # If valid and reasonable, use it
-             waist_width_px = detected_width
-        else:
-             logger.warning(f"Ignored waist contour width {detected_width}px (unreasonable)")
-             # Fallback to hip width if contour detection fails or is unsafe
-             waist_width_px = hip_landmark_width * 0.9  # 90% of hip width
-    else:
-        # Fallback to hip width if no frame is provided
-        waist_width_px = abs(right_hip.x - left_hip.x) * image_width * 0.9  # 90% of hip width
-    
-    # Apply correction factor to waist width
-    waist_correction = 1.05  # 5% wider - more conservative for varied body types
-    waist_width_px *= waist_correction
-    
-    # Get depth adjustment for waist if available
-    waist_depth_ratio = 1.0
-    if depth_map is not None:
-        waist_x = int(((left_hip.x + right_hip.x) / 2) * image_width)
-        waist_y_px = int(waist_y * image_height)
-        scale_y = 384 / image_height
-        scale_x = 384 / image_width
-        waist_y_scaled = int(waist_y_px * scale_y)
-        waist_x_scaled = int(waist_x * scale_x)
-        if 0 <= waist_y_scaled < 384 and 0 <= waist_x_scaled < 384:
-            waist_depth = depth_map[waist_y_scaled, waist_x_scaled]
-            max_depth = np.max(depth_map)
-            waist_depth_ratio = 1.0 + 0.5 * (1.0 - waist_depth / max_depth)
-    
-    measurements["waist_width"] = pixel_to_cm(waist_width_px)
-    measurements["waist"] = calculate_circumference(waist_width_px, waist_depth_ratio)
-
-    # HIP MEASUREMENT
-    hip_correction = 1.20  # 20% wider - more conservative for varied body types
-    hip_width_px = abs(left_hip.x * image_width - right_hip.x * image_width) * hip_correction
-    
-    if segmentation_mask is not None:
-        hip_y_offset = 0.1  # 10% down from hip landmarks
-        hip_y = left_hip.y + (left_knee.y - left_hip.y) * hip_y_offset
-        hip_y_px = int(hip_y * image_height)
-        center_x = (left_hip.x + right_hip.x) / 2
-        detected_width = get_width_from_segmentation(segmentation_mask, hip_y_px, center_x, image_width)
-        
-        # SAFETY CHECK for Hips
-        landmark_hip_width = abs(left_hip.x * image_width - right_hip.x * image_width)
-        
-        if detected_width > 0 and detected_width < landmark_hip_width * 2.0: # Hips can be wider, but 2x is limit
-            hip_width_px = max(hip_width_px, detected_width)
-        else:
-            logger.warning(f"Ignored hip contour width {detected_width}px (too large vs {landmark_hip_width}px)")
-    
-    hip_depth_ratio = 1.0
-    if depth_map is not None:
-        hip_x = int(((left_hip.x + right_hip.x) / 2) * image_width)
-        hip_y_px = int(left_hip.y * image_height)
-        scale_y = 384 / image_height
-        scale_x = 384 / image_width
-        hip_y_scaled = int(hip_y_px * scale_y)
-        hip_x_scaled = int(hip_x * scale_x)
-        if 0 <= hip_y_scaled < 384 and 0 <= hip_x_scaled < 384:
-            hip_depth = depth_map[hip_y_scaled, hip_x_scaled]
-            max_depth = np.max(depth_map)
-            hip_depth_ratio = 1.0 + 0.5 * (1.0 - hip_depth / max_depth)
-    
-    measurements["hip_width"] = pixel_to_cm(hip_width_px)
-    measurements["hip"] = calculate_circumference(hip_width_px, hip_depth_ratio)
-
-    # NECK - Use distance from nose to ear
-    neck_width_px = abs(nose.x - left_ear.x) * image_width * 2.0
-    measurements["neck"] = calculate_circumference(neck_width_px, 1.0)
-    measurements["neck_width"] = pixel_to_cm(neck_width_px)
-
-    # ARM LENGTH - Shoulder to wrist
-    arm_length_px = abs(left_shoulder.y - left_wrist.y) * image_height
-    measurements["arm_length"] = pixel_to_cm(arm_length_px)
-
-    # SHIRT LENGTH - Shoulder to hip with 20% extension
-    shirt_length_px = abs(left_shoulder.y - left_hip.y) * image_height * 1.20
-    measurements["shirt_length"] = pixel_to_cm(shirt_length_px)
-
-    # THIGH CIRCUMFERENCE (improved with depth information)
-    thigh_y_ratio = 0.2  # 20% down from hip to knee
-    thigh_y = left_hip.y + (left_knee.y - left_hip.y) * thigh_y_ratio
-    
-    # Apply correction factor for thigh width
-    thigh_correction = 1.2  # Thighs are typically wider than what can be estimated from front view
-    thigh_width_px = hip_width_px * 0.5 * thigh_correction  # Base thigh width on hip width
-    
-    # Use contour detection if segmentation mask is available
-    if segmentation_mask is not None:
-        thigh_y_px = int(thigh_y * image_height)
-        # Use center between hips for thigh measurement
-        thigh_center_x = (left_hip.x + right_hip.x) / 2
-        detected_width = get_width_from_segmentation(segmentation_mask, thigh_y_px, thigh_center_x, image_width)
-        
-        logger.info(f"Thigh detected_width: {detected_width}px")
-        
-        # Use detected width if reasonable, otherwise use hip-based estimate
-        hip_landmark_width = abs(left_hip.x - right_hip.x) * image_width
-        if detected_width > 0:
-            # Accept if it's at least 30% of hip width (very permissive)
-            if detected_width > hip_landmark_width * 0.3:
-                thigh_width_px = detected_width * thigh_correction
-                logger.info(f"Using detected thigh width: {thigh_width_px}px")
-            else:
-                logger.warning(f"Thigh width {detected_width}px too small, using hip-based estimate")
-    
-    # If depth map is available, use it for thigh measurement
-    thigh_depth_ratio = 1.0
-    if depth_map is not None:
-        thigh_x = int(left_hip.x * image_width)
-        thigh_y_px = int(thigh_y * image_height)
-        
-        # Scale coordinates to match depth map size
-        scale_y = 384 / image_height
-        scale_x = 384 / image_width
-        thigh_y_scaled = int(thigh_y_px * scale_y)
-        thigh_x_scaled = int(thigh_x * scale_x)
-        
-        if 0 <= thigh_y_scaled < 384 and 0 <= thigh_x_scaled < 384:
-            thigh_depth = depth_map[thigh_y_scaled, thigh_x_scaled]
-            max_depth = np.max(depth_map)
-            thigh_depth_ratio = 1.0 + 0.5 * (1.0 - thigh_depth / max_depth)
-    
-    measurements["thigh"] = pixel_to_cm(thigh_width_px)
-    measurements["thigh_circumference"] = calculate_circumference(thigh_width_px, thigh_depth_ratio)
-
+        _, scale_factor = calculate_distance_using_height(results.pose_landmarks.landmark, image_height, user_height_cm)
+
+    probes = probe_images(landmarks, image_width, image_height, [silhouette], [depth])
+    batch = measure_landmarks(landmarks, image_width, image_height, scale_factor, probes)
+    for measurement, reason, detected_px in batch.fallback_reasons(0):
+        logger.warning(f"Ignored {measurement} contour width {int(detected_px)}px ({reason})")
+        fallbacks_total.inc(measurement=measurement, reason=reason)
+    return batch.row(0)
+
+
+INVALID_IMAGE_MESSAGE = "Unable to process the image. Please ensure you're providing a clear, full-body photo and try again."
+
+# Minimum required landmarks for the front image
+# We focus on having a FULL BODY for accurate measurements
+FRONT_REQUIRED_LANDMARKS = [
+    mp_holistic.PoseLandmark.NOSE,
+    mp_holistic.PoseLandmark.LEFT_SHOULDER,
+    mp_holistic.PoseLandmark.RIGHT_SHOULDER,
+    mp_holistic.PoseLandmark.LEFT_ELBOW,
+    mp_holistic.PoseLandmark.RIGHT_ELBOW,
+    mp_holistic.PoseLandmark.RIGHT_KNEE,
+    mp_holistic.PoseLandmark.LEFT_KNEE
+]
 
-    # TROUSER LENGTH - Hip to ankle
-    trouser_length_px = abs(left_hip.y - left_ankle.y) * image_height
-    measurements["trouser_length"] = pixel_to_cm(trouser_length_px)
+def process_holistic(image_np):
+    """Run a pooled Holistic (segmentation + refined face) over a BGR image."""
+    rgb_frame = cv2.cvtColor(image_np, cv2.COLOR_BGR2RGB)
+    # Borrow a pre-warmed instance; the pool recycles it if processing raises
+    with holistic_pool.checkout(
+        enable_segmentation=True,  # CRITICAL for segmentation-based width detection
+        refine_face_landmarks=True
+    ) as holistic, stage_seconds.time(stage="holistic"):
+        return holistic.process(rgb_frame)
+
+def locate_person(frame):
+    """
+    Cheap first pass: pooled lightweight Pose on a thumbnail of the frame.
+    Returns the PersonCrop to run Holistic and MiDaS on, or None to use the whole frame.
+    """
+    if not PERSON_CROP:
+        return None
+    try:
+        detector = model_registry.get("person_detector", timeout=0)
+    except ModelNotReady:
+        return None
+    thumbnail = cv2.cvtColor(fit_within(frame, PERSON_DETECT_SIDE), cv2.COLOR_BGR2RGB)
+    with detector.checkout(enable_segmentation=False, refine_face_landmarks=False) as pose, \
+            stage_seconds.time(stage="person_detect"):
+        results = pose.process(thumbnail)
+    if results.pose_landmarks is None:
+        return None
+    # The thumbnail keeps the frame's aspect ratio, so its normalized landmarks place the box directly
+    crop = person_box(results.pose_landmarks, frame.shape[1], frame.shape[0], PERSON_CROP_MARGIN)
+    if crop is None or crop.area_ratio > 0.8:
+        return None  # Not worth a copy: the person fills the frame
+    return crop
+
+def process_front_holistic(frame):
+    """
+    Holistic for the front image, on the person's crop when the first pass finds one.
+    Returns (results, crop); results are in frame coordinates either way, crop is None
+    when the whole frame was used.
+    """
+    crop = locate_person(frame)
+    if crop is not None:
+        results = process_holistic(crop.apply(frame))
+        if results.pose_landmarks is not None and crop.contains(results.pose_landmarks, FRONT_REQUIRED_LANDMARKS):
+            return crop.results_to_frame(results), crop
+        # The first pass cut part of the body off; pay for the full frame rather than measure a partial one
+        logger.info("Person crop missed key landmarks; rerunning Holistic on the full frame")
+    return process_holistic(frame), None
+
+def missing_front_landmarks(pose_landmarks):
+    """Names of the FRONT_REQUIRED_LANDMARKS that are not visible in the frame."""
+    if not pose_landmarks:
+        return []
+    missing_upper = []
+    for landmark in FRONT_REQUIRED_LANDMARKS:
+        landmark_data = pose_landmarks.landmark[landmark]
+        # Increased threshold to 0.5 for better accuracy
+        if (landmark_data.visibility < 0.5 or 
+            landmark_data.x < 0 or 
+            landmark_data.x > 1 or
+            landmark_data.y < 0 or 
+            landmark_data.y > 1):
+            missing_upper.append(landmark.name.replace('_', ' '))
+    return missing_upper
+
+def validate_front_landmarks(pose_landmarks, image_width, image_height):
+    """
+    Pure validation over front-image pose landmarks to ensure:
+    - There is a person in the image
+    - Not just a face/selfie (upper body visible)
+    - Key upper landmarks are detected
+    Returns (is_valid, message). Nothing is logged: /live runs this on every frame, so
+    HTTP handlers log a failure once per request.
+    """
+    if not pose_landmarks:
+        return False, "No person detected. Please make sure you're clearly visible in the frame."
 
-    # INSEAM - Knee to ankle (more accurate for pants)
-    inseam_px = abs(left_knee.y - left_ankle.y) * image_height
-    measurements["inseam"] = pixel_to_cm(inseam_px)
+    # Verify minimum landmarks are detected
+    if missing_front_landmarks(pose_landmarks):
+        return False, f"Couldn't detect full body. Please make sure your full body is visible."
 
-    # ANATOMICAL VALIDATION
-    warnings = []
-    
-    # Check chest to waist ratio (should be reasonable)
-    chest_circ = measurements.get("chest_circumference", 0)
-    waist_circ = measurements.get("waist", 0)
-    
-    if chest_circ > 0 and waist_circ > 0:
-        ratio = chest_circ / waist_circ
-        if ratio > 2.5:
-            warnings.append("Waist measurement seems too small compared to chest. Please retake photo with arms slightly away from body.")
-        elif ratio < 0.9:
-            warnings.append("Chest measurement seems too small. Please ensure full torso is visible in photo.")
-    
+    # Check if this might be just a face/selfie (no torso)
+    nose = pose_landmarks.landmark[mp_holistic.PoseLandmark.NOSE]
+    left_shoulder = pose_landmarks.landmark[mp_holistic.PoseLandmark.LEFT_SHOULDER]
+    right_shoulder = pose_landmarks.landmark[mp_holistic.PoseLandmark.RIGHT_SHOULDER]
     
-    # Check shoulder width vs chest (shoulder should be wider than chest circumference / ╧Ç)
-    shoulder_width = measurements.get("shoulder_width", 0)
-    if shoulder_width > 0 and chest_circ > 0:
-        expected_chest_width = chest_circ / 3.14  # Approximate width from circumference
-        if shoulder_width < expected_chest_width * 0.7:
-            warnings.append("Shoulder measurement seems narrow. Ensure you're facing camera directly.")
+    # Calculate approximate upper body size
+    shoulder_width = abs(left_shoulder.x - right_shoulder.x) * image_width
+    head_to_shoulder = abs(left_shoulder.y - nose.y) * image_height
     
-    if warnings:
-        measurements["warnings"] = warnings
-    
-    measurements["measurement_quality"] = "excellent" if not warnings else "good" if len(warnings) == 1 else "fair"
-
-    return measurements
+    # If the shoulder width is small compared to head size, likely a selfie
+    if shoulder_width < head_to_shoulder * 1.2:
+        return False, "Please step back to show more of your upper body, not just your face."
 
+    return True, "Validation passed - proceeding with measurements"
 
 def validate_front_image(image_np):
     """
-    Basic validation for front image to ensure:
-    - There is a person in the image
-    - Not just a face/selfie (upper body visible)
-    - Key upper landmarks are detected
+    Run Holistic over a front image and validate its landmarks.
+    The /measurements route runs Holistic once itself and calls validate_front_landmarks directly.
     """
     try:
-        # Convert to RGB for MediaPipe
-        rgb_frame = cv2.cvtColor(image_np, cv2.COLOR_BGR2RGB)
         image_height, image_width = image_np.shape[:2]
-        
-        # Process with MediaPipe Holistic (Higher complexity for accuracy)
-        with mp_holistic.Holistic(
-            static_image_mode=True,
-            model_complexity=2,
-            enable_segmentation=False,
-            refine_face_landmarks=False) as holistic:
-            
-            results = holistic.process(rgb_frame)
-        
-        if not hasattr(results, 'pose_landmarks') or not results.pose_landmarks:
-            return False, "No person detected. Please make sure you're clearly visible in the frame."
-
-        # Minimum required upper body landmarks
-        # We focus on having a FULL BODY for accurate measurements
-        MINIMUM_LANDMARKS = [
-            mp_holistic.PoseLandmark.NOSE,
-            mp_holistic.PoseLandmark.LEFT_SHOULDER,
-            mp_holistic.PoseLandmark.RIGHT_SHOULDER,
-            mp_holistic.PoseLandmark.LEFT_ELBOW,
-            mp_holistic.PoseLandmark.RIGHT_ELBOW,
-            mp_holistic.PoseLandmark.RIGHT_KNEE,
-            mp_holistic.PoseLandmark.LEFT_KNEE
-        ]
-        
-        # Verify minimum landmarks are detected
-        missing_upper = []
-        for landmark in MINIMUM_LANDMARKS:
-            landmark_data = results.pose_landmarks.landmark[landmark]
-            # Increased threshold to 0.5 for better accuracy
-            if (landmark_data.visibility < 0.5 or 
-                landmark_data.x < 0 or 
-                landmark_data.x > 1 or
-                landmark_data.y < 0 or 
-                landmark_data.y > 1):
-                missing_upper.append(landmark.name.replace('_', ' '))
-        
-        if missing_upper:
-            print(f"Validation Failed. Missing: {missing_upper}")
-            return False, f"Couldn't detect full body. Please make sure your full body is visible."
-
-        # Check if this might be just a face/selfie (no torso)
-        nose = results.pose_landmarks.landmark[mp_holistic.PoseLandmark.NOSE]
-        left_shoulder = results.pose_landmarks.landmark[mp_holistic.PoseLandmark.LEFT_SHOULDER]
-        right_shoulder = results.pose_landmarks.landmark[mp_holistic.PoseLandmark.RIGHT_SHOULDER]
-        
-        # Calculate approximate upper body size
-        shoulder_width = abs(left_shoulder.x - right_shoulder.x) * image_width
-        head_to_shoulder = abs(left_shoulder.y - nose.y) * image_height
-        
-        # If the shoulder width is small compared to head size, likely a selfie
-        if shoulder_width < head_to_shoulder * 1.2:
-            return False, "Please step back to show more of your upper body, not just your face."
-
-        return True, "Validation passed - proceeding with measurements"
+        results = process_holistic(image_np)
+        return validate_front_landmarks(results.pose_landmarks, image_width, image_height)
         
     except Exception as e:
         logger.error(f"Error validating body image: {e}")
-        return False, "Unable to process the image. Please ensure you're providing a clear, full-body photo and try again."
+        return False, INVALID_IMAGE_MESSAGE
     
+def first_upload(files, *field_names):
+    """Return the first uploaded file present under any of the given form field names."""
+    for name in field_names:
+        if name in files:
+            return files[name]
+    return None
+
+@app.errorhandler(413)
+def request_too_large(e):
+    """Flask rejects bodies over MAX_CONTENT_LENGTH before the route runs"""
+    limit_mb = app.config["MAX_CONTENT_LENGTH"] // (1024 * 1024)
+    return jsonify({"error": f"Upload is too large. Please keep photos under {limit_mb}MB in total."}), 413
+
 @app.route("/health", methods=["GET"])
 def health_check():
     """Health check endpoint for monitoring"""
     return jsonify({"status": "healthy", "service": "youngin-api"}), 200
 
+def process_memory():
+    """
+    This worker's memory in MB. With preloaded models, pss (proportional set size: shared
+    pages split between the processes mapping them) is the worker's real share of the box;
+    summed over workers it is the total footprint, unlike rss.
+    """
+    fields = {"Rss": "rss_mb", "Pss": "pss_mb", "Shared_Clean": "shared_clean_mb", "Private_Dirty": "private_dirty_mb"}
+    try:
+        memory = {}
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in fields:
+                    memory[fields[key]] = round(int(value.split()[0]) / 1024, 1)
+        return memory
+    except OSError:
+        import resource
+        return {"max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+
+@app.route("/ready", methods=["GET"])
+def readiness_check():
+    """Readiness probe: 200 only once every required model is loaded and warmed"""
+    ready = model_registry.ready
+    return jsonify({
+        "ready": ready,
+        "models": model_registry.status(),
+        "worker": {"pid": os.getpid(), "preloaded": PRELOAD_MODELS, "memory": process_memory()},
+    }), 200 if ready else 503
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Prometheus scrape endpoint: per-stage latency, rejection/fallback counters, upstream latency"""
+    return Response(metrics_registry.render(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route("/depth/stats", methods=["GET"])
+def depth_stats():
+    """Depth scheduler queue depth and batch-size histograms"""
+    return jsonify(depth_batcher.stats()), 200
+
 @app.route("/", methods=["GET"])
 def root():
     """Root endpoint for Hugging Face health check"""
@@ -567,11 +637,116 @@ def root():
         "version": "2.0",
         "endpoints": {
             "health": "/health",
+            "ready": "/ready",
+            "metrics": "/metrics",
             "measurements": "/measurements (POST)",
-            "chat": "/chat (POST)"
+            "measurement_jobs": "/measurements/jobs (POST), /measurements/jobs/<id> (GET)",
+            "measurement_batch": "/measurements/batch (POST, NDJSON stream)",
+            "live": "/live (WebSocket, JPEG frames in, running estimates out)",
+            "chat": "/chat (POST)",
+            "chat_stream": "/chat/stream (POST or GET, Server-Sent Events)",
+            "chat_stats": "/chat/stats"
         }
     }), 200
 
+def detect_pose_image(image_file):
+    """
+    Decode + Holistic for the side upload; runs on the pipeline executor.
+    Returns (upload, results, cache_hit); cached results carry landmarks only.
+    """
+    upload = ingest_upload(image_file, MAX_IMAGE_BYTES, MAX_IMAGE_PIXELS, working_side=WORKING_MAX_SIDE)
+    observe_ingest(upload)
+    key = artifact_key("side", upload.frame)
+    artifacts = result_cache.get(key)
+    cache_hit = artifacts is not None
+    if not cache_hit:
+        artifacts = ImageArtifacts(process_holistic(upload.frame).pose_landmarks)
+        result_cache.put(key, artifacts, artifacts.nbytes)
+    return upload, artifacts.pose, cache_hit
+
+def read_measurement_request():
+    """
+    Pull the multipart /measurements fields out of the current request.
+    Returns ((front_file, side_file, height, depth), None) or (None, (error_body, status)).
+    """
+    # Validate request has files
+    if not request.files:
+        return None, ({"error": "No images provided. Please upload at least a front-facing photo."}, 400)
+    
+    # Resolve field aliases without copying request.files
+    front_image_file = first_upload(request.files, "front", "front_image")
+    if front_image_file is None:
+        return None, ({"error": "Missing front image for reference."}, 400)
+    # 'side_image' takes precedence over 'left_side', as before
+    side_image_file = first_upload(request.files, "side_image", "left_side")
+    
+    return (
+        front_image_file,
+        side_image_file,
+        request.form.get('height_cm') or request.form.get('height'),
+        request.form.get("depth") or request.args.get("depth")
+    ), None
+
+class DeferredCall:
+    """Future-like: runs fn on the thread that asks for result(), or never if cancelled first."""
+
+    def __init__(self, fn, *args):
+        self.fn = fn
+        self.args = args
+        self._cancelled = False
+
+    def result(self):
+        if self._cancelled:
+            raise CancelledError()
+        return self.fn(*self.args)
+
+    def cancel(self):
+        self._cancelled = True
+        return True
+
+def run_measurements(front_image_file, side_image_file, user_height_cm, depth_mode):
+    """Run the full measurement pipeline for one front/side pair. Returns (json_body, status_code)."""
+    if not model_registry.wait_ready(("holistic", "midas"), MODEL_READY_TIMEOUT):
+        return {"error": "The measurement service is warming up. Please try again in a moment."}, 503
+    
+    # Start the side image right away so its decode + Holistic overlap the front pipeline, when the
+    # thread budget left a core for it; otherwise it runs on this thread once the front is done
+    side_future = None
+    if side_image_file is not None:
+        side_future = submit_in_context(pipeline_executor, detect_pose_image, side_image_file) \
+            if PARALLEL_SIDE_IMAGE else DeferredCall(detect_pose_image, side_image_file)
+    try:
+        body, status = measure_front_and_side(front_image_file, side_future, user_height_cm, depth_mode)
+        if status == 400 and "code" in body:
+            rejections_total.inc(code=body["code"], pose=body.get("pose", "front"))
+        return body, status
+    finally:
+        if side_future is not None:
+            side_future.cancel()  # No-op once started; drops queued work when we return early
+
+# Opt-in request profiling: send PROFILING_TOKEN as the X-Profile header. Never a query parameter:
+# URLs end up in access logs, proxy logs and browser history. Without a configured token,
+# profiling is off and such requests are refused
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILE_SAMPLE_MS = float(os.getenv("PROFILE_SAMPLE_MS", "5"))  # Stack sampling interval (X-Profile-Sample: 1)
+# Traces are returned in debug_info and, if set, also appended here as JSON lines
+trace_log = create_event_logger("youngin.traces", os.getenv("PROFILE_TRACE_LOG", "off"))
+
+def requested_trace(label):
+    """
+    The RequestTrace this request asked for. Returns (trace, None), (None, None) when
+    profiling wasn't asked for, or (None, (error_body, status)) for a bad or misplaced token.
+    """
+    if "profile" in request.args:
+        return None, ({"error": "Send the profiling token in the X-Profile header, not the URL."}, 400)
+    token = request.headers.get("X-Profile")
+    if not token:
+        return None, None
+    if not PROFILING_TOKEN or not hmac.compare_digest(token.encode(), PROFILING_TOKEN.encode()):
+        return None, ({"error": "Profiling is not enabled for this token."}, 403)
+    sample = request.headers.get("X-Profile-Sample") == "1"
+    return RequestTrace(label, PROFILE_SAMPLE_MS if sample else None), None
+
 @app.route("/measurements", methods=["POST"])
 def upload_images():
     """
@@ -579,136 +754,434 @@ def upload_images():
     Expects: front image (required), side image (optional), height_cm (optional)
     Returns: JSON with body measurements or error message
     """
-    # Validate request has files
-    if not request.files:
-        return jsonify({"error": "No images provided. Please upload at least a front-facing photo."}), 400
+    trace, error = requested_trace("POST /measurements")
+    if error:
+        return jsonify(error[0]), error[1]
+    inputs, error = read_measurement_request()
+    if error:
+        return jsonify(error[0]), error[1]
+    with activate_trace(trace):
+        body, status = run_measurements(*inputs)
+    if trace is not None:
+        report = trace.to_dict()
+        # Successful responses carry it in debug_info; errors get a top-level "trace"
+        (body["debug_info"] if "debug_info" in body else body)["trace"] = report
+        trace_log.info("trace", extra={"fields": {**report, "status": status}})
+    with stage_seconds.time(stage="json_serialization"):
+        response = jsonify(body)
+    return response, status
+
+def snapshot_upload(image_file):
+    """
+    Copy an upload's bytes out of the request so a background job can read it after the
+    response. Small files stay in memory; larger ones are spooled to a temp file that is
+    deleted when the job closes it.
+    """
+    if image_file is None:
+        return None
+    spool = tempfile.SpooledTemporaryFile(max_size=JOB_SPOOL_MEMORY_BYTES)
+    # Copy one byte past the cap so ingest_upload still rejects oversized files
+    remaining = MAX_IMAGE_BYTES + 1
+    while remaining > 0:
+        chunk = image_file.stream.read(min(remaining, 1024 * 1024))
+        if not chunk:
+            break
+        spool.write(chunk)
+        remaining -= len(chunk)
+    spool.seek(0)
+    return FileStorage(stream=spool, filename=image_file.filename, content_type=image_file.content_type)
+
+def run_measurement_job(front_image_file, side_image_file, user_height_cm, depth_mode):
+    """run_measurements on snapshot uploads, releasing their spool files afterwards."""
+    try:
+        return run_measurements(front_image_file, side_image_file, user_height_cm, depth_mode)
+    finally:
+        for upload in (front_image_file, side_image_file):
+            if upload is not None:
+                upload.close()
+
+@app.route("/measurements/jobs", methods=["POST"])
+def create_measurement_job():
+    """
+    Queue a measurement job. Accepts the same multipart fields as /measurements.
+    Returns 202 with a job id; poll GET /measurements/jobs/<id> for the result.
+    """
+    inputs, error = read_measurement_request()
+    if error:
+        return jsonify(error[0]), error[1]
+    front_image_file, side_image_file, user_height_cm, depth_mode = inputs
+    
+    front_snapshot, side_snapshot = snapshot_upload(front_image_file), snapshot_upload(side_image_file)
+    try:
+        job = job_runner.submit(run_measurement_job, front_snapshot, side_snapshot, user_height_cm, depth_mode)
+    except JobQueueFull as e:
+        for snapshot in (front_snapshot, side_snapshot):
+            if snapshot is not None:
+                snapshot.close()
+        logger.warning(f"Rejecting measurement job: {e}")
+        return jsonify({"error": "We're processing a lot of photos right now. Please try again in a minute."}), 503
     
-    # Create a mutable copy of files
-    files = request.files.copy()
+    return jsonify({
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"/measurements/jobs/{job['job_id']}"
+    }), 202
+
+@app.route("/measurements/jobs/<job_id>", methods=["GET"])
+def get_measurement_job(job_id):
+    """
+    Job status and, once finished, the same body /measurements would have returned.
+    Optional ?wait=<seconds> long-polls until the job finishes (capped at JOB_MAX_WAIT_SECONDS).
+    """
+    try:
+        wait = min(float(request.args.get("wait", 0)), JOB_MAX_WAIT_SECONDS)
+    except ValueError:
+        return jsonify({"error": "wait must be a number of seconds"}), 400
     
-    if "front" not in files:
-        # Fallback to checking 'front_image' key if 'front' is missing
-        if "front_image" in files:
-             files["front"] = files["front_image"] # normalize
+    job = job_store.wait(job_id, wait) if wait > 0 else job_store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found or expired."}), 404
+    return jsonify(job), 200
+
+# Bulk re-measurement (POST /measurements/batch): subjects run on their own pool so they never
+# queue behind (or starve) the side-image work on pipeline_executor
+BATCH_PARALLELISM = int(os.getenv("BATCH_PARALLELISM") or HOLISTIC_POOL_SIZE)
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "200"))
+BATCH_MAX_BYTES = int(os.getenv("BATCH_MAX_MB", "512")) * 1024 * 1024
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_PARALLELISM, thread_name_prefix="batch")
+
+class MeasurementRequest(Request):
+    """Batch uploads get their own body cap; every other route keeps MAX_CONTENT_LENGTH."""
+
+    @property
+    def max_content_length(self):
+        if self.endpoint == "measure_batch":
+            return BATCH_MAX_BYTES
+        return super().max_content_length
+
+app.request_class = MeasurementRequest
+
+def measure_batch_item(item, front, side):
+    try:
+        return run_measurements(front, side, item.height_cm, item.depth)
+    except Exception as e:
+        logger.error(f"Error measuring batch subject {item.id}: {e}")
+        return {"error": "Internal Server Error"}, 500
+
+@app.route("/measurements/batch", methods=["POST"])
+def measure_batch():
+    """
+    Measure many subjects in one request.
+    Expects: a zip 'archive' (<id>/front.jpg, <id>/side.jpg, optional manifest.csv) or
+    multipart front_<id> / side_<id> / height_cm_<id> fields
+    Returns: application/x-ndjson, one line per subject as it finishes, then a summary line
+    """
+    try:
+        archive = request.files.get("archive")
+        if archive is not None:
+            items = items_from_zip(archive.stream, BATCH_MAX_ITEMS, MAX_IMAGE_BYTES)
         else:
-             return jsonify({"error": "Missing front image for reference."}), 400
+            items = items_from_form(request.files, request.form, BATCH_MAX_ITEMS)
+    except BatchError as e:
+        return jsonify({"error": str(e)}), 400
+    if not items:
+        return jsonify({"error": "No subjects found. Upload a zip 'archive' or front_<id> photos."}), 400
+    
+    lines = stream_batch(items, measure_batch_item, batch_executor, BATCH_PARALLELISM)
+    # stream_with_context keeps the request (and its spooled uploads) open until the last line
+    return Response(
+        stream_with_context(json.dumps(line, separators=(",", ":")) + "\n" for line in lines),
+        mimetype="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}
+    )
+
+def parse_user_height(user_height_cm):
+    """(height in cm, None), or (None, error message) for a value outside MIN/MAX_HEIGHT_CM or not a number."""
+    if not user_height_cm:
+        logger.info(f"No height provided, using default: {DEFAULT_HEIGHT_CM}cm")
+        return DEFAULT_HEIGHT_CM, None
+    try:
+        user_height_cm = float(user_height_cm)
+    except (TypeError, ValueError):
+        return None, "Invalid height value. Please provide height in centimeters as a number."
+    # Validate height is within reasonable range
+    if user_height_cm < MIN_HEIGHT_CM or user_height_cm > MAX_HEIGHT_CM:
+        return None, f"Height must be between {MIN_HEIGHT_CM}cm and {MAX_HEIGHT_CM}cm. Please check your input."
+    return user_height_cm, None
+
+# Live measurement (WebSocket /live). Each client borrows a tracking-mode Pose (complexity 1) that
+# follows the person between frames instead of running static Holistic detection on every frame.
+# A connection holds its gunicorn thread for as long as it is open, so keep LIVE_MAX_SESSIONS
+# below GUNICORN_THREADS or photo uploads will queue behind live clients.
+LIVE_MAX_SESSIONS = int(os.getenv("LIVE_MAX_SESSIONS", "1"))
+LIVE_MAX_SIDE = int(os.getenv("LIVE_MAX_SIDE", "640"))  # Frames are downscaled to this long side before tracking
+LIVE_IDLE_SECONDS = float(os.getenv("LIVE_IDLE_SECONDS", "30"))
+LIVE_MAX_FRAME_BYTES = int(os.getenv("LIVE_MAX_FRAME_KB", "1024")) * 1024
+LIVE_MIN_VISIBILITY = float(os.getenv("LIVE_MIN_VISIBILITY", "0.8"))
+LIVE_WINDOW = int(os.getenv("LIVE_WINDOW", "15"))  # Measured frames in the running median
+LIVE_MIN_SAMPLES = int(os.getenv("LIVE_MIN_SAMPLES", "8"))
+LIVE_CONVERGED_SPREAD = float(os.getenv("LIVE_CONVERGED_SPREAD", "0.02"))  # Relative IQR of the core measurements
+live_trackers = TrackerPool(max_sessions=LIVE_MAX_SESSIONS, model_complexity=1)
+
+# Pings keep proxies (e.g. Hugging Face Spaces) from closing a quiet socket; oversized frames close it
+app.config["SOCK_SERVER_OPTIONS"] = {"ping_interval": 25, "max_message_size": LIVE_MAX_FRAME_BYTES}
+sock = Sock(app)
+
+def measure_live_frame(results, image_width, image_height, user_height_cm):
+    """Front measurements for one tracked frame: height-calibrated, silhouette from the tracker's mask, no depth."""
+    silhouette = SilhouetteProfile(results.segmentation_mask) if results.segmentation_mask is not None else None
+    with stage_seconds.time(stage="live_measurement"):
+        # The scale comes from user_height_cm inside calculate_measurements
+        return calculate_measurements(results, None, image_width, image_height, None, silhouette, user_height_cm)
+
+def live_message(ws, payload):
+    ws.send(json.dumps(payload, separators=(",", ":"), default=float))
+
+@sock.route("/live")
+def live_measurements(ws):
+    """
+    Live measurement over a WebSocket.
+    Client sends: binary JPEG/PNG frames (a few per second is plenty), and optionally text
+    {"height_cm": ...} (also accepted as ?height_cm=) or {"reset": true} to start the estimate over
+    Server sends: {"type": "frame", ...} for every frame with tracking state and a pose hint,
+    preceded by {"type": "estimate", ...} when the frame was measured: running measurements,
+    spread, confidence and whether they have converged
+    """
+    user_height_cm, height_error = parse_user_height(request.args.get("height_cm"))
+    if height_error:
+        live_message(ws, {"type": "error", "error": height_error})
+        return
+    try:
+        tracker = live_trackers.acquire()
+    except Exception as e:
+        logger.error(f"Could not create live tracker: {e}")
+        tracker = None
+    if tracker is None:
+        live_message(ws, {"type": "error", "code": "BUSY",
+                          "error": "Live measurement is busy right now. Please try again in a minute, or upload photos instead."})
+        return
     
-    front_image_file = files["front"]
-    front_image_np = np.frombuffer(front_image_file.read(), np.uint8)
-    front_image_file.seek(0)  # Reset file pointer
+    session = LiveSession(
+        tracker, validate_front_landmarks, measure_live_frame, user_height_cm,
+        min_visibility=LIVE_MIN_VISIBILITY, window=LIVE_WINDOW,
+        min_samples=LIVE_MIN_SAMPLES, converged_spread=LIVE_CONVERGED_SPREAD
+    )
+    healthy = True
+    try:
+        live_message(ws, {"type": "ready", "user_height_cm": user_height_cm, "max_side": LIVE_MAX_SIDE})
+        while True:
+            data = ws.receive(timeout=LIVE_IDLE_SECONDS)
+            if data is None:
+                live_message(ws, {"type": "error", "code": "IDLE", "error": "No frames received; closing."})
+                break
+            if isinstance(data, str):
+                try:
+                    control = json.loads(data)
+                except ValueError:
+                    control = None
+                if not isinstance(control, dict):
+                    live_message(ws, {"type": "error", "error": "Text messages must be JSON objects."})
+                    continue
+                height, height_error = parse_user_height(control.get("height_cm")) if "height_cm" in control else (None, None)
+                if height_error:
+                    live_message(ws, {"type": "error", "error": height_error})
+                elif height is not None or control.get("reset"):
+                    session.reset(height)
+                    live_message(ws, {"type": "ready", "user_height_cm": session.user_height_cm, "max_side": LIVE_MAX_SIDE})
+                continue
+            
+            try:
+                upload = ingest_upload(FileStorage(stream=io.BytesIO(data)), LIVE_MAX_FRAME_BYTES, MAX_IMAGE_PIXELS,
+                                       working_side=LIVE_MAX_SIDE)
+            except ImageRejected as e:
+                live_message(ws, {"type": "error", "code": "INVALID_IMAGE", "error": str(e)})
+                continue
+            stage_seconds.observe(upload.decode_seconds, stage="live_decode")
+            with stage_seconds.time(stage="live_frame"):
+                messages = session.process(upload.frame)
+            for message in messages:
+                live_message(ws, message)
+    except ConnectionClosed:
+        pass
+    except Exception as e:
+        healthy = False  # The tracker may be mid-graph; build a fresh one for the next client
+        logger.error(f"Error in live session: {e}")
+        try:
+            live_message(ws, {"type": "error", "error": "Internal Server Error"})
+        except ConnectionClosed:
+            pass
+    finally:
+        live_trackers.release(tracker, healthy)
+        logger.info(f"Live session ended: {session.frames} frame(s), {session.measured} measured")
+
+@app.route("/live/stats", methods=["GET"])
+def live_stats():
+    """Live tracker pool usage"""
+    return jsonify(live_trackers.stats()), 200
+
+def measure_front_and_side(front_image_file, side_future, user_height_cm, depth_mode):
+    """
+    The /measurements pipeline. The front image is processed on the calling thread while
+    the side image (already submitted as side_future) runs on the pipeline executor, or
+    on this thread at the join when there's no core to spare (a DeferredCall);
+    the side result is joined once the front depth pass is done.
+    Returns (json_body, status_code).
+    """
+    # Read and decode the front upload exactly once; every later stage shares this frame
+    ingest_stats = {"bytes_read": 0, "pixels_decoded": 0}
+    try:
+        front_upload = ingest_upload(front_image_file, MAX_IMAGE_BYTES, MAX_IMAGE_PIXELS, working_side=WORKING_MAX_SIDE)
+    except ImageDecodeError:
+        return {"error": INVALID_IMAGE_MESSAGE, "pose": "front", "code": "INVALID_POSE"}, 400
+    except ImageRejected as e:
+        return {"error": str(e), "pose": "front", "code": "INVALID_IMAGE"}, 400
+    observe_ingest(front_upload)
+    front_frame = front_upload.frame
+    ingest_stats["bytes_read"] += front_upload.nbytes
+    ingest_stats["pixels_decoded"] += front_upload.pixels
     
-    is_valid, error_msg = validate_front_image(cv2.imdecode(front_image_np, cv2.IMREAD_COLOR))
+    # Single Holistic pass for the front image: the same results feed validation and measurements.
+    # A resubmitted image (same pixels) reuses its cached landmarks/silhouette/depth instead.
+    front_key = artifact_key("front", front_frame)
+    front_artifacts = result_cache.get(front_key)
+    cache_hits = {"front": front_artifacts is not None}
+    segmentation_mask = None
+    try:
+        if front_artifacts is None:
+            holistic_results, person = process_front_holistic(front_frame)
+            segmentation_mask = holistic_results.segmentation_mask
+            # Cached below once validation fails or the silhouette profile exists, so a hit never
+            # lacks the profile that a later (e.g. height-corrected) submission needs
+            front_artifacts = ImageArtifacts(holistic_results.pose_landmarks)
+            front_artifacts.crop = person
+        front_results = front_artifacts.pose
+        with stage_seconds.time(stage="validation"):
+            is_valid, error_msg = validate_front_landmarks(
+                front_results.pose_landmarks, front_frame.shape[1], front_frame.shape[0]
+            )
+        if not is_valid:
+            event_log.info("front_validation_failed", extra={"fields": {
+                "reason": error_msg, "missing": missing_front_landmarks(front_results.pose_landmarks)
+            }})
+    except Exception as e:
+        logger.error(f"Error validating body image: {e}")
+        is_valid, error_msg = False, INVALID_IMAGE_MESSAGE
     
     if not is_valid:
-        return jsonify({
+        if front_artifacts is not None:
+            result_cache.put(front_key, front_artifacts, front_artifacts.nbytes)
+        return {
             "error": error_msg,
             "pose": "front",
             "code": "INVALID_POSE"
-        }), 400
+        }, 400
     
     # Validate and normalize height parameter
-    user_height_cm = request.form.get('height_cm') or request.form.get('height')
     logger.info(f"Received user height from form: {user_height_cm}")
+    user_height_cm, height_error = parse_user_height(user_height_cm)
+    if height_error:
+        return {"error": height_error}, 400
     
-    if user_height_cm:
-        try:
-            user_height_cm = float(user_height_cm)
-            # Validate height is within reasonable range
-            if user_height_cm < MIN_HEIGHT_CM or user_height_cm > MAX_HEIGHT_CM:
-                return jsonify({
-                    "error": f"Height must be between {MIN_HEIGHT_CM}cm and {MAX_HEIGHT_CM}cm. Please check your input."
-                }), 400
-        except ValueError:
-            return jsonify({"error": "Invalid height value. Please provide height in centimeters as a number."}), 400
-    else:
-        user_height_cm = DEFAULT_HEIGHT_CM
-        logger.info(f"No height provided, using default: {DEFAULT_HEIGHT_CM}cm")
+    # Latency-sensitive clients can skip MiDaS (off) or run it at a smaller input (fast)
+    depth_mode = (depth_mode or DEFAULT_DEPTH_MODE).lower()
+    if depth_mode not in DEPTH_MODES:
+        return {"error": f"Invalid depth option. Use one of: {', '.join(DEPTH_MODES)}."}, 400
+    if not depth_backend.enabled:
+        depth_mode = "off"  # DEPTH_BACKEND=none: fast/full requests get the no-depth result, reported as such
     
-    # Also check for 'side_image' mapped to 'left_side'
-    if "side_image" in files:
-        files["left_side"] = files["side_image"]
-
-    received_images = {pose_name: files[pose_name] for pose_name in ["front", "left_side"] if pose_name in files}
-    measurements, scale_factor, focal_length, results = {}, None, FOCAL_LENGTH, {}
-    frames = {}
+    measurements, scale_factor, focal_length = {}, None, FOCAL_LENGTH
     side_depth_data = None  # Will store depth measurements from side view
+    image_height, image_width, _ = front_frame.shape
     
-    for pose_name, image_file in received_images.items():
-        image_np = np.frombuffer(image_file.read(), np.uint8)
-        frame = cv2.imdecode(image_np, cv2.IMREAD_COLOR)
-        if frame is None:
-            print(f"Error: Could not decode image for {pose_name}")
-            continue # Skip invalid files instead of crashing
-            
-        frames[pose_name] = frame  # Store the frame for contour detection
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # Use context manager for a fresh instance per request to prevent crashes/state issues
-        # Enable segmentation for accurate body width detection
-        with mp_holistic.Holistic(
-            static_image_mode=True, 
-            model_complexity=2, 
-            enable_segmentation=True,  # CRITICAL for segmentation-based width detection
-            refine_face_landmarks=True
-        ) as holistic_scoped:
-            results[pose_name] = holistic_scoped.process(rgb_frame)
+    # Always use height for calibration (default or provided)
+    if front_results.pose_landmarks:
+        _, scale_factor = calculate_distance_using_height(
+            front_results.pose_landmarks.landmark,
+            image_height,
+            user_height_cm
+        )
+    else:
+        # Fallback to object detection only if pose landmarks aren't detected
+        scale_factor, focal_length = detect_reference_object(front_frame)
+    
+    # Depth is only consumed by the front measurements; MiDaS runs while the side image is still in flight
+    if depth_mode in front_artifacts.depth:
+        depth = front_artifacts.depth[depth_mode]
+    else:
+        depth = DepthSummary.from_image(front_frame, depth_mode, front_artifacts.crop) if front_results.pose_landmarks else None
+    
+    if front_artifacts.silhouette is not None:
+        silhouette = front_artifacts.silhouette
+    else:
+        silhouette = SilhouetteProfile(segmentation_mask) if segmentation_mask is not None else None
+    
+    # Join the side-view pipeline
+    if side_future is not None:
+        try:
+            side_upload, side_results, cache_hits["left_side"] = side_future.result()
+            ingest_stats["bytes_read"] += side_upload.nbytes
+            ingest_stats["pixels_decoded"] += side_upload.pixels
             
-        image_height, image_width, _ = frame.shape
-        
-        if pose_name == "front":
-            # Always use height for calibration (default or provided)
-            if results[pose_name].pose_landmarks:
-                _, scale_factor = calculate_distance_using_height(
-                    results[pose_name].pose_landmarks.landmark,
-                    image_height,
+            # Process side image for depth measurements
+            if side_results.pose_landmarks:
+                side_height, side_width, _ = side_upload.frame.shape
+                side_depth_data = calculate_side_measurements(
+                    side_results,
+                    scale_factor if scale_factor else 0.05,
+                    side_width,
+                    side_height,
                     user_height_cm
                 )
-            else:
-                # Fallback to object detection only if pose landmarks aren't detected
-                scale_factor, focal_length = detect_reference_object(frame)
-        
-        # Process side image for depth measurements
-        if pose_name == "left_side" and results[pose_name].pose_landmarks:
-            # Calculate depth measurements from side view
-            side_depth_data = calculate_side_measurements(
-                results[pose_name],
-                scale_factor if scale_factor else 0.05,
-                image_width,
-                image_height,
-                user_height_cm
-            )
-            logger.info(f"Side depth measurements extracted: {side_depth_data}")
-        
-        depth_map = estimate_depth(frame) if pose_name in ["front", "left_side"] else None
-        
-        if results[pose_name].pose_landmarks:
-            if pose_name == "front":
-                measurements.update(calculate_measurements(
-                    results[pose_name], 
-                    scale_factor, 
-                    image_width, 
-                    image_height, 
-                    depth_map,
-                    results[pose_name].segmentation_mask,  # Pass segmentation mask
-                    user_height_cm,
-                    side_depth_data  # Pass side depth measurements if available
-                ))
+                logger.info(f"Side depth measurements extracted: {side_depth_data}")
+        except ImageRejected as e:
+            logger.warning(f"Skipping left_side image: {e}")  # Skip invalid files instead of crashing
+    
+    logger.info(f"Ingested image(s): {ingest_stats['bytes_read']} bytes, {ingest_stats['pixels_decoded']} pixels decoded")
+    
+    if front_results.pose_landmarks:
+        math_started = time.perf_counter()
+        measurements.update(calculate_measurements(
+            front_results, 
+            scale_factor, 
+            image_width, 
+            image_height, 
+            depth,
+            silhouette,  # Segmentation width profile
+            user_height_cm,
+            side_depth_data  # Pass side depth measurements if available
+        ))
+        # Mask scans happen lazily inside the math; report them as their own stage
+        scan_seconds = silhouette.scan_seconds if silhouette is not None else 0.0
+        stage_seconds.observe(time.perf_counter() - math_started - scan_seconds, stage="measurement_math")
+    
+    # Keep only derived artifacts: compact copies replace the mask and the depth map, and no pixels are
+    # retained. A cached entry may be in use by other requests, so it is replaced, never modified
+    new_silhouette = None
+    if front_artifacts.silhouette is None and silhouette is not None:
+        new_silhouette = silhouette.compact()
+        stage_seconds.observe(silhouette.scan_seconds, stage="segmentation_scan")
+    front_artifacts = front_artifacts.extended(new_silhouette, depth_mode, depth.compact() if depth is not None else None)
+    result_cache.put(front_key, front_artifacts, front_artifacts.nbytes)
     
     # Debug information to help troubleshoot measurements
     debug_info = {
         "scale_factor": float(scale_factor) if scale_factor else None,
         "focal_length": float(focal_length),
-        "user_height_cm": float(user_height_cm)
+        "user_height_cm": float(user_height_cm),
+        "depth_mode": depth_mode,
+        "depth_backend": depth_backend.name,
+        "cache_hits": cache_hits,
+        "ingest": ingest_stats,
+        # Working-frame pixels the front photo was measured at, and the person box Holistic/MiDaS ran on
+        "working_size": [image_width, image_height],
+        "person_crop": front_artifacts.crop.as_list() if front_artifacts.crop else None
     }
 
     logger.info(f"Measurements calculated successfully for user")
    
-    # Print measurements for container logs (both front and side if available)
-    print("\n=== MEASUREMENTS ===")
-    print(measurements)
-    print("\n=== DEBUG INFO ===")
-    print(debug_info)
-    print("===================\n")
+    # Structured record for container logs, serialized on the event log's own thread: log copies,
+    # since debug_info may still gain a trace before the response goes out
+    event_log.info("measurements", extra={"fields": {"measurements": dict(measurements), "debug_info": dict(debug_info)}})
     
     # Convert numpy types to native python types for JSON serialization
     def convert_numpy(obj):
@@ -724,10 +1197,10 @@ def upload_images():
             return [convert_numpy(i) for i in obj]
         return obj
 
-    return jsonify({
+    return {
         "measurements": convert_numpy(measurements),
         "debug_info": debug_info
-    })
+    }, 200
 
 # --- GEMINI CHATBOT INTEGRATION ---
 from google import genai
@@ -735,12 +1208,36 @@ from google.genai import types
 
 # Configure Gemini API
 GENAI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GENAI_API_KEY:
-    logger.error("GEMINI_API_KEY environment variable not set")
-    raise ValueError("GEMINI_API_KEY must be set in environment variables")
-
-# Initialize Client
-client = genai.Client(api_key=GENAI_API_KEY)
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "")  # e.g. a local fake server (benchmarks/fake_gemini.py)
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "20"))
+
+def load_gemini_client():
+    # A missing key only disables /chat instead of stopping the measurement API from starting
+    if not GENAI_API_KEY:
+        raise ValueError("GEMINI_API_KEY must be set in environment variables")
+    http_options = {"timeout": int(GEMINI_TIMEOUT_SECONDS * 1000)}  # Milliseconds; also bounds each streaming read
+    if GEMINI_BASE_URL:
+        http_options["base_url"] = GEMINI_BASE_URL
+    return genai.Client(api_key=GENAI_API_KEY, http_options=types.HttpOptions(**http_options))
+
+# A degraded Gemini must not eat the request threads /measurements needs: calls run on a small
+# pool with a hard deadline, identical in-flight questions share one call, and once most recent
+# calls fail the breaker answers with the "high traffic" message without calling upstream
+gemini_guard = UpstreamGuard(
+    "gemini",
+    max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")),
+    timeout=GEMINI_TIMEOUT_SECONDS,
+    queue_timeout=float(os.getenv("GEMINI_QUEUE_TIMEOUT_SECONDS", "2")),
+    breaker=CircuitBreaker(
+        failure_rate=float(os.getenv("GEMINI_BREAKER_FAILURE_RATE", "0.5")),
+        min_calls=int(os.getenv("GEMINI_BREAKER_MIN_CALLS", "10")),
+        window_seconds=float(os.getenv("GEMINI_BREAKER_WINDOW_SECONDS", "30")),
+        open_seconds=float(os.getenv("GEMINI_BREAKER_OPEN_SECONDS", "30"))
+    )
+)
+chat_flights = SingleFlight()
+
+model_registry.register("gemini", load_gemini_client, required=False)
 
 # System Instruction
 # System Instruction
@@ -781,6 +1278,98 @@ chat_history = [
     types.Content(role="model", parts=[types.Part.from_text(text="I am the Youngin AI Assistant, here to help you design your legacy.")])
 ]
 
+# Repeated questions are answered from a cache keyed by the normalized message, and
+# close matches to the platform facts above straight from a local index, without Gemini
+chat_cache = ArtifactCache(
+    max_entries=int(os.getenv("CHAT_CACHE_ENTRIES", "512")),
+    ttl_seconds=int(os.getenv("CHAT_CACHE_TTL_SECONDS", "3600")),
+    max_bytes=int(os.getenv("CHAT_CACHE_MB", "8")) * 1024 * 1024
+)
+# Above 1.0 disables the FAQ fast path
+faq_index = FaqIndex.from_instruction(sys_instruction, min_score=float(os.getenv("CHAT_FAQ_MIN_SCORE", "0.8")))
+logger.info(f"💬 Chat FAQ index: {len(faq_index)} facts")
+
+@app.route("/chat/stats", methods=["GET"])
+def chat_stats():
+    """Chat answer cache and FAQ fast-path hit rates, coalesced questions and the Gemini guard"""
+    return jsonify({
+        "cache": chat_cache.stats(),
+        "faq": faq_index.stats(),
+        "coalesced": chat_flights.coalesced,
+        "upstream": gemini_guard.stats()
+    }), 200
+
+CHAT_MODEL = 'gemini-flash-latest'
+CHAT_HIGH_TRAFFIC_MESSAGE = "I am currently experiencing high traffic. Please try again later."
+CHAT_EMPTY_REPLY_MESSAGE = "I couldn't generate a response. Please try rephrasing."
+
+def chat_generation_config():
+    return types.GenerateContentConfig(
+        system_instruction=sys_instruction,
+        temperature=0.7
+    )
+
+def read_chat_message():
+    """
+    Pull and validate the chat message: JSON body {"message": ...}, or ?message= on GET
+    (EventSource can only issue GETs). Returns (message, None) or (None, (error_body, status)).
+    """
+    if request.method == "GET":
+        user_message = request.args.get("message", "").strip()
+    else:
+        # Validate request content type
+        if not request.is_json:
+            return None, ({"error": "Request must be JSON"}, 400)
+        
+        data = request.json
+        user_message = data.get("message", "").strip()
+    
+    # Validate message content
+    if not user_message:
+        return None, ({"error": "No message provided"}, 400)
+    
+    if len(user_message) > 1000:
+        return None, ({"error": "Message too long. Please keep messages under 1000 characters."}, 400)
+    
+    return user_message, None
+
+def local_chat_answer(user_message):
+    """
+    Local answers come first: neither needs the Gemini client, so they keep working when it's down.
+    Returns (cache_key, reply or None).
+    """
+    question_key = normalize_question(user_message)
+    cached_reply = chat_cache.get(question_key)
+    if cached_reply is not None:
+        chat_answers_total.inc(source="cache")
+        return question_key, cached_reply
+    faq_reply = faq_index.answer(user_message)
+    if faq_reply is not None:
+        chat_answers_total.inc(source="faq")
+        return question_key, faq_reply
+    return question_key, None
+
+def remember_chat_reply(question_key, bot_reply):
+    chat_cache.put(question_key, bot_reply, len(bot_reply.encode("utf-8")))
+    chat_answers_total.inc(source="gemini")
+
+def generate_reply_text(client, user_message):
+    with upstream_call("gemini", "generate_content"):
+        response = client.models.generate_content(
+            model=CHAT_MODEL, 
+            config=chat_generation_config(),
+            contents=[user_message]
+        )
+    return response.text
+
+def ask_gemini(client, user_message):
+    """One guarded generate_content call; raises UpstreamUnavailable when the guard refuses or times out."""
+    try:
+        return gemini_guard.call(generate_reply_text, client, user_message)
+    except UpstreamUnavailable as e:
+        upstream_rejections_total.inc(service="gemini", reason=e.reason)
+        raise
+
 @app.route("/chat", methods=["POST"])
 def chat_endpoint():
     """
@@ -789,44 +1378,186 @@ def chat_endpoint():
     Returns: JSON with 'reply' field or error message
     """
     try:
-        # Validate request content type
-        if not request.is_json:
-            return jsonify({"error": "Request must be JSON"}), 400
-        
-        data = request.json
-        user_message = data.get("message", "").strip()
-        
-        # Validate message content
-        if not user_message:
-            return jsonify({"error": "No message provided"}), 400
-        
-        if len(user_message) > 1000:
-            return jsonify({"error": "Message too long. Please keep messages under 1000 characters."}), 400
+        user_message, error = read_chat_message()
+        if error:
+            return jsonify(error[0]), error[1]
+
+        question_key, local_reply = local_chat_answer(user_message)
+        if local_reply is not None:
+            return jsonify({"reply": local_reply})
 
         try:
-            response = client.models.generate_content(
-                model='gemini-flash-latest', 
-                config=types.GenerateContentConfig(
-                    system_instruction=sys_instruction,
-                    temperature=0.7
-                ),
-                contents=[user_message]
-            )
+            client = model_registry.get("gemini", timeout=5)
+        except ModelNotReady as e:
+            logger.error(f"Gemini client unavailable: {e}")
+            return jsonify({"error": "Chat is temporarily unavailable. Please try again later."}), 503
+
+        try:
+            # Identical questions already in flight wait for that call instead of making their own
+            bot_reply, shared = chat_flights.do(question_key, lambda: ask_gemini(client, user_message))
             
-            if response.text:
-                bot_reply = response.text
+            if bot_reply:
+                if shared:
+                    chat_answers_total.inc(source="coalesced")
+                else:
+                    remember_chat_reply(question_key, bot_reply)
                 return jsonify({"reply": bot_reply})
             else:
-                return jsonify({"error": "I couldn't generate a response. Please try rephrasing."}), 500
+                return jsonify({"error": CHAT_EMPTY_REPLY_MESSAGE}), 500
 
+        except UpstreamUnavailable as api_err:
+            logger.warning(f"Gemini call not made or abandoned: {api_err}")
+            return jsonify({"error": CHAT_HIGH_TRAFFIC_MESSAGE}), 500
         except Exception as api_err:
             logger.error(f"Gemini API Error: {api_err}")
-            return jsonify({"error": "I am currently experiencing high traffic. Please try again later."}), 500
+            return jsonify({"error": CHAT_HIGH_TRAFFIC_MESSAGE}), 500
         
     except Exception as e:
         logger.error(f"Server Error in /chat: {e}")
         return jsonify({"error": "Internal Server Error"}), 500
 
+# --- STREAMING CHAT (Server-Sent Events) ---
+# Events: "chunk" {"text"} as Gemini produces it, then "done" {"reply"} with the full text,
+# or "error" {"error"} with the same messages /chat returns. ": heartbeat" comments keep
+# proxies from timing the stream out and surface client disconnects while Gemini is slow.
+CHAT_HEARTBEAT_SECONDS = float(os.getenv("CHAT_HEARTBEAT_SECONDS", "10"))
+chat_stream_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("CHAT_STREAM_WORKERS", "8")),
+    thread_name_prefix="chat-stream"
+)
+_STREAM_END = object()
+
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def sse_response(events):
+    return Response(events, content_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"  # Don't let a reverse proxy buffer the stream
+    })
+
+def pump_gemini_stream(client, user_message, chunks, cancelled, started):
+    """
+    Runs on chat_stream_executor: forwards streamed text into `chunks` until Gemini
+    finishes or the client goes away, then closes the upstream response.
+    """
+    outcome = "error"
+    try:
+        if cancelled.is_set():
+            outcome = "cancelled"  # Client left while this stream was queued for a worker
+            return
+        stream = client.models.generate_content_stream(
+            model=CHAT_MODEL,
+            config=chat_generation_config(),
+            contents=[user_message]
+        )
+        try:
+            first_token = True
+            for chunk in stream:
+                if cancelled.is_set():
+                    outcome = "cancelled"
+                    break
+                if chunk.text:
+                    if first_token:
+                        chat_first_token_seconds.observe(time.perf_counter() - started)
+                        first_token = False
+                    chunks.put(chunk.text)
+            else:
+                outcome = "ok"
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()  # Drops the upstream HTTP stream when we stopped early
+    except Exception as api_err:
+        logger.error(f"Gemini API Error (stream): {api_err}")
+        chunks.put(api_err)
+    finally:
+        # Streams share the breaker and the concurrency limit with /chat (admitted in stream_chat_reply)
+        if outcome == "cancelled":
+            gemini_guard.breaker.cancel()
+        else:
+            gemini_guard.breaker.record(outcome == "ok")
+        upstream_seconds.observe(time.perf_counter() - started,
+                                 service="gemini", call="generate_content_stream", outcome=outcome)
+        chunks.put(_STREAM_END)
+
+def stream_chat_reply(client, user_message, question_key):
+    """
+    SSE generator for one Gemini reply; closing it (client disconnect) cancels the upstream stream.
+    The stream holds one of gemini_guard's slots for as long as the generator runs.
+    """
+    try:
+        gemini_guard.acquire()
+    except UpstreamUnavailable as e:
+        upstream_rejections_total.inc(service="gemini", reason=e.reason)
+        yield sse_event("error", {"error": CHAT_HIGH_TRAFFIC_MESSAGE})
+        return
+    chunks = queue.Queue()
+    cancelled = threading.Event()
+    parts = []
+    try:
+        try:
+            chat_stream_executor.submit(pump_gemini_stream, client, user_message, chunks, cancelled,
+                                        time.perf_counter())
+        except BaseException:
+            gemini_guard.breaker.cancel()  # Never reached upstream
+            raise
+        while True:
+            try:
+                item = chunks.get(timeout=CHAT_HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield ": heartbeat\n\n"
+                continue
+            if item is _STREAM_END:
+                break
+            if isinstance(item, Exception):
+                yield sse_event("error", {"error": CHAT_HIGH_TRAFFIC_MESSAGE})
+                return
+            parts.append(item)
+            yield sse_event("chunk", {"text": item})
+        
+        bot_reply = "".join(parts)
+        if not bot_reply:
+            yield sse_event("error", {"error": CHAT_EMPTY_REPLY_MESSAGE})
+            return
+        remember_chat_reply(question_key, bot_reply)
+        yield sse_event("done", {"reply": bot_reply})
+    finally:
+        # Normal end, or GeneratorExit when the server fails to write to a gone client
+        cancelled.set()
+        gemini_guard.release()
+
+@app.route("/chat/stream", methods=["GET", "POST"])
+def chat_stream_endpoint():
+    """
+    Streaming variant of /chat over Server-Sent Events.
+    Expects: JSON with 'message' field (POST) or ?message= (GET, for EventSource)
+    Returns: text/event-stream of chunk/done/error events; validation errors are JSON as in /chat
+    """
+    try:
+        user_message, error = read_chat_message()
+        if error:
+            return jsonify(error[0]), error[1]
+
+        question_key, local_reply = local_chat_answer(user_message)
+        if local_reply is not None:
+            return sse_response(iter([
+                sse_event("chunk", {"text": local_reply}),
+                sse_event("done", {"reply": local_reply})
+            ]))
+
+        try:
+            client = model_registry.get("gemini", timeout=5)
+        except ModelNotReady as e:
+            logger.error(f"Gemini client unavailable: {e}")
+            return jsonify({"error": "Chat is temporarily unavailable. Please try again later."}), 503
+
+        return sse_response(stream_chat_reply(client, user_message, question_key))
+
+    except Exception as e:
+        logger.error(f"Server Error in /chat/stream: {e}")
+        return jsonify({"error": "Internal Server Error"}), 500
+
 # --- RAZORPAY PAYMENT ROUTES ---
 
 @app.route("/create-order", methods=["POST"])
@@ -848,11 +1579,27 @@ def create_order():
             "payment_capture": 1
         }
         
-        logger.info(f"Creating Razorpay order: {order_data}")
+        # Only a client-supplied key deduplicates; identical carts from different customers must not share an order
+        idempotency_key = request.headers.get("Idempotency-Key") or data.get("idempotency_key")
+        cart = {k: v for k, v in data.items() if k != "idempotency_key"}
+
+        def create_razorpay_order():
+            logger.info(f"Creating Razorpay order: {order_data}")
+            with upstream_call("razorpay", "order_create"):
+                order = razorpay_client.order.create(data=order_data)
+            logger.info(f"Order created: {order}")
+            return order
 
-        order = razorpay_client.order.create(data=order_data)
-        logger.info(f"Order created: {order}")
-        return jsonify(order)
+        try:
+            order, source = razorpay_orders.create(cart, create_razorpay_order, idempotency_key)
+        except IdempotencyConflict as e:
+            return jsonify({"error": str(e)}), 409
+        orders_total.inc(source=source)
+
+        response = jsonify(order)
+        if source != "created":
+            response.headers["Idempotent-Replayed"] = "true"
+        return response
         
     except Exception as e:
         logger.error(f"Error creating order: {e}")
@@ -864,23 +1611,53 @@ def verify_payment():
     try:
         data = request.json
         
-        # Razorpay expects these keys for verification
-        params_dict = {
-            "razorpay_order_id": data.get("razorpay_order_id"),
-            "razorpay_payment_id": data.get("razorpay_payment_id"),
-            "razorpay_signature": data.get("razorpay_signature")
-        }
-        
-        # verify_payment_signature raises an error if signature is invalid
-        razorpay_client.utility.verify_payment_signature(params_dict)
+        # A local HMAC check: no Razorpay client, network or shared state involved
+        if not verify_payment_signature(
+            data.get("razorpay_order_id"),
+            data.get("razorpay_payment_id"),
+            data.get("razorpay_signature"),
+            RAZORPAY_KEY_SECRET
+        ):
+            return jsonify({"error": "Payment verification failed"}), 400
         
         return jsonify({"status": "success", "message": "Payment verified"})
         
-    except razorpay.errors.SignatureVerificationError:
-        return jsonify({"error": "Payment verification failed"}), 400
     except Exception as e:
         logger.error(f"Error verifying payment: {e}")
         return jsonify({"error": str(e)}), 500
 
+# --- MODEL LOADING ---
+# Everything is registered above; load and warm in the background so the server answers
+# /health immediately and /ready flips once the models are warm.
+# With PRELOAD_MODELS=1 (set by gunicorn.conf.py when preload_app is on) the gunicorn master
+# loads the fork-safe weights once and workers share them copy-on-write; the rest of the
+# models, and anything else that can't cross a fork, are built per worker in init_worker().
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "0") == "1"
+# Torch weights are plain tensors; ONNX sessions, MediaPipe graphs and HTTP clients are per worker
+FORK_SHARED_MODELS = ("midas",) if depth_backend.fork_safe else ()
+
+def preload_shared_models():
+    """Runs in the master before fork: load (but don't warm) the shared weights, single-threaded."""
+    # No torch parallel region may run before fork: GNU OpenMP's pool doesn't survive it
+    if torch is not None:
+        torch.set_num_threads(1)
+    for name in FORK_SHARED_MODELS:
+        model_registry.load(name, warm=False)
+    # Keep the GC from touching (and so un-sharing) the pages of everything loaded so far
+    gc.collect()
+    gc.freeze()
+
+def init_worker():
+    """Runs in each worker after fork (gunicorn post_fork hook)."""
+    global razorpay_client
+    apply_thread_budget(torch, cv2)
+    razorpay_client = create_razorpay_client()  # requests.Session pools mustn't be shared across processes
+    model_registry.start(background=True)  # Warms the shared weights, builds Holistic and Gemini here
+
+if PRELOAD_MODELS:
+    preload_shared_models()
+else:
+    model_registry.start(background=True)
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
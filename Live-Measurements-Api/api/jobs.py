@@ -0,0 +1,195 @@
+"""
+Background measurement jobs: a job store plus an in-process worker pool.
+
+POST /measurements/jobs enqueues work here and returns a job id immediately;
+GET /measurements/jobs/<id> reads status/results back from the store. The store
+is swappable: the in-memory default is per-process, the SQLite stand-in is
+shared by every gunicorn worker on the box.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("done", "failed")
+
+
+def _new_job():
+    return {
+        "job_id": uuid.uuid4().hex,
+        "status": "queued",
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "status_code": None,
+        "result": None,
+    }
+
+
+class InMemoryJobStore:
+    """Jobs in a dict guarded by a Condition so long-polls wake as soon as a job finishes."""
+
+    def __init__(self, ttl_seconds=3600, max_jobs=1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_jobs = max_jobs
+        self._jobs = {}
+        self._cond = threading.Condition()
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl_seconds
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job["finished_at"] is not None and job["finished_at"] < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+        # Still over the cap: drop the oldest finished jobs first
+        if len(self._jobs) > self.max_jobs:
+            finished = sorted((job for job in self._jobs.values() if job["status"] in TERMINAL_STATUSES),
+                              key=lambda job: job["finished_at"])
+            for job in finished[:len(self._jobs) - self.max_jobs]:
+                del self._jobs[job["job_id"]]
+
+    def create(self):
+        job = _new_job()
+        with self._cond:
+            self._expire()
+            self._jobs[job["job_id"]] = job
+        return dict(job)
+
+    def update(self, job_id, **fields):
+        with self._cond:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+                self._cond.notify_all()
+
+    def get(self, job_id):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def wait(self, job_id, timeout):
+        """Block until the job is done/failed or timeout expires; returns the latest snapshot."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None or job["status"] in TERMINAL_STATUSES:
+                    return dict(job) if job else None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return dict(job)
+                self._cond.wait(remaining)
+
+
+class SQLiteJobStore:
+    """Local stand-in for a shared backend: one SQLite file visible to every worker process."""
+
+    POLL_INTERVAL = 0.2
+
+    def __init__(self, path, ttl_seconds=3600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, data TEXT NOT NULL, finished_at REAL)")
+
+    def _connect(self):
+        # sqlite3 connections can't cross threads, so keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self):
+        job = _new_job()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                         (time.time() - self.ttl_seconds,))
+            conn.execute("INSERT INTO jobs (job_id, data, finished_at) VALUES (?, ?, NULL)",
+                         (job["job_id"], json.dumps(job)))
+        return job
+
+    def update(self, job_id, **fields):
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            job = json.loads(row[0])
+            job.update(fields)
+            conn.execute("UPDATE jobs SET data = ?, finished_at = ? WHERE job_id = ?",
+                         (json.dumps(job), job["finished_at"], job_id))
+
+    def get(self, job_id):
+        row = self._connect().execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def wait(self, job_id, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] in TERMINAL_STATUSES or time.monotonic() >= deadline:
+                return job
+            time.sleep(min(self.POLL_INTERVAL, max(0.0, deadline - time.monotonic())))
+
+
+def create_job_store(url, ttl_seconds=3600):
+    """'memory' (default) or 'sqlite:///path/to/jobs.db'."""
+    if url.startswith("sqlite:///"):
+        return SQLiteJobStore(url[len("sqlite:///"):], ttl_seconds=ttl_seconds)
+    if url != "memory":
+        raise ValueError(f"Unsupported JOB_STORE: {url}")
+    return InMemoryJobStore(ttl_seconds=ttl_seconds)
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when max_pending jobs are already queued or running."""
+
+
+class JobRunner:
+    """Runs `fn(*args) -> (body, status_code)` on a worker pool and records the outcome in the store."""
+
+    def __init__(self, store, workers=1, max_pending=32):
+        self.store = store
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"{self._pending} jobs already pending")
+            self._pending += 1
+        job = self.store.create()
+        try:
+            self._executor.submit(self._run, job["job_id"], fn, args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        return job
+
+    def _run(self, job_id, fn, args):
+        self.store.update(job_id, status="running", started_at=time.time())
+        try:
+            body, status_code = fn(*args)
+            self.store.update(job_id, status="done" if status_code < 400 else "failed",
+                              status_code=status_code, result=body, finished_at=time.time())
+        except Exception as e:
+            logger.error(f"Measurement job {job_id} crashed: {e}")
+            self.store.update(job_id, status="failed", status_code=500,
+                              result={"error": "Internal Server Error"}, finished_at=time.time())
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    @property
+    def pending(self):
+        with self._lock:
+            return self._pending
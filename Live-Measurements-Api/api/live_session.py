@@ -0,0 +1,214 @@
+"""
+Live (frame-stream) measurement sessions for the /live WebSocket.
+
+The still-photo path builds a static_image_mode Holistic result for every upload. A live
+session instead keeps one tracking-mode Pose graph per client: after the first detection
+MediaPipe follows the person from frame to frame without re-running the detector, and
+smooths landmarks and the segmentation mask over time. Frames arrive already downscaled
+(the /live handler decodes them with ingest_upload at LIVE_MAX_SIDE), and only steady,
+high-visibility frames are measured. Running estimates are
+the median of the last few measured frames; they count as converged once their spread
+is small.
+"""
+import logging
+import threading
+from collections import deque
+from time import perf_counter
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+mp_pose = mp.solutions.pose
+
+# Nose, shoulders, elbows, hips, knees, ankles: what the measurements read
+KEY_LANDMARKS = (0, 11, 12, 13, 14, 23, 24, 25, 26, 27, 28)
+# Steadiness is judged on the torso and ankles, which move least while someone holds a pose
+MOTION_LANDMARKS = (11, 12, 23, 24, 27, 28)
+# Convergence is judged on these; other measurements are reported but don't hold it back
+CORE_MEASUREMENTS = ("shoulder_width", "chest_circumference", "waist", "hip", "inseam")
+
+
+class TrackerPool:
+    """
+    Tracking-mode Pose graphs shared across live sessions. A graph is reset (tracking
+    state dropped) when its session ends and handed to the next client instead of being
+    rebuilt. At most `max_sessions` graphs exist at once.
+    """
+
+    def __init__(self, max_sessions=1, model_complexity=1):
+        self.max_sessions = max(1, int(max_sessions))
+        self.model_complexity = model_complexity
+        self._idle = []
+        self._in_use = 0
+        self._lock = threading.Lock()
+        self.stats_counts = {"created": 0, "reused": 0, "rejected": 0}
+
+    def _create(self):
+        tracker = mp_pose.Pose(
+            static_image_mode=False,
+            model_complexity=self.model_complexity,
+            smooth_landmarks=True,
+            enable_segmentation=True,
+            smooth_segmentation=True
+        )
+        self.stats_counts["created"] += 1
+        return tracker
+
+    def acquire(self):
+        """A tracker, or None when max_sessions are already live."""
+        with self._lock:
+            if self._idle:
+                self._in_use += 1
+                self.stats_counts["reused"] += 1
+                return self._idle.pop()
+            if self._in_use >= self.max_sessions:
+                self.stats_counts["rejected"] += 1
+                return None
+            self._in_use += 1
+        try:
+            return self._create()
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+            raise
+
+    def release(self, tracker, healthy=True):
+        if healthy:
+            try:
+                tracker.reset()
+            except Exception as e:
+                logger.warning(f"Could not reset live tracker: {e}")
+                healthy = False
+        if not healthy:
+            try:
+                tracker.close()
+            except Exception as e:
+                logger.warning(f"Error closing live tracker: {e}")
+        with self._lock:
+            self._in_use -= 1
+            if healthy:
+                self._idle.append(tracker)
+
+    def stats(self):
+        with self._lock:
+            return {"max_sessions": self.max_sessions, "live": self._in_use, "idle": len(self._idle),
+                    **self.stats_counts}
+
+
+class RunningEstimate:
+    """Median of the last `window` measured frames, with a relative IQR spread per measurement."""
+
+    def __init__(self, window=15, min_samples=8, converged_spread=0.02):
+        self.min_samples = min_samples
+        self.converged_spread = converged_spread
+        self._samples = deque(maxlen=window)
+        self._visibility = deque(maxlen=window)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def add(self, measurements, visibility):
+        self._samples.append({k: float(v) for k, v in measurements.items()
+                              if isinstance(v, (int, float, np.number)) and not isinstance(v, bool)})
+        self._visibility.append(visibility)
+
+    def clear(self):
+        self._samples.clear()
+        self._visibility.clear()
+
+    def summary(self):
+        keys = set().union(*self._samples)
+        values, spread = {}, {}
+        for key in sorted(keys):
+            series = np.array([s[key] for s in self._samples if key in s])
+            median = float(np.median(series))
+            q25, q75 = np.percentile(series, (25, 75))
+            values[key] = round(median, 2)
+            spread[key] = float((q75 - q25) / median) if median else 0.0
+        core = [spread[key] for key in CORE_MEASUREMENTS if key in spread] or list(spread.values()) or [1.0]
+        worst = max(core)
+        n = len(self._samples)
+        converged = n >= self.min_samples and worst <= self.converged_spread
+        # Fills up with samples, drops as the estimates disagree, scaled by how clearly the body was seen
+        confidence = min(1.0, n / self.min_samples) * max(0.0, 1.0 - worst / (5 * self.converged_spread)) \
+            * float(np.mean(self._visibility))
+        return {
+            "measurements": values,
+            "spread_pct": {key: round(value * 100, 1) for key, value in spread.items()},
+            "samples": n,
+            "confidence": round(confidence, 3),
+            "converged": converged,
+        }
+
+
+class LiveSession:
+    """
+    One client's stream. `validate(pose_landmarks, width, height)` and
+    `measure(results, width, height, user_height_cm)` come from index.py, so live
+    estimates use the same validation and measurement code as still photos.
+    """
+
+    def __init__(self, tracker, validate, measure, user_height_cm, min_visibility=0.8, max_motion=0.01,
+                 window=15, min_samples=8, converged_spread=0.02):
+        self.tracker = tracker
+        self.validate = validate
+        self.measure = measure
+        self.user_height_cm = user_height_cm
+        self.min_visibility = min_visibility
+        self.max_motion = max_motion  # Mean normalized landmark shift between consecutive frames
+        self.estimate = RunningEstimate(window, min_samples, converged_spread)
+        self.frames = 0
+        self.measured = 0
+        self._previous = None
+
+    def reset(self, user_height_cm=None):
+        """New height or a fresh start: forget the estimates (tracking carries on)."""
+        if user_height_cm is not None:
+            self.user_height_cm = user_height_cm
+        self.estimate.clear()
+        self._previous = None
+
+    def process(self, frame):
+        """
+        Track one BGR frame, already at its working size; returns the messages to push:
+        "estimate" if this frame was measured, then "frame".
+        """
+        started = perf_counter()
+        self.frames += 1
+        height, width = frame.shape[:2]
+        results = self.tracker.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        track_ms = (perf_counter() - started) * 1000
+
+        message = {"type": "frame", "frame": self.frames, "tracked": results.pose_landmarks is not None,
+                   "selected": False, "hint": None}
+        messages = []
+        if results.pose_landmarks is None:
+            self._previous = None
+            message["hint"] = "No person detected. Please make sure you're clearly visible in the frame."
+        else:
+            landmarks = results.pose_landmarks.landmark
+            positions = np.array([(landmarks[i].x, landmarks[i].y) for i in MOTION_LANDMARKS])
+            motion = float(np.abs(positions - self._previous).mean()) if self._previous is not None else None
+            self._previous = positions
+            visibility = float(np.mean([landmarks[i].visibility for i in KEY_LANDMARKS]))
+            is_valid, validation_message = self.validate(results.pose_landmarks, width, height)
+
+            if not is_valid:
+                message["hint"] = validation_message
+            elif visibility < self.min_visibility:
+                message["hint"] = "Please make sure your whole body is well lit and visible."
+            elif motion is None or motion > self.max_motion:
+                message["hint"] = "Hold still."
+            else:
+                message["selected"] = True
+                self.estimate.add(self.measure(results, width, height, self.user_height_cm), visibility)
+                self.measured += 1
+                messages.append({"type": "estimate", **self.estimate.summary()})
+
+        message["track_ms"] = round(track_ms, 1)
+        message["process_ms"] = round((perf_counter() - started) * 1000, 1)
+        messages.append(message)
+        return messages
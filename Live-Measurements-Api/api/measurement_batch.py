@@ -0,0 +1,195 @@
+"""
+Bulk re-measurement for POST /measurements/batch.
+
+A batch is a list of subjects (front photo, optional side photo, height), given either as
+a multipart bundle or as a zip archive. Subjects run through the normal /measurements
+pipeline with bounded parallelism and each one is reported as soon as it finishes, so
+a batch only ever holds `parallelism` subjects' photos in memory at once: multipart files
+are spooled to disk by Werkzeug and zip members are read when their subject starts.
+
+Multipart bundle: front_<id>, side_<id> (optional), height_cm_<id> (optional), depth_<id>
+(optional) for each subject.
+
+Zip archive: <id>/front.jpg and <id>/side.jpg (.jpeg/.png too), at any folder depth, plus an
+optional manifest.csv with an "id" column and "height_cm" / "depth" columns.
+"""
+import csv
+import io
+import os
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+from time import perf_counter
+
+from werkzeug.datastructures import FileStorage
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+
+
+class BatchError(ValueError):
+    """The batch as a whole is unusable; the message is safe to show to users."""
+
+
+class BatchItem:
+    """One subject. Photos are opened lazily, right before the subject is measured."""
+
+    def __init__(self, item_id, front, side=None, height_cm=None, depth=None):
+        self.id = item_id
+        self.height_cm = height_cm
+        self.depth = depth
+        self._front = front  # FileStorage, or a zero-argument callable returning one
+        self._side = side
+
+    def open(self):
+        """(front, side) as FileStorage objects; side may be None."""
+        front = self._front() if callable(self._front) else self._front
+        side = self._side() if callable(self._side) else self._side
+        return front, side
+
+
+def items_from_form(files, form, max_items):
+    """Subjects from front_<id> / side_<id> / height_cm_<id> / depth_<id> fields, in upload order."""
+    items = []
+    for field, upload in files.items():
+        if not field.startswith("front_"):
+            continue
+        item_id = field[len("front_"):]
+        items.append(BatchItem(
+            item_id,
+            upload,
+            files.get(f"side_{item_id}"),
+            form.get(f"height_cm_{item_id}") or form.get("height_cm"),
+            form.get(f"depth_{item_id}") or form.get("depth")
+        ))
+    if len(items) > max_items:
+        raise BatchError(f"Too many subjects in one batch ({len(items)}). The limit is {max_items}.")
+    return items
+
+
+def _zip_member_reader(archive, info, max_bytes):
+    def read():
+        # One byte past the cap so ingest_upload still rejects oversized photos (and zip bombs stop early)
+        with archive.open(info) as member:
+            data = member.read(max_bytes + 1)
+        return FileStorage(stream=io.BytesIO(data), filename=os.path.basename(info.filename))
+    return read
+
+
+def _read_manifest(archive, info):
+    with archive.open(info) as raw:
+        rows = csv.DictReader(io.TextIOWrapper(raw, encoding="utf-8-sig"))
+        if not rows.fieldnames or "id" not in rows.fieldnames:
+            raise BatchError("manifest.csv needs an 'id' column.")
+        return {row["id"].strip(): row for row in rows if row.get("id")}
+
+
+def items_from_zip(fileobj, max_items, max_image_bytes):
+    """
+    Subjects from a zip archive, sorted by id. The returned items read from the open
+    ZipFile, so open() them on one thread at a time and keep `fileobj` open until done.
+    """
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except (zipfile.BadZipFile, OSError):
+        raise BatchError("The batch archive is not a valid zip file.")
+
+    photos, manifest = {}, {}
+    for info in archive.infolist():
+        if info.is_dir():
+            continue
+        parts = info.filename.replace("\\", "/").split("/")
+        if any(part.startswith((".", "__MACOSX")) for part in parts):
+            continue
+        name, extension = os.path.splitext(parts[-1].lower())
+        if parts[-1].lower() == "manifest.csv":
+            manifest = _read_manifest(archive, info)
+        elif len(parts) >= 2 and name in ("front", "side") and extension in IMAGE_EXTENSIONS:
+            photos.setdefault(parts[-2], {})[name] = info
+
+    subjects = sorted(item_id for item_id, views in photos.items() if "front" in views)
+    if len(subjects) > max_items:
+        raise BatchError(f"Too many subjects in one batch ({len(subjects)}). The limit is {max_items}.")
+    items = []
+    for item_id in subjects:
+        views = photos[item_id]
+        row = manifest.get(item_id, {})
+        items.append(BatchItem(
+            item_id,
+            _zip_member_reader(archive, views["front"], max_image_bytes),
+            _zip_member_reader(archive, views["side"], max_image_bytes) if "side" in views else None,
+            row.get("height_cm") or None,
+            row.get("depth") or None
+        ))
+    return items
+
+
+def stream_batch(items, measure, executor, parallelism):
+    """
+    Yields one dict per subject in completion order, then a summary dict.
+    `measure(item, front, side)` returns (json_body, status_code) like run_measurements.
+    Closing the generator (client gone) cancels subjects that haven't started.
+    """
+    batch_started = perf_counter()
+    remaining = iter(enumerate(items))
+    in_flight = {}  # future -> (index, item, queued_at)
+    statuses = {}
+
+    def timed(item, front, side):
+        started = perf_counter()
+        body, status = measure(item, front, side)
+        return body, status, started, perf_counter()
+
+    def line(index, item, body, status, queued_at, started, finished):
+        statuses[status] = statuses.get(status, 0) + 1
+        row = {
+            "id": item.id,
+            "index": index,
+            "status": status,
+            "timing": {
+                "queued_ms": round((started - queued_at) * 1000, 1),
+                "elapsed_ms": round((finished - started) * 1000, 1),
+            },
+        }
+        if status == 200:
+            row["result"] = body
+        else:
+            row.update(body)  # error, plus code/pose for validation failures
+        return row
+
+    try:
+        exhausted = False
+        while in_flight or not exhausted:
+            while not exhausted and len(in_flight) < parallelism:
+                entry = next(remaining, None)
+                if entry is None:
+                    exhausted = True
+                    break
+                index, item = entry
+                queued_at = perf_counter()
+                try:
+                    front, side = item.open()
+                except Exception:
+                    now = perf_counter()
+                    yield line(index, item, {"error": "Could not read this subject's photos from the batch.",
+                                             "code": "INVALID_IMAGE"}, 400, queued_at, now, now)
+                    continue
+                in_flight[executor.submit(timed, item, front, side)] = (index, item, queued_at)
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, item, queued_at = in_flight.pop(future)
+                body, status, started, finished = future.result()
+                yield line(index, item, body, status, queued_at, started, finished)
+
+        ok = statuses.get(200, 0)
+        yield {"summary": {
+            "subjects": len(items),
+            "succeeded": ok,
+            "failed": sum(statuses.values()) - ok,
+            "statuses": {str(status): count for status, count in sorted(statuses.items())},
+            "elapsed_ms": round((perf_counter() - batch_started) * 1000, 1),
+        }}
+    finally:
+        for future in in_flight:
+            future.cancel()
@@ -0,0 +1,386 @@
+"""
+Array-backed landmarks and the body-measurement math as a NumPy kernel.
+
+Landmarks are converted once into a (33, 4) float32 array of x, y, z, visibility
+(MediaPipe stores them as 32-bit floats, so nothing is lost), and subjects are stacked
+into (N, 33, 4) batches. The kernel reproduces calculate_measurements and
+calculate_side_measurements from index.py exactly, warnings and measurement_quality
+included: every formula keeps the original operation order in float64, squares go
+through libm pow like Python's ** does, and cm values are rounded like Python's round().
+
+The only per-image inputs are the silhouette widths and depth ratios at the sample rows,
+gathered per subject by probe_images (ImageProbes.none() when there are no masks or
+depth maps). Probes can be kept with the landmarks and the kernel rerun over thousands
+of subjects for re-measurement or tuning.
+"""
+import numpy as np
+
+# mp.solutions.pose.PoseLandmark values
+NOSE = 0
+LEFT_EAR = 7
+LEFT_SHOULDER = 11
+RIGHT_SHOULDER = 12
+LEFT_WRIST = 15
+LEFT_HIP = 23
+RIGHT_HIP = 24
+LEFT_KNEE = 25
+LEFT_ANKLE = 27
+RIGHT_ANKLE = 28
+
+NUM_LANDMARKS = 33
+X, Y, Z, VISIBILITY = range(4)
+
+# Fractions of the shoulder-to-hip (or hip-to-knee) span where each measurement row sits
+CHEST_Y_RATIO = 0.15
+WAIST_Y_RATIO = 0.35
+NATURAL_WAIST_BAND = (0.25, 0.50)
+HIP_Y_OFFSET = 0.1
+THIGH_Y_RATIO = 0.2
+
+SHOULDER_CORRECTION = 1.1
+CHEST_CORRECTION = 1.08
+WAIST_CORRECTION = 1.05
+HIP_CORRECTION = 1.20
+THIGH_CORRECTION = 1.2
+
+WAIST_TOO_SMALL_WARNING = ("Waist measurement seems too small compared to chest. "
+                           "Please retake photo with arms slightly away from body.")
+CHEST_TOO_SMALL_WARNING = "Chest measurement seems too small. Please ensure full torso is visible in photo."
+SHOULDER_NARROW_WARNING = "Shoulder measurement seems narrow. Ensure you're facing camera directly."
+
+# Fallback codes per measurement: why a silhouette width was ignored
+FALLBACK_REASONS = (None, "contour_missing", "contour_too_wide", "contour_too_narrow")
+CONTOUR_MISSING, CONTOUR_TOO_WIDE, CONTOUR_TOO_NARROW = 1, 2, 3
+
+
+def landmarks_to_array(pose_landmarks):
+    """A MediaPipe NormalizedLandmarkList as a (33, 4) float32 array of x, y, z, visibility."""
+    return np.array(
+        [(lm.x, lm.y, lm.z, lm.visibility) for lm in pose_landmarks.landmark],
+        dtype=np.float32
+    ).reshape(NUM_LANDMARKS, 4)
+
+
+def stack_landmarks(landmark_arrays):
+    """(N, 33, 4) batch from per-subject (33, 4) arrays."""
+    return np.stack(landmark_arrays).astype(np.float32, copy=False)
+
+
+def round2(values):
+    """
+    Round to 2 decimals exactly like Python's round(value, 2). rint(x * 100) / 100 agrees
+    with it except when x * 100 lands within rounding error of a half; those few go
+    through round() itself.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scaled = values * 100.0
+    rounded = np.rint(scaled) / 100.0
+    ambiguous = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    for i in zip(*np.nonzero(ambiguous)):
+        rounded[i] = round(float(values[i]), 2)
+    return rounded
+
+
+def _square(values):
+    # Python's float ** 2 calls libm pow(), which isn't always the correctly rounded x * x;
+    # float_power uses the same pow() (np.power may take a SIMD path that differs again)
+    return np.float_power(values, 2.0)
+
+
+def _batch(landmarks):
+    landmarks = np.asarray(landmarks)
+    if landmarks.ndim == 2:
+        landmarks = landmarks[None]
+    # float32 -> float64 is exact, so every value matches the Python float read off the protobuf
+    return landmarks.astype(np.float64)
+
+
+def _column(lm, index, axis):
+    return lm[:, index, axis]
+
+
+def height_scale(landmarks, image_height, user_height_cm):
+    """
+    cm per pixel from the user's height, as calculate_distance_using_height computes it:
+    nose to lowest ankle is taken as 88% of full height.
+    """
+    lm = _batch(landmarks)
+    image_height = np.asarray(image_height, dtype=np.float64)
+    nose_y = _column(lm, NOSE, Y) * image_height
+    bottom_foot = np.maximum(_column(lm, LEFT_ANKLE, Y), _column(lm, RIGHT_ANKLE, Y)) * image_height
+    with np.errstate(divide="ignore"):
+        person_height_px = np.abs(bottom_foot - nose_y) / 0.88
+        return np.asarray(user_height_cm, dtype=np.float64) / person_height_px
+
+
+class SamplePoints:
+    """Where each subject's silhouette and depth are read, in the original arithmetic."""
+
+    def __init__(self, landmarks, image_height):
+        lm = _batch(landmarks)
+        image_height = np.asarray(image_height, dtype=np.float64)
+        ls_x, ls_y = _column(lm, LEFT_SHOULDER, X), _column(lm, LEFT_SHOULDER, Y)
+        rs_x = _column(lm, RIGHT_SHOULDER, X)
+        lh_x, lh_y = _column(lm, LEFT_HIP, X), _column(lm, LEFT_HIP, Y)
+        rh_x = _column(lm, RIGHT_HIP, X)
+        lk_y = _column(lm, LEFT_KNEE, Y)
+
+        def to_row(y):
+            return np.trunc(y * image_height).astype(np.int64)  # int() truncates toward zero
+
+        self.chest_y = ls_y + (lh_y - ls_y) * CHEST_Y_RATIO
+        self.waist_y = ls_y + (lh_y - ls_y) * WAIST_Y_RATIO
+        self.hip_y = lh_y + (lk_y - lh_y) * HIP_Y_OFFSET
+        self.thigh_y = lh_y + (lk_y - lh_y) * THIGH_Y_RATIO
+        self.chest_row = to_row(self.chest_y)
+        self.waist_row = to_row(self.waist_y)
+        self.hip_row = to_row(self.hip_y)
+        self.thigh_row = to_row(self.thigh_y)
+        self.band_start_row = to_row(ls_y + (lh_y - ls_y) * NATURAL_WAIST_BAND[0])
+        self.band_end_row = to_row(ls_y + (lh_y - ls_y) * NATURAL_WAIST_BAND[1])
+        self.shoulder_center_x = (ls_x + rs_x) / 2
+        self.hip_center_x = (lh_x + rh_x) / 2
+        self.left_hip_x, self.left_hip_y = lh_x, lh_y
+
+
+class ImageProbes:
+    """
+    Per-subject inputs read from the image: silhouette widths in image pixels (0 when
+    the scan failed) and circumference depth ratios (1.0 without depth).
+    """
+
+    WIDTHS = ("chest_px", "waist_px", "hip_px", "thigh_px", "natural_waist_px")
+    RATIOS = ("chest_depth", "waist_depth", "hip_depth", "thigh_depth")
+
+    def __init__(self, n):
+        self.has_silhouette = np.zeros(n, dtype=bool)
+        for name in self.WIDTHS:
+            setattr(self, name, np.zeros(n, dtype=np.float64))
+        for name in self.RATIOS:
+            setattr(self, name, np.ones(n, dtype=np.float64))
+
+    @classmethod
+    def none(cls, n):
+        """Landmarks only: no silhouette, no depth."""
+        return cls(n)
+
+
+def probe_images(landmarks, image_width, image_height, silhouettes, depths):
+    """
+    ImageProbes for a batch. silhouettes[i] is a SilhouetteProfile (or None) and depths[i]
+    a DepthSummary (or None) for subject i; image sizes are scalars or (N,) arrays.
+    """
+    points = SamplePoints(landmarks, image_height)
+    n = len(points.chest_row)
+    widths = np.broadcast_to(np.asarray(image_width), (n,))
+    heights = np.broadcast_to(np.asarray(image_height), (n,))
+    probes = ImageProbes(n)
+    for i, (silhouette, depth) in enumerate(zip(silhouettes, depths)):
+        width, height = int(widths[i]), int(heights[i])
+        shoulder_center, hip_center = float(points.shoulder_center_x[i]), float(points.hip_center_x[i])
+        if silhouette is not None:
+            probes.has_silhouette[i] = True
+            probes.chest_px[i] = silhouette.width_at(int(points.chest_row[i]), shoulder_center, width)
+            probes.waist_px[i] = silhouette.width_at(int(points.waist_row[i]), hip_center, width)
+            probes.natural_waist_px[i] = silhouette.narrowest_row(
+                int(points.band_start_row[i]), int(points.band_end_row[i]), hip_center, width
+            )[1]
+            probes.hip_px[i] = silhouette.width_at(int(points.hip_row[i]), hip_center, width)
+            probes.thigh_px[i] = silhouette.width_at(int(points.thigh_row[i]), hip_center, width)
+        if depth is not None:
+            probes.chest_depth[i] = depth.ratio_at(shoulder_center, float(points.chest_y[i]), width, height)
+            probes.waist_depth[i] = depth.ratio_at(hip_center, float(points.waist_y[i]), width, height)
+            probes.hip_depth[i] = depth.ratio_at(hip_center, float(points.left_hip_y[i]), width, height)
+            probes.thigh_depth[i] = depth.ratio_at(float(points.left_hip_x[i]), float(points.thigh_y[i]),
+                                                   width, height)
+    return probes
+
+
+class MeasurementBatch:
+    """Kernel output: one (N,) array per measurement, plus the per-subject warning and fallback flags."""
+
+    # Key order of the calculate_measurements dict
+    ORDER = ("shoulder_width", "chest_width", "chest_circumference", "waist_width", "waist",
+             "natural_waist_width", "natural_waist", "hip_width", "hip", "neck", "neck_width",
+             "arm_length", "shirt_length", "thigh", "thigh_circumference", "trouser_length", "inseam")
+
+    def __init__(self, columns, natural_waist_valid, warning_flags, fallbacks, detected):
+        self.columns = columns
+        self.natural_waist_valid = natural_waist_valid
+        self.warning_flags = warning_flags  # (N, 3): waist too small, chest too small, shoulders narrow
+        self.fallbacks = fallbacks  # measurement -> (N,) int8 index into FALLBACK_REASONS
+        self.detected = detected  # measurement -> (N,) silhouette width that was considered
+
+    def __len__(self):
+        return len(self.columns["shoulder_width"])
+
+    def warnings(self, i):
+        flags = self.warning_flags[i]
+        warnings = []
+        if flags[0]:
+            warnings.append(WAIST_TOO_SMALL_WARNING)
+        elif flags[1]:
+            warnings.append(CHEST_TOO_SMALL_WARNING)
+        if flags[2]:
+            warnings.append(SHOULDER_NARROW_WARNING)
+        return warnings
+
+    def fallback_reasons(self, i):
+        """[(measurement, reason, detected_px)] for subject i."""
+        return [(name, FALLBACK_REASONS[codes[i]], self.detected[name][i])
+                for name, codes in self.fallbacks.items() if codes[i]]
+
+    def row(self, i):
+        """Subject i as the dict calculate_measurements returns."""
+        measurements = {}
+        for key in self.ORDER:
+            if key.startswith("natural_waist") and not self.natural_waist_valid[i]:
+                continue
+            measurements[key] = float(self.columns[key][i])
+        warnings = self.warnings(i)
+        if warnings:
+            measurements["warnings"] = warnings
+        measurements["measurement_quality"] = "excellent" if not warnings else "good" if len(warnings) == 1 else "fair"
+        return measurements
+
+    def rows(self):
+        return [self.row(i) for i in range(len(self))]
+
+
+def measure_landmarks(landmarks, image_width, image_height, scale_factor, probes=None):
+    """
+    The calculate_measurements math over an (N, 33, 4) batch (a single (33, 4) array is a
+    batch of one). scale_factor is cm per pixel, a scalar or (N,) array (see height_scale).
+    """
+    lm = _batch(landmarks)
+    n = lm.shape[0]
+    probes = probes if probes is not None else ImageProbes.none(n)
+    image_width = np.asarray(image_width, dtype=np.float64)
+    image_height = np.asarray(image_height, dtype=np.float64)
+    scale_factor = np.asarray(scale_factor, dtype=np.float64)
+    has_silhouette = probes.has_silhouette
+
+    ls_x, ls_y = _column(lm, LEFT_SHOULDER, X), _column(lm, LEFT_SHOULDER, Y)
+    rs_x = _column(lm, RIGHT_SHOULDER, X)
+    lh_x, lh_y = _column(lm, LEFT_HIP, X), _column(lm, LEFT_HIP, Y)
+    rh_x = _column(lm, RIGHT_HIP, X)
+    lk_y = _column(lm, LEFT_KNEE, Y)
+    la_y = _column(lm, LEFT_ANKLE, Y)
+    lw_y = _column(lm, LEFT_WRIST, Y)
+    nose_x = _column(lm, NOSE, X)
+    le_x = _column(lm, LEFT_EAR, X)
+
+    def pixel_to_cm(value):
+        return round2(value * scale_factor)
+
+    def circumference(width_px, depth_ratio=1.0):
+        # Elliptical approximation; depth is ~70% of width for the torso. Rounded like np.float64.__round__
+        width_cm = width_px * scale_factor
+        estimated_depth_cm = width_cm * depth_ratio * 0.7
+        half_width = width_cm / 2
+        half_depth = estimated_depth_cm / 2
+        return np.round(2 * np.pi * np.sqrt((_square(half_width) + _square(half_depth)) / 2), 2)
+
+    columns = {}
+    fallbacks = {}
+    detected = {"chest": probes.chest_px, "waist": probes.waist_px, "hip": probes.hip_px, "thigh": probes.thigh_px}
+
+    # SHOULDER WIDTH
+    shoulder_width_px = np.abs(ls_x - rs_x) * image_width * SHOULDER_CORRECTION
+    columns["shoulder_width"] = pixel_to_cm(shoulder_width_px)
+
+    # CHEST: widen to the silhouette unless it is implausibly wide (chair/shadow)
+    chest_width_px = np.abs((rs_x - ls_x) * image_width) * CHEST_CORRECTION
+    landmark_width = np.abs(rs_x - ls_x) * image_width
+    chest_seen = has_silhouette & (probes.chest_px > 0)
+    chest_ok = chest_seen & (probes.chest_px < landmark_width * 1.5)
+    chest_width_px = np.where(chest_ok, np.maximum(chest_width_px, probes.chest_px), chest_width_px)
+    fallbacks["chest"] = np.where(chest_seen & ~chest_ok, CONTOUR_TOO_WIDE, 0).astype(np.int8)
+    columns["chest_width"] = pixel_to_cm(chest_width_px)
+    columns["chest_circumference"] = circumference(chest_width_px, probes.chest_depth)
+
+    # WAIST: silhouette width, else 90% of the hip landmark width
+    hip_landmark_width = np.abs(rh_x - lh_x) * image_width
+    waist_ok = has_silhouette & (probes.waist_px > 0) & (probes.waist_px < hip_landmark_width * 1.5)
+    waist_width_px = np.where(waist_ok, probes.waist_px, hip_landmark_width * 0.9) * WAIST_CORRECTION
+    fallbacks["waist"] = np.where(
+        has_silhouette & ~waist_ok, np.where(probes.waist_px <= 0, CONTOUR_MISSING, CONTOUR_TOO_WIDE), 0
+    ).astype(np.int8)
+    columns["waist_width"] = pixel_to_cm(waist_width_px)
+    columns["waist"] = circumference(waist_width_px, probes.waist_depth)
+
+    # NATURAL WAIST: narrowest silhouette row in the band, only when there is one
+    natural_waist_valid = has_silhouette & (probes.natural_waist_px > 0) \
+        & (probes.natural_waist_px < hip_landmark_width * 1.5)
+    natural_waist_px = probes.natural_waist_px * WAIST_CORRECTION
+    columns["natural_waist_width"] = pixel_to_cm(natural_waist_px)
+    columns["natural_waist"] = circumference(natural_waist_px, probes.waist_depth)
+
+    # HIP: widen to the silhouette up to 2x the landmark width
+    hip_width_px = np.abs(lh_x * image_width - rh_x * image_width) * HIP_CORRECTION
+    landmark_hip_width = np.abs(lh_x * image_width - rh_x * image_width)
+    hip_ok = has_silhouette & (probes.hip_px > 0) & (probes.hip_px < landmark_hip_width * 2.0)
+    hip_width_px = np.where(hip_ok, np.maximum(hip_width_px, probes.hip_px), hip_width_px)
+    fallbacks["hip"] = np.where(
+        has_silhouette & ~hip_ok, np.where(probes.hip_px <= 0, CONTOUR_MISSING, CONTOUR_TOO_WIDE), 0
+    ).astype(np.int8)
+    columns["hip_width"] = pixel_to_cm(hip_width_px)
+    columns["hip"] = circumference(hip_width_px, probes.hip_depth)
+
+    # NECK: nose to ear, both sides
+    neck_width_px = np.abs(nose_x - le_x) * image_width * 2.0
+    columns["neck"] = circumference(neck_width_px, 1.0)
+    columns["neck_width"] = pixel_to_cm(neck_width_px)
+
+    # LENGTHS
+    columns["arm_length"] = pixel_to_cm(np.abs(ls_y - lw_y) * image_height)
+    columns["shirt_length"] = pixel_to_cm(np.abs(ls_y - lh_y) * image_height * 1.20)
+
+    # THIGH: silhouette width if at least 30% of the hip landmark width, else from the hip width
+    thigh_landmark_width = np.abs(lh_x - rh_x) * image_width
+    thigh_seen = has_silhouette & (probes.thigh_px > 0)
+    thigh_ok = thigh_seen & (probes.thigh_px > thigh_landmark_width * 0.3)
+    thigh_width_px = np.where(thigh_ok, probes.thigh_px * THIGH_CORRECTION, hip_width_px * 0.5 * THIGH_CORRECTION)
+    fallbacks["thigh"] = np.where(thigh_seen & ~thigh_ok, CONTOUR_TOO_NARROW, 0).astype(np.int8)
+    columns["thigh"] = pixel_to_cm(thigh_width_px)
+    columns["thigh_circumference"] = circumference(thigh_width_px, probes.thigh_depth)
+
+    columns["trouser_length"] = pixel_to_cm(np.abs(lh_y - la_y) * image_height)
+    columns["inseam"] = pixel_to_cm(np.abs(lk_y - la_y) * image_height)
+
+    # ANATOMICAL VALIDATION
+    chest_circ, waist_circ = columns["chest_circumference"], columns["waist"]
+    shoulder_width = columns["shoulder_width"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = chest_circ / waist_circ
+    both = (chest_circ > 0) & (waist_circ > 0)
+    warning_flags = np.stack([
+        both & (ratio > 2.5),
+        both & ~(ratio > 2.5) & (ratio < 0.9),
+        (shoulder_width > 0) & (chest_circ > 0) & (shoulder_width < (chest_circ / 3.14) * 0.7),
+    ], axis=1)
+
+    return MeasurementBatch(columns, natural_waist_valid, warning_flags, fallbacks, detected)
+
+
+def side_depths(landmarks, image_width, scale_factor):
+    """
+    calculate_side_measurements over a batch of side-view landmarks: the visible
+    left-right span of a profile is the body's front-to-back depth.
+    Returns (N,) arrays for chest_depth_cm, waist_depth_cm and hip_depth_cm.
+    """
+    lm = _batch(landmarks)
+    image_width = np.asarray(image_width, dtype=np.float64)
+    scale_factor = np.asarray(scale_factor, dtype=np.float64)
+    ls_x, rs_x = _column(lm, LEFT_SHOULDER, X), _column(lm, RIGHT_SHOULDER, X)
+    lh_x, rh_x = _column(lm, LEFT_HIP, X), _column(lm, RIGHT_HIP, X)
+
+    front_x = np.maximum(np.maximum(ls_x, rs_x), _column(lm, NOSE, X))
+    back_x = np.minimum(ls_x, rs_x)
+    chest_depth_cm = round2(np.abs(front_x - back_x) * image_width * scale_factor) * 1.2
+    hip_depth_px = np.abs(np.maximum(lh_x, rh_x) - np.minimum(lh_x, rh_x)) * image_width
+    return {
+        "chest_depth_cm": chest_depth_cm,
+        "waist_depth_cm": chest_depth_cm * 0.85,
+        "hip_depth_cm": round2(hip_depth_px * scale_factor) * 1.15,
+    }
@@ -0,0 +1,146 @@
+"""
+Model registry: loads each model in the background, warms it, and tracks its state.
+
+/ready reports the per-model state so traffic is only routed once the
+required models are warm; request paths call get() to wait for a model.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ModelNotReady(RuntimeError):
+    """The model failed to load, or didn't become ready within the timeout."""
+
+
+class _Entry:
+    def __init__(self, name, loader, warmup, required):
+        self.name = name
+        self.loader = loader
+        self.warmup = warmup
+        self.required = required
+        self.state = "pending"  # pending -> loading -> loaded -> warming -> ready | failed
+        self.value = None
+        self.error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.started = False
+        self.done = threading.Event()
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader, warmup=None, required=True):
+        """`loader()` returns the model; `warmup(model)` runs a dummy inference. Optional models don't gate /ready."""
+        self._entries[name] = _Entry(name, loader, warmup, required)
+
+    def _claim(self, entry):
+        with self._lock:
+            if entry.started:
+                return False
+            entry.started = True
+            return True
+
+    def load(self, name, warm=True):
+        """
+        Load (and by default warm) one model on the calling thread; no-op if already started.
+        With warm=False the model stops in the "loaded" state, e.g. in a preforking master
+        where warm-up inference would start thread pools that don't survive fork().
+        """
+        entry = self._entries[name]
+        if not self._claim(entry):
+            return
+        try:
+            entry.state = "loading"
+            start = time.perf_counter()
+            entry.value = entry.loader()
+            entry.load_seconds = round(time.perf_counter() - start, 3)
+            entry.state = "loaded"
+        except Exception as e:
+            self._fail(entry, e)
+            return
+        if warm:
+            self.warm(name)
+
+    def warm(self, name):
+        """Warm a loaded model and mark it ready."""
+        entry = self._entries[name]
+        try:
+            if entry.warmup is not None:
+                entry.state = "warming"
+                start = time.perf_counter()
+                entry.warmup(entry.value)
+                entry.warmup_seconds = round(time.perf_counter() - start, 3)
+            entry.state = "ready"
+            logger.info(f"✅ {name} ready (load {entry.load_seconds}s, warmup {entry.warmup_seconds or 0}s)")
+        except Exception as e:
+            self._fail(entry, e)
+            return
+        entry.done.set()
+
+    @staticmethod
+    def _fail(entry, error):
+        entry.state = "failed"
+        entry.error = str(error)
+        log = logger.error if entry.required else logger.warning
+        log(f"❌ {entry.name} failed to load: {error}")
+        entry.done.set()
+
+    def start(self, background=True):
+        """
+        Bring every registered model to ready, each on its own thread unless background=False.
+        Models already "loaded" (e.g. inherited from a preforking master) are only warmed.
+        """
+        for name, entry in self._entries.items():
+            if entry.state == "loaded":
+                target = self.warm
+            elif not entry.started:
+                target = self.load
+            else:
+                continue
+            if background:
+                threading.Thread(target=target, args=(name,), name=f"load-{name}", daemon=True).start()
+            else:
+                target(name)
+
+    def get(self, name, timeout=None):
+        """Return a ready model, loading it on this thread if nothing has started it yet."""
+        entry = self._entries[name]
+        if not entry.started:
+            self.load(name)
+        if not entry.done.wait(timeout):
+            raise ModelNotReady(f"{name} is still {entry.state}")
+        if entry.state != "ready":
+            raise ModelNotReady(f"{name} failed to load: {entry.error}")
+        return entry.value
+
+    def wait_ready(self, names=None, timeout=0.0):
+        """True once all named models (default: the required ones) are ready."""
+        names = names or [name for name, entry in self._entries.items() if entry.required]
+        deadline = time.monotonic() + timeout
+        for name in names:
+            entry = self._entries[name]
+            if not entry.done.wait(max(0.0, deadline - time.monotonic())) or entry.state != "ready":
+                return False
+        return True
+
+    def status(self):
+        return {
+            name: {
+                "state": entry.state,
+                "required": entry.required,
+                "load_seconds": entry.load_seconds,
+                "warmup_seconds": entry.warmup_seconds,
+                "error": entry.error,
+            }
+            for name, entry in self._entries.items()
+        }
+
+    @property
+    def ready(self):
+        return all(entry.state == "ready" for entry in self._entries.values() if entry.required)
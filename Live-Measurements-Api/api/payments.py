@@ -0,0 +1,106 @@
+"""
+Razorpay plumbing for /create-order and /verify-payment.
+
+- The client gets a pooled keep-alive session with explicit connect/read timeouts
+  (razorpay.Client passes none, so a stalled API would hold a request thread forever).
+- Orders are idempotent per Idempotency-Key: a repeat of the same key returns the
+  order already created instead of creating another one, and concurrent duplicates
+  (double clicks) share one API call. Requests without a key are never deduplicated:
+  two customers can send identical carts, and a derived key would hand one of them
+  the other's order.
+- Payment verification is the checkout HMAC computed locally: no client, no I/O, no locks.
+"""
+import hashlib
+import hmac
+import json
+
+import razorpay
+import requests
+from requests.adapters import HTTPAdapter
+
+from result_cache import ArtifactCache
+from upstream import SingleFlight
+
+
+class TimeoutSession(requests.Session):
+    """A requests.Session with a default timeout and a bounded connection pool, no retries."""
+
+    def __init__(self, timeout, pool_size):
+        super().__init__()
+        self.timeout = timeout
+        # Order creation isn't safe to retry blindly; IdempotentOrders handles repeats instead
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().request(method, url, **kwargs)
+
+
+def create_client(key_id, key_secret, timeout=(3.05, 10), pool_size=4, base_url=None):
+    """razorpay.Client on a TimeoutSession; base_url points it at a stand-in (e.g. benchmarks/fake_razorpay.py)."""
+    options = {"base_url": base_url} if base_url else {}
+    return razorpay.Client(session=TimeoutSession(timeout, pool_size), auth=(key_id, key_secret), **options)
+
+
+def payment_signature(order_id, payment_id, secret):
+    """Razorpay checkout signature: hex HMAC-SHA256 of "order_id|payment_id" keyed with the key secret."""
+    return hmac.new(secret.encode(), f"{order_id}|{payment_id}".encode(), hashlib.sha256).hexdigest()
+
+
+def verify_payment_signature(order_id, payment_id, signature, secret):
+    """True only if every field is present and the signature matches (constant-time compare)."""
+    if not (order_id and payment_id and signature and secret):
+        return False
+    expected = payment_signature(order_id, payment_id, secret)
+    return hmac.compare_digest(expected.encode(), str(signature).encode())
+
+
+def payload_digest(payload):
+    """Stable hash of a JSON order request (key order and whitespace don't matter)."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class IdempotencyConflict(ValueError):
+    """An Idempotency-Key was reused with a different order payload."""
+
+
+class IdempotentOrders:
+    """Created orders keyed by the client's idempotency key, kept for `key_ttl_seconds`."""
+
+    def __init__(self, max_entries=4096, key_ttl_seconds=86400):
+        self.key_ttl_seconds = key_ttl_seconds
+        self._orders = ArtifactCache(max_entries=max_entries, ttl_seconds=key_ttl_seconds,
+                                     max_bytes=16 * 1024 * 1024)
+        self._flights = SingleFlight()
+
+    def create(self, payload, create_fn, idempotency_key=None):
+        """
+        (order, source) where source is "created", "replayed" (from the cache) or
+        "coalesced" (a concurrent duplicate). create_fn() makes the real API call;
+        failures aren't cached, so a retry after an error tries again. Without an
+        idempotency_key every call creates a new order.
+        """
+        if not idempotency_key:
+            return create_fn(), "created"
+        digest = payload_digest(payload)
+        key = f"key:{idempotency_key}"
+
+        def create_once():
+            cached = self._orders.get(key)
+            if cached is not None:
+                return cached, "replayed"
+            order = create_fn()
+            self._orders.put(key, (digest, order), len(json.dumps(order, default=str)))
+            return (digest, order), "created"
+
+        ((created_digest, order), source), shared = self._flights.do(key, create_once)
+        if created_digest != digest:
+            raise IdempotencyConflict("Idempotency-Key was already used for a different order")
+        return order, "coalesced" if shared else source
+
+    def stats(self):
+        return {**self._orders.stats(), "coalesced": self._flights.coalesced}
@@ -0,0 +1,99 @@
+"""
+Person crops for the front-image pipeline.
+
+Holistic's segmentation model and MiDaS both see a fixed-size square (256 and 256/384
+px), so on a photo taken from a few metres away most of their input pixels are
+background. A cheap Pose pass on a thumbnail locates the person; Holistic and MiDaS then
+run on the person's box, spending their resolution on the body. The crop's landmarks
+and mask are mapped back into frame coordinates, so validation,
+calculate_distance_using_height and the measurement math are unchanged.
+"""
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+from result_cache import CachedPose
+
+
+class PersonCrop:
+    """A box in frame pixels: x0/y0 inclusive, x1/y1 exclusive."""
+
+    __slots__ = ("x0", "y0", "x1", "y1", "frame_width", "frame_height")
+
+    def __init__(self, x0, y0, x1, y1, frame_width, frame_height):
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+
+    @property
+    def width(self):
+        return self.x1 - self.x0
+
+    @property
+    def height(self):
+        return self.y1 - self.y0
+
+    @property
+    def area_ratio(self):
+        return (self.width * self.height) / (self.frame_width * self.frame_height)
+
+    def as_list(self):
+        return [self.x0, self.y0, self.x1, self.y1]
+
+    def apply(self, frame):
+        """The crop as a view of the frame (no copy)."""
+        return frame[self.y0:self.y1, self.x0:self.x1]
+
+    def contains(self, pose_landmarks, indices, min_visibility=0.5, border=0.01):
+        """False when a visible landmark (crop coordinates) sits on or past the crop's edge."""
+        for i in indices:
+            landmark = pose_landmarks.landmark[i]
+            if landmark.visibility >= min_visibility and not (
+                    border <= landmark.x <= 1 - border and border <= landmark.y <= 1 - border):
+                return False
+        return True
+
+    def landmarks_to_frame(self, pose_landmarks):
+        """Crop-normalized landmarks as frame-normalized ones (z follows x's scale)."""
+        sx = self.width / self.frame_width
+        sy = self.height / self.frame_height
+        ox = self.x0 / self.frame_width
+        oy = self.y0 / self.frame_height
+        mapped = landmark_pb2.NormalizedLandmarkList()
+        for landmark in pose_landmarks.landmark:
+            mapped.landmark.add(x=landmark.x * sx + ox, y=landmark.y * sy + oy, z=landmark.z * sx,
+                                visibility=landmark.visibility, presence=landmark.presence)
+        return mapped
+
+    def mask_to_frame(self, mask):
+        """The crop's segmentation mask pasted into an all-background frame-sized mask."""
+        full = np.zeros((self.frame_height, self.frame_width), dtype=np.float32)
+        full[self.y0:self.y1, self.x0:self.x1] = mask
+        return full
+
+    def results_to_frame(self, results):
+        """Holistic results on the crop as a frame-coordinate CachedPose carrying the mask."""
+        frame_results = CachedPose(self.landmarks_to_frame(results.pose_landmarks))
+        if results.segmentation_mask is not None:
+            frame_results.segmentation_mask = self.mask_to_frame(results.segmentation_mask)
+        return frame_results
+
+
+def person_box(pose_landmarks, frame_width, frame_height, margin=0.2, min_visibility=0.2):
+    """
+    Box around every landmark seen with at least min_visibility, grown on each side by
+    `margin` times the box's height (landmarks are joints, the silhouette extends past
+    them: top of the head, shoulders, feet), clipped to the frame. None if nothing is seen.
+    """
+    points = [(landmark.x, landmark.y) for landmark in pose_landmarks.landmark
+              if landmark.visibility >= min_visibility]
+    if not points:
+        return None
+    xs, ys = np.array(points).T * np.array([[frame_width], [frame_height]])
+    pad = margin * (ys.max() - ys.min())
+    x0 = max(0, int(np.floor(xs.min() - pad)))
+    y0 = max(0, int(np.floor(ys.min() - pad)))
+    x1 = min(frame_width, int(np.ceil(xs.max() + pad)))
+    y1 = min(frame_height, int(np.ceil(ys.max() + pad)))
+    if x1 - x0 < 2 or y1 - y0 < 2:
+        return None
+    return PersonCrop(x0, y0, x1, y1, frame_width, frame_height)
@@ -0,0 +1,199 @@
+"""
+Opt-in per-request traces of the measurement pipeline.
+
+A RequestTrace collects a span for every stage a request runs (decode, Holistic,
+MiDaS, segmentation scan, measurement math, ...), whichever thread runs it, and can
+also sample the Python stacks of those threads to show where the time goes inside a
+stage. The active trace lives in a ContextVar: StageTimer records into it from
+the same calls that feed the stage histogram, and submit_in_context carries it onto
+executor threads. Without an active trace a stage costs one ContextVar lookup.
+"""
+import contextvars
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from time import perf_counter
+
+_active = contextvars.ContextVar("request_trace", default=None)
+
+
+def current_trace():
+    return _active.get()
+
+
+class StackSampler:
+    """
+    Samples the Python stack of every thread working for a trace each `interval_ms`
+    and counts them as folded stacks ("outer;inner;leaf", flame graph input).
+    Native code (MediaPipe, torch) shows up as the Python frame that called it.
+    """
+
+    def __init__(self, trace, interval_ms=5.0, max_depth=48):
+        self.trace = trace
+        self.interval = interval_ms / 1000.0
+        self.max_depth = max_depth
+        self.samples = 0
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="trace-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident, thread_name in self.trace.working_threads():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.stacks[";".join([thread_name] + stack[::-1])] += 1
+            self.samples += 1
+
+    def to_dict(self, top=40):
+        return {
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "stacks": [{"stack": stack, "count": count} for stack, count in self.stacks.most_common(top)],
+        }
+
+
+class RequestTrace:
+    """Stage spans (and optionally stack samples) for one request."""
+
+    def __init__(self, label, sample_interval_ms=None):
+        self.id = uuid.uuid4().hex[:16]
+        self.label = label
+        self.started_at = time.time()
+        self.started = perf_counter()
+        self.finished = None
+        self.spans = []  # (stage, start, end, thread name), perf_counter seconds
+        self._threads = {}  # ident -> [thread name, active entries]
+        self._lock = threading.Lock()
+        self.sampler = StackSampler(self, sample_interval_ms) if sample_interval_ms else None
+
+    def add_span(self, stage, start, end):
+        with self._lock:
+            self.spans.append((stage, start, end, threading.current_thread().name))
+
+    def enter_thread(self):
+        ident = threading.get_ident()
+        with self._lock:
+            entry = self._threads.setdefault(ident, [threading.current_thread().name, 0])
+            entry[1] += 1
+
+    def leave_thread(self):
+        ident = threading.get_ident()
+        with self._lock:
+            entry = self._threads.get(ident)
+            if entry is not None:
+                entry[1] -= 1
+                if entry[1] <= 0:
+                    del self._threads[ident]
+
+    def working_threads(self):
+        with self._lock:
+            return [(ident, entry[0]) for ident, entry in self._threads.items()]
+
+    def to_dict(self):
+        end = self.finished if self.finished is not None else perf_counter()
+        stages = {}
+        for stage, start, stop, _ in self.spans:
+            stages[stage] = stages.get(stage, 0.0) + (stop - start) * 1000
+        report = {
+            "id": self.id,
+            "label": self.label,
+            "started_at": self.started_at,
+            "total_ms": round((end - self.started) * 1000, 2),
+            "stages_ms": {stage: round(ms, 2) for stage, ms in stages.items()},
+            "spans": [
+                {"stage": stage, "start_ms": round((start - self.started) * 1000, 2),
+                 "duration_ms": round((stop - start) * 1000, 2), "thread": thread}
+                for stage, start, stop, thread in sorted(self.spans, key=lambda span: span[1])
+            ],
+        }
+        if self.sampler is not None:
+            report["profile"] = self.sampler.to_dict()
+        return report
+
+
+@contextmanager
+def activate(trace):
+    """Make `trace` the active trace for the block (no-op for None) and sample while it runs."""
+    if trace is None:
+        yield None
+        return
+    token = _active.set(trace)
+    trace.enter_thread()
+    if trace.sampler is not None:
+        trace.sampler.start()
+    try:
+        yield trace
+    finally:
+        trace.finished = perf_counter()
+        if trace.sampler is not None:
+            trace.sampler.stop()
+        trace.leave_thread()
+        _active.reset(token)
+
+
+def _run_traced(fn, args):
+    trace = _active.get()
+    if trace is None:
+        return fn(*args)
+    trace.enter_thread()
+    try:
+        return fn(*args)
+    finally:
+        trace.leave_thread()
+
+
+def submit_in_context(executor, fn, *args):
+    """executor.submit that runs fn under the caller's context, so its stages join the caller's trace."""
+    return executor.submit(contextvars.copy_context().run, _run_traced, fn, args)
+
+
+class StageTimer:
+    """
+    Wraps a histogram labelled by stage: every observation is also recorded as a span
+    in the active trace. Spans given only as a duration (observe) end when observed.
+    """
+
+    def __init__(self, histogram, label="stage"):
+        self.histogram = histogram
+        self.label = label
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the with-block, including when it raises."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            end = perf_counter()
+            self.histogram.observe(end - start, **labels)
+            trace = _active.get()
+            if trace is not None:
+                trace.add_span(labels[self.label], start, end)
+
+    def observe(self, value, **labels):
+        self.histogram.observe(value, **labels)
+        trace = _active.get()
+        if trace is not None:
+            end = perf_counter()
+            trace.add_span(labels[self.label], end - value, end)
@@ -0,0 +1,126 @@
+"""
+Content-addressed cache of per-image measurement artifacts.
+
+Keys are a hash of the decoded pixels plus the role the image was processed
+in, so a retry or a resubmission with a corrected height skips Holistic and
+MiDaS and only reruns the arithmetic. Front and side images keep different
+artifacts (a side entry has no silhouette, depth or crop), so the same bytes
+uploaded in the other role miss instead of reusing them.
+Only derived artifacts are stored (landmarks, the compact silhouette width
+profile, the depth ratios at the sample points) - never the image, its
+segmentation mask or its depth map. Cached values are shared by concurrent
+requests and never modified: adding to an entry means putting a new one.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def image_digest(frame):
+    """Stable key for a decoded frame: blake2b over the pixel buffer (no copy) plus its shape."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(frame.shape).encode())
+    digest.update(memoryview(frame).cast("B") if frame.flags.c_contiguous else frame.tobytes())
+    return digest.hexdigest()
+
+
+def artifact_key(role, frame):
+    """Cache key for the artifacts of `frame` processed as `role` ("front" or "side")."""
+    return f"{role}:{image_digest(frame)}"
+
+
+class CachedPose:
+    """Stand-in for a Holistic results object holding only what measurements read."""
+
+    __slots__ = ("pose_landmarks", "segmentation_mask")
+
+    def __init__(self, pose_landmarks):
+        self.pose_landmarks = pose_landmarks
+        self.segmentation_mask = None  # Masks are never cached; use the compact silhouette profile
+
+
+class ArtifactCache:
+    """LRU + TTL cache with a memory cap; callers give each entry's approximate size."""
+
+    def __init__(self, max_entries=256, ttl_seconds=600, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, nbytes, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _drop(self, key):
+        _, nbytes, _ = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, value, nbytes, ttl_seconds=None):
+        """ttl_seconds overrides the cache-wide TTL for this entry."""
+        if self.max_entries <= 0 or nbytes > self.max_bytes:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, nbytes, value)
+            self._bytes += nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class ImageArtifacts:
+    """Everything the measurement math needs from one image, minus the image itself."""
+
+    __slots__ = ("pose", "silhouette", "depth", "crop")
+
+    def __init__(self, pose_landmarks):
+        self.pose = CachedPose(pose_landmarks)
+        self.crop = None  # PersonCrop Holistic ran on (front image), reused for MiDaS on cache hits
+        self.silhouette = None  # Compact SilhouetteProfile (front image only)
+        self.depth = {}  # depth mode -> compact DepthSummary (None for "off")
+
+    def extended(self, silhouette, depth_mode, depth):
+        """A copy with a silhouette profile (if this has none yet) and one depth mode added."""
+        artifacts = ImageArtifacts.__new__(ImageArtifacts)
+        artifacts.pose = self.pose
+        artifacts.crop = self.crop
+        artifacts.silhouette = self.silhouette if self.silhouette is not None else silhouette
+        artifacts.depth = {**self.depth, depth_mode: depth}
+        return artifacts
+
+    @property
+    def nbytes(self):
+        size = 8 * 1024  # Landmark protobufs and bookkeeping
+        if self.silhouette is not None:
+            size += self.silhouette.nbytes
+        size += sum(summary.nbytes for summary in self.depth.values() if summary is not None)
+        return size
@@ -0,0 +1,138 @@
+"""
+Vectorized silhouette width profile over a MediaPipe segmentation mask.
+
+Rows are thresholded and scanned with NumPy instead of per-pixel Python loops:
+for a given center column, the left/right body edges of a whole band of rows
+(up to the full height) come out of a single argmax pass. Single measurement
+rows are answered from a cached profile when one exists, or by scanning just
+that row.
+"""
+from time import perf_counter
+
+import numpy as np
+
+PERSON_THRESHOLD = 0.1  # Segmentation mask: values > 0.1 indicate person
+MIN_WIDTH_RATIO = 0.05  # Widths under 5% of the image width are treated as failed scans
+
+
+class SilhouetteProfile:
+    """
+    Edge scan semantics match the original per-pixel loops: starting at the center
+    column, the left edge is the first background pixel found scanning left
+    (columns center..1), the right edge the first found scanning right
+    (columns center..width-1); an edge with no background stays at the center.
+    """
+
+    def __init__(self, segmentation_mask, threshold=PERSON_THRESHOLD):
+        self.mask = segmentation_mask
+        self.threshold = threshold
+        self.mask_height, self.mask_width = segmentation_mask.shape[:2]
+        self._profiles = {}  # center column -> (left, right) arrays over all rows
+        self._queried = set()  # center columns any measurement has asked about
+        self.scan_seconds = 0.0  # Total time spent scanning the mask (for the segmentation_scan metric)
+
+    def _center_column(self, center_x):
+        c = min(max(int(center_x * self.mask_width), 0), self.mask_width - 1)
+        if self.mask is None and c not in self._profiles:
+            raise LookupError(f"Compact silhouette profile has no scan around column {c}: "
+                              "it only answers the centers queried before compact()")
+        self._queried.add(c)
+        return c
+
+    def _row(self, height_px):
+        # Ensure height_px is within bounds
+        return self.mask_height - 1 if height_px >= self.mask_height else height_px
+
+    def _scan(self, c, start, end):
+        """Left/right edges for rows [start, end) around column c, in one vectorized pass."""
+        started = perf_counter()
+        # Columns c, c-1, ..., 1 (column 0 is never checked, as in the loop version)
+        left_band = self.mask[start:end, c:0:-1] < self.threshold
+        right_band = self.mask[start:end, c:] < self.threshold
+        rows = np.arange(right_band.shape[0])
+        if left_band.shape[1]:
+            left_idx = left_band.argmax(axis=1)
+            left = np.where(left_band[rows, left_idx], c - left_idx, c)
+        else:
+            left = np.full(right_band.shape[0], c)
+        right_idx = right_band.argmax(axis=1)
+        right = np.where(right_band[rows, right_idx], c + right_idx, c)
+        self.scan_seconds += perf_counter() - started
+        return left, right
+
+    def _column_edges(self, c):
+        if c not in self._profiles:
+            self._profiles[c] = self._scan(c, 0, self.mask_height)
+        return self._profiles[c]
+
+    def edges(self, center_x):
+        """Full-height left/right edge columns, scanning out from center_x (normalized)."""
+        return self._column_edges(self._center_column(center_x))
+
+    def _to_image_widths(self, left, right, image_width):
+        widths = ((right - left) * (image_width / self.mask_width)).astype(np.int64)
+        widths[widths < MIN_WIDTH_RATIO * image_width] = 0
+        return widths
+
+    def widths(self, center_x, image_width):
+        """Full-height width profile in image pixels (0 where the scan is unreasonably narrow)."""
+        left, right = self.edges(center_x)
+        return self._to_image_widths(left, right, image_width)
+
+    def width_at(self, height_px, center_x, image_width):
+        """Body width in image pixels at one row, or 0 to trigger the caller's fallback."""
+        c = self._center_column(center_x)
+        row = self._row(height_px)
+        if c in self._profiles:
+            left, right = self._profiles[c]
+            left, right = left[row], right[row]
+        else:
+            row = row % self.mask_height  # Negative rows index from the bottom, like the mask itself
+            left, right = self._scan(c, row, row + 1)
+            left, right = left[0], right[0]
+        width_px = int((right - left) * (image_width / self.mask_width))
+        if width_px < MIN_WIDTH_RATIO * image_width:
+            return 0
+        return width_px
+
+    def narrowest_row(self, start_px, end_px, center_x, image_width):
+        """
+        (row, width) of the narrowest valid row in [start_px, end_px], e.g. the natural
+        waist between chest and hips. Returns (None, 0) if no row in the band is valid.
+        """
+        start = max(0, min(start_px, end_px))
+        end = min(self.mask_height - 1, max(start_px, end_px))
+        if start > end:
+            return None, 0
+        c = self._center_column(center_x)
+        if c in self._profiles:
+            left, right = (edge[start:end + 1] for edge in self._profiles[c])
+        else:
+            left, right = self._scan(c, start, end + 1)
+        band = self._to_image_widths(left, right, image_width)
+        valid = band > 0
+        if not valid.any():
+            return None, 0
+        offset = int(np.argmin(np.where(valid, band, np.iinfo(band.dtype).max)))
+        return start + offset, int(band[offset])
+
+    def compact(self):
+        """
+        Mask-free copy holding int32 full-height profiles for every center queried so far.
+        Small enough to cache; it answers any row at those centers without the segmentation
+        mask, and raises LookupError for any other center.
+        """
+        compact = SilhouetteProfile.__new__(SilhouetteProfile)
+        compact.mask = None
+        compact.threshold = self.threshold
+        compact.mask_height, compact.mask_width = self.mask_height, self.mask_width
+        compact._profiles = {
+            c: tuple(edge.astype(np.int32) for edge in self._column_edges(c)) for c in sorted(self._queried)
+        }
+        compact._queried = set(compact._profiles)
+        compact.scan_seconds = 0.0
+        return compact
+
+    @property
+    def nbytes(self):
+        return sum(left.nbytes + right.nbytes for left, right in self._profiles.values())
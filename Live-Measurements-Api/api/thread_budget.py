@@ -0,0 +1,38 @@
+"""
+One CPU thread budget shared by torch, OpenCV and MediaPipe.
+
+Import this before cv2/torch/mediapipe: the OpenMP/BLAS pools read their
+environment variables once, when the native libraries initialise. The settings
+are read at import too, so load .env before importing it.
+
+A request runs up to two inference pipelines at once: the front image on the request
+thread (handing its MiDaS pass to the depth batcher thread while it waits) and the side
+image on the pipeline executor. The CPUs are split between all of those across every
+worker: cpu_count // (WEB_CONCURRENCY * GUNICORN_THREADS * 2) inference threads each.
+When there aren't enough cores for every request's side image to get its own thread,
+PARALLEL_SIDE_IMAGE is off: the side image runs on the request thread after the front
+one, and the split is cpu_count // (WEB_CONCURRENCY * GUNICORN_THREADS).
+"""
+import os
+
+REQUEST_THREADS = max(1, int(os.getenv("WEB_CONCURRENCY") or 1)) * max(1, int(os.getenv("GUNICORN_THREADS") or 2))
+_CPUS = os.cpu_count() or 1
+PARALLEL_SIDE_IMAGE = _CPUS >= 2 * REQUEST_THREADS
+PIPELINES_PER_REQUEST = 2 if PARALLEL_SIDE_IMAGE else 1
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS") or 0) or max(1, _CPUS // (REQUEST_THREADS * PIPELINES_PER_REQUEST))
+
+for _var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+    os.environ.setdefault(_var, str(INFERENCE_THREADS))
+
+
+def apply_thread_budget(torch_module, cv2_module):
+    """Pin torch intra-op/inter-op pools (torch_module may be None) and OpenCV's pool to the shared budget."""
+    if torch_module is not None:
+        torch_module.set_num_threads(INFERENCE_THREADS)
+        try:
+            # Inter-op parallelism only adds contention for single-image inference
+            torch_module.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # Already set (e.g. module re-imported after torch started its pools)
+    cv2_module.setNumThreads(INFERENCE_THREADS)
+    return INFERENCE_THREADS
@@ -0,0 +1,219 @@
+"""
+Guards for calls to external services (Gemini): single-flight coalescing, a
+concurrency limit with a hard per-call deadline, and a circuit breaker.
+
+A slow or failing dependency then costs a request thread at most `timeout`
+seconds, never more than `max_concurrency` calls run at once, and once the
+recent error rate crosses the threshold callers fail fast instead of waiting.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamUnavailable(RuntimeError):
+    """Base class: the call was not made, or was abandoned."""
+
+    reason = "unavailable"  # Metric label
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    """The breaker is open; failing fast."""
+
+    reason = "circuit_open"
+
+
+class UpstreamBusyError(UpstreamUnavailable):
+    """max_concurrency calls were already in flight for longer than queue_timeout."""
+
+    reason = "busy"
+
+
+class UpstreamTimeoutError(UpstreamUnavailable):
+    """The call didn't finish within its deadline (it is left to finish in the background)."""
+
+    reason = "timeout"
+
+
+class CircuitBreaker:
+    """
+    Opens when, over the last `window_seconds`, at least `min_calls` calls were made and
+    `failure_rate` of them failed. After `open_seconds` one trial call is let through
+    (half-open): success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, failure_rate=0.5, min_calls=10, window_seconds=30.0, open_seconds=30.0):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.state = "closed"  # closed -> open -> half_open -> closed | open
+        self._events = deque()  # (monotonic time, failed)
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.trips = 0
+
+    def _prune(self, now):
+        while self._events and self._events[0][0] < now - self.window_seconds:
+            _, failed = self._events.popleft()
+            self._failures -= failed
+
+    def _open(self, now):
+        self.state = "open"
+        self._opened_at = now
+        self._events.clear()
+        self._failures = 0
+        self.trips += 1
+
+    def allow(self):
+        """True if a call may go ahead; every allowed call must end in record() or cancel()."""
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "half_open":
+                if self._trial_in_flight:
+                    self.rejected += 1
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def record(self, success):
+        with self._lock:
+            now = time.monotonic()
+            if self.state == "half_open":
+                self._trial_in_flight = False
+                if success:
+                    self.state = "closed"
+                    logger.info("Circuit closed after a successful trial call")
+                else:
+                    self._open(now)
+                return
+            if self.state == "open":
+                return  # A straggler from before the breaker opened
+            self._events.append((now, not success))
+            self._failures += not success
+            self._prune(now)
+            if len(self._events) >= self.min_calls and self._failures / len(self._events) >= self.failure_rate:
+                logger.warning(f"Circuit opened: {self._failures}/{len(self._events)} recent calls failed")
+                self._open(now)
+
+    def cancel(self):
+        """An allowed call that never reached upstream (e.g. rejected as busy)."""
+        with self._lock:
+            if self.state == "half_open":
+                self._trial_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            self._prune(time.monotonic())
+            return {
+                "state": self.state,
+                "recent_calls": len(self._events),
+                "recent_failures": self._failures,
+                "trips": self.trips,
+                "rejected": self.rejected,
+            }
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share the first caller's result (or exception)."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Returns (result, shared): shared is True for callers that piggybacked on another's call."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result(), True
+        try:
+            result = fn()
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class UpstreamGuard:
+    """Breaker + concurrency limit + deadline around one upstream dependency."""
+
+    def __init__(self, name, max_concurrency=4, timeout=20.0, queue_timeout=2.0, breaker=None):
+        self.name = name
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.max_concurrency = max_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=f"{name}-upstream")
+        self.timeouts = 0
+        self.busy = 0
+
+    def acquire(self):
+        """
+        Admit one call through the breaker and take a concurrency slot, waiting at most
+        `queue_timeout` for one. Raises CircuitOpenError / UpstreamBusyError. For calls that
+        outlive call()'s deadline (streams): the caller must release() the slot and end the
+        call with breaker.record() or breaker.cancel().
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self.breaker.cancel()
+            self.busy += 1
+            raise UpstreamBusyError(f"{self.max_concurrency} {self.name} calls already in flight")
+
+    def release(self):
+        self._slots.release()
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Run fn on the guard's pool and wait at most `timeout` seconds for it.
+        Raises CircuitOpenError / UpstreamBusyError / UpstreamTimeoutError, or fn's own exception.
+        """
+        self.acquire()
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            self.breaker.cancel()
+            raise
+        # The slot is held until the call really finishes, so timed-out calls still count toward the limit
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            result = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            self.timeouts += 1
+            self.breaker.record(False)
+            raise UpstreamTimeoutError(f"{self.name} call exceeded {self.timeout}s") from None
+        except Exception:
+            self.breaker.record(False)
+            raise
+        self.breaker.record(True)
+        return result
+
+    def stats(self):
+        return {"breaker": self.breaker.stats(), "timeouts": self.timeouts, "busy": self.busy,
+                "max_concurrency": self.max_concurrency, "timeout_seconds": self.timeout}
@@ -0,0 +1,119 @@
+"""
+Exercises /chat's upstream guards against benchmarks/fake_gemini.py, in process:
+
+  coalesce  N concurrent identical questions -> one upstream call
+  timeout   upstream slower than GEMINI_TIMEOUT_SECONDS -> "high traffic" reply at the deadline
+  breaker   upstream failing every call -> the circuit opens and callers stop reaching it
+  recover   upstream healthy again -> after the open period one trial call closes the circuit
+  stream    /chat/stream against the same fake, counted by the same breaker
+
+    python benchmarks/chat_resilience.py
+
+Imports api/index.py (the image models don't need to load). Exits 1 if a check fails.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(BENCH_DIR, "..", "api")
+
+TIMEOUT_SECONDS = 1.0
+MIN_CALLS = 5
+OPEN_SECONDS = 2.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=20, help="Identical questions sent at once")
+    args = parser.parse_args()
+
+    sys.path.insert(0, BENCH_DIR)
+    from fake_gemini import make_server
+
+    server = make_server(latency=0.5)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ.update({
+        "GEMINI_API_KEY": "fake",
+        "GEMINI_BASE_URL": f"http://127.0.0.1:{server.server_address[1]}",
+        "GEMINI_TIMEOUT_SECONDS": str(TIMEOUT_SECONDS),
+        "GEMINI_BREAKER_MIN_CALLS": str(MIN_CALLS),
+        "GEMINI_BREAKER_OPEN_SECONDS": str(OPEN_SECONDS),
+    })
+    sys.path.insert(0, API_DIR)
+    import index
+
+    if not index.model_registry.wait_ready(("gemini",), 30):
+        print(f"Gemini client not ready: {index.model_registry.status().get('gemini')}", file=sys.stderr)
+        return 1
+    client = index.app.test_client()
+    state = server.state
+    failures = []
+
+    def ask(message):
+        start = time.perf_counter()
+        response = client.post("/chat", json={"message": message})
+        return response.status_code, response.get_json(), time.perf_counter() - start
+
+    def check(name, ok, detail):
+        print(f"{'PASS' if ok else 'FAIL'}  {name}: {detail}")
+        if not ok:
+            failures.append(name)
+
+    # coalesce
+    calls_before = state.calls
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(lambda _: ask("Which zebra patterns suit a wedding?"), range(args.concurrency)))
+    upstream_calls = state.calls - calls_before
+    check("coalesce", upstream_calls == 1 and all(status == 200 for status, _, _ in results),
+          f"{args.concurrency} concurrent requests, {upstream_calls} upstream call(s), "
+          f"statuses {sorted({status for status, _, _ in results})}")
+
+    # timeout
+    state.latency = TIMEOUT_SECONDS * 3
+    status, body, elapsed = ask("Can a tailor alter a vintage kimono?")
+    check("timeout", status == 500 and body.get("error") == index.CHAT_HIGH_TRAFFIC_MESSAGE
+          and elapsed < TIMEOUT_SECONDS * 2,
+          f"status {status} after {elapsed:.2f}s (deadline {TIMEOUT_SECONDS}s, upstream takes {state.latency}s)")
+
+    # breaker
+    state.latency, state.error_rate = 0.05, 1.0
+    calls_before = state.calls
+    timings = []
+    for i in range(MIN_CALLS * 3):
+        status, _, elapsed = ask(f"Failing question number {i} about velvet")
+        timings.append(elapsed)
+    upstream_calls = state.calls - calls_before
+    breaker = index.gemini_guard.breaker.stats()
+    check("breaker", breaker["state"] == "open" and upstream_calls < MIN_CALLS * 3,
+          f"{MIN_CALLS * 3} requests, {upstream_calls} reached upstream, breaker {breaker['state']}, "
+          f"last request {timings[-1] * 1000:.1f} ms")
+
+    # recover
+    state.error_rate = 0.0
+    time.sleep(OPEN_SECONDS + 0.1)
+    status, _, _ = ask("Does linen wrinkle less after washing?")
+    breaker = index.gemini_guard.breaker.stats()
+    check("recover", status == 200 and breaker["state"] == "closed",
+          f"trial call status {status}, breaker {breaker['state']}")
+
+    # stream
+    calls_before = index.gemini_guard.breaker.stats()["recent_calls"]
+    response = client.get("/chat/stream", query_string={"message": "Is silk cooler than cotton in summer?"})
+    body = response.get_data(as_text=True)
+    breaker = index.gemini_guard.breaker.stats()
+    check("stream", "event: done" in body and breaker["recent_calls"] == calls_before + 1,
+          f"{body.count('event: chunk')} chunks, done event {'sent' if 'event: done' in body else 'missing'}, "
+          f"breaker recent calls {calls_before} -> {breaker['recent_calls']}")
+
+    print(f"\nfake server: {state.stats()}")
+    print(f"/chat/stats upstream: {client.get('/chat/stats').get_json()['upstream']}")
+    server.shutdown()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
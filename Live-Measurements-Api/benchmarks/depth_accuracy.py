@@ -0,0 +1,195 @@
+"""
+Accuracy, latency and memory of the depth backends (DEPTH_BACKEND) against torch.
+
+Each backend runs in its own subprocess (so peak RSS and imported modules are its
+own) over the same images at both depth modes. For every image it records the depth
+ratio at the chest/waist/hip/thigh sample points - the only thing measurements read
+from the depth map - and the circumferences calculate_measurements derives from them.
+The report is each backend's difference from the torch backend on the same input,
+plus its depth-stage p50/p95 and the process's peak RSS.
+
+Landmarks and masks come from the fixture renderer; --photos adds your own front
+photos, whose landmarks and mask come from Holistic (so it has to load). The fixture
+figure is a flat drawing and says little about MiDaS on real people: run --photos
+before switching production to an ONNX backend. Imports api/index.py, so it needs the
+same environment as the server (.env), with the ONNX exports from api/export_models.py.
+
+    python benchmarks/depth_accuracy.py
+    python benchmarks/depth_accuracy.py --backends torch onnx-int8 --photos ~/photos/*.jpg --runs 20
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(BENCH_DIR, "..", "api")
+sys.path.insert(0, BENCH_DIR)
+from fixtures import FIXTURES_DIR, RESOLUTIONS, load_fixture  # noqa: E402
+
+BACKENDS = ("torch", "onnx", "onnx-int8", "none")
+MODES = ("fast", "full")
+RATIOS = ("chest_depth", "waist_depth", "hip_depth", "thigh_depth")
+CIRCUMFERENCES = ("chest_circumference", "waist", "natural_waist", "hip", "thigh_circumference")
+USER_HEIGHT_CM = 175.0
+
+
+def load_images(resolutions, fixtures_dir, photos, index):
+    """[(name, frame, results)]; results carry pose_landmarks and segmentation_mask in frame coordinates."""
+    import cv2
+
+    images = [(f"fixture {resolution}", *load_fixture(resolution, fixtures_dir)[1:]) for resolution in resolutions]
+    for path in photos:
+        frame = cv2.imread(path, cv2.IMREAD_COLOR)
+        if frame is None:
+            raise SystemExit(f"Can't read {path}")
+        results, _ = index.process_front_holistic(frame)
+        if results is None or results.pose_landmarks is None:
+            print(f"No person found in {path}, skipped", file=sys.stderr)
+            continue
+        images.append((os.path.basename(path), frame, results))
+    return images
+
+
+def run_backend(backend, runs, resolutions, fixtures_dir, photos):
+    """Runs in the child process (DEPTH_BACKEND already in the environment); returns the result dict."""
+    sys.path.insert(0, API_DIR)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import index
+    from measurement_kernel import landmarks_to_array, probe_images
+
+    models = ["midas"] + (["holistic"] if photos else [])
+    if not index.model_registry.wait_ready(models, 600):
+        status = {name: entry["error"] or entry["state"] for name, entry in index.model_registry.status().items()
+                  if name in models and entry["state"] != "ready"}
+        return {"backend": backend, "skipped": f"models not ready: {status}"}
+
+    images = load_images(resolutions, fixtures_dir, photos, index)
+    rows = []
+    for mode in MODES:
+        timings = []
+        for name, frame, results in images:
+            height, width = frame.shape[:2]
+            depth = index.DepthSummary.from_image(frame, mode)  # Warm-up for this size, and the measured map
+            if depth is not None:
+                for _ in range(runs):
+                    started = time.perf_counter()
+                    index.estimate_depth(frame, index.DEPTH_INPUT_SIZES[mode])
+                    timings.append((time.perf_counter() - started) * 1000)
+            probes = probe_images(landmarks_to_array(results.pose_landmarks), width, height, [None], [depth])
+            _, scale_factor = index.calculate_distance_using_height(results.pose_landmarks.landmark, height,
+                                                                    USER_HEIGHT_CM)
+            measurements = index.calculate_measurements(results, scale_factor, width, height, depth,
+                                                        results.segmentation_mask)
+            rows.append({
+                "image": name,
+                "mode": mode,
+                "ratios": {key: float(getattr(probes, key)[0]) for key in RATIOS},
+                "circumferences": {key: measurements.get(key) for key in CIRCUMFERENCES},
+            })
+        timings.sort()
+        rows.append({
+            "mode": mode,
+            "p50_ms": round(timings[len(timings) // 2], 2) if timings else None,
+            "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2) if timings else None,
+        })
+    return {
+        "backend": backend,
+        "source": index.depth_backend.source,
+        "torch_imported": "torch" in sys.modules,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "images": [row for row in rows if "image" in row],
+        "latency": {row["mode"]: row for row in rows if "image" not in row},
+    }
+
+
+def compare(result, reference):
+    """Per mode: max |ratio difference| per sample point and max |circumference difference| (cm)."""
+    baseline = {(row["image"], row["mode"]): row for row in reference["images"]}
+    report = {}
+    for mode in MODES:
+        ratio_diff = {key: 0.0 for key in RATIOS}
+        cm_diff = 0.0
+        for row in result["images"]:
+            expected = baseline.get((row["image"], row["mode"]))
+            if row["mode"] != mode or expected is None:
+                continue
+            for key in RATIOS:
+                ratio_diff[key] = max(ratio_diff[key], abs(row["ratios"][key] - expected["ratios"][key]))
+            for key in CIRCUMFERENCES:
+                got, want = row["circumferences"][key], expected["circumferences"][key]
+                if isinstance(got, (int, float)) and isinstance(want, (int, float)):
+                    cm_diff = max(cm_diff, abs(got - want))
+        report[mode] = {"max_ratio_diff": {key: round(value, 4) for key, value in ratio_diff.items()},
+                        "max_circumference_diff_cm": round(cm_diff, 2)}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS))
+    parser.add_argument("--photos", nargs="*", default=[], help="Front photos to add (landmarks from Holistic)")
+    parser.add_argument("--runs", type=int, default=10, help="Timed depth passes per image and mode")
+    parser.add_argument("--fixtures-dir", default=FIXTURES_DIR)
+    parser.add_argument("--max-ratio-diff", type=float, default=0.02,
+                        help="Exit 1 when a non-torch backend's depth ratio differs from torch by more (none excluded)")
+    parser.add_argument("--output", help="Also write the results JSON here")
+    parser.add_argument("--backend", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.backend:
+        print(json.dumps(run_backend(args.backend, args.runs, args.resolutions, args.fixtures_dir, args.photos)))
+        return 0
+
+    backends = ["torch"] + [backend for backend in args.backends if backend != "torch"]
+    results = {}
+    for backend in backends:
+        env = {**os.environ, "DEPTH_BACKEND": backend, "RESULT_CACHE_ENTRIES": "0", "EVENT_LOG": "off"}
+        out = subprocess.run(
+            [sys.executable, __file__, "--backend", backend, "--runs", str(args.runs), "--resolutions",
+             *args.resolutions, "--fixtures-dir", args.fixtures_dir, "--photos", *args.photos],
+            check=True, capture_output=True, text=True, env=env
+        ).stdout
+        results[backend] = json.loads(out.strip().splitlines()[-1])
+
+    reference = results["torch"]
+    if "skipped" in reference:
+        print(f"torch baseline skipped: {reference['skipped']}")
+        return 1
+    failed = False
+    print(f"{'backend':<11}{'mode':<6}{'p50 ms':>9}{'p95 ms':>9}{'RSS MB':>9}{'torch':>7}"
+          + "".join(f"{key.replace('_depth', ''):>8}" for key in RATIOS) + f"{'max cm':>9}")
+    for backend in backends:
+        result = results[backend]
+        if "skipped" in result:
+            print(f"{backend:<11}skipped: {result['skipped']}")
+            continue
+        result["vs_torch"] = compare(result, reference)
+        for mode in MODES:
+            latency = result["latency"][mode]
+            diff = result["vs_torch"][mode]
+            ratios = diff["max_ratio_diff"]
+            if backend not in ("torch", "none") and max(ratios.values()) > args.max_ratio_diff:
+                failed = True
+            p50 = "-" if latency["p50_ms"] is None else latency["p50_ms"]
+            p95 = "-" if latency["p95_ms"] is None else latency["p95_ms"]
+            print(f"{backend:<11}{mode:<6}{p50:>9}{p95:>9}{result['peak_rss_mb']:>9}"
+                  f"{'yes' if result['torch_imported'] else 'no':>7}"
+                  + "".join(f"{ratios[key]:>8}" for key in RATIOS) + f"{diff['max_circumference_diff_cm']:>9}")
+    print("Ratio columns: max |depth ratio - torch's| at each sample point (ratios run 1.0-1.5); "
+          "max cm: largest circumference difference.")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
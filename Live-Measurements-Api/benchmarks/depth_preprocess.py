@@ -0,0 +1,99 @@
+"""
+Before/after comparison for the MiDaS depth stage on 12 MP phone-sized frames.
+
+Each variant runs in its own subprocess so peak RSS (ru_maxrss) is not shared.
+Imports api/index.py, so it needs the same environment as the server (.env).
+
+    python benchmarks/depth_preprocess.py            # compare both variants
+    python benchmarks/depth_preprocess.py --runs 20 --width 4000 --height 3000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+
+
+def legacy_estimate_depth(depth_model, image):
+    """The pre-rewrite implementation: float64 full-frame divide, torch.tensor copy, full-res interpolate."""
+    import cv2
+    import torch
+    import torch.nn.functional as F
+
+    input_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB) / 255.0
+    input_tensor = torch.tensor(input_image, dtype=torch.float32).permute(2, 0, 1).unsqueeze(0)
+    input_tensor = F.interpolate(input_tensor, size=(384, 384), mode="bilinear", align_corners=False)
+    with torch.no_grad():
+        depth_map = depth_model(input_tensor)
+    return depth_map.squeeze().numpy()
+
+
+def run_variant(variant, runs, width, height):
+    import numpy as np
+
+    sys.path.insert(0, API_DIR)
+    import index
+
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    rss_before_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    if variant == "legacy":
+        # The legacy path fed a contiguous NCHW tensor to a contiguous-format model
+        import torch
+        model = index.model_registry.get("midas").model.to(memory_format=torch.contiguous_format)
+        estimate = lambda frame: legacy_estimate_depth(model, frame)
+    else:
+        estimate = index.estimate_depth
+
+    estimate(image)  # Warm-up
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        estimate(image)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    return {
+        "variant": variant,
+        "image": f"{width}x{height}",
+        "runs": runs,
+        "p50_ms": round(timings[len(timings) // 2], 2),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_rss_growth_mb": round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before_kb) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--variant", choices=["legacy", "current"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.runs, args.width, args.height)))
+        return
+
+    rows = []
+    for variant in ("legacy", "current"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--variant", variant, "--runs", str(args.runs),
+             "--width", str(args.width), "--height", str(args.height)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        rows.append(json.loads(out.strip().splitlines()[-1]))
+
+    print(f"{'variant':<10}{'p50 ms':>10}{'p95 ms':>10}{'peak RSS MB':>14}{'RSS growth MB':>16}")
+    for row in rows:
+        print(f"{row['variant']:<10}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['peak_rss_mb']:>14}{row['peak_rss_growth_mb']:>16}")
+
+
+if __name__ == "__main__":
+    main()
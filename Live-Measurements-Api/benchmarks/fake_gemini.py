@@ -0,0 +1,144 @@
+"""
+A local stand-in for the Gemini REST API, for exercising /chat's upstream guards
+(coalescing, concurrency limit, timeouts, circuit breaker) without a real key.
+
+Serves POST /v1beta/models/<model>:generateContent and :streamGenerateContent?alt=sse
+with a configurable delay and error rate. Point the API at it with
+
+    python benchmarks/fake_gemini.py --port 8765 --latency 0.5 --error-rate 0.2
+    GEMINI_API_KEY=fake GEMINI_BASE_URL=http://127.0.0.1:8765 python api/index.py
+
+GET /stats returns how many upstream calls the server actually received.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeGeminiState:
+    def __init__(self, latency=0.2, error_rate=0.0, reply="This is a reply from the fake Gemini server.", seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.reply = reply
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def begin(self):
+        with self.lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            fail = self.random.random() < self.error_rate
+            self.errors += fail
+            return fail
+
+    def end(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def stats(self):
+        with self.lock:
+            return {"calls": self.calls, "errors": self.errors, "in_flight": self.in_flight,
+                    "max_in_flight": self.max_in_flight}
+
+
+def _candidate(text):
+    return {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}]}
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None  # Set by make_server
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._json(200, self.state.stats())
+        else:
+            self._json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        path = self.path.split("?", 1)[0]
+        if not (path.endswith(":generateContent") or path.endswith(":streamGenerateContent")):
+            self._json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+            return
+
+        fail = self.state.begin()
+        try:
+            time.sleep(self.state.latency)
+            if fail:
+                self._json(503, {"error": {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}})
+            elif path.endswith(":generateContent"):
+                self._json(200, _candidate(self.state.reply))
+            else:
+                self._stream()
+        finally:
+            self.state.end()
+
+    def _stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        words = self.state.reply.split(" ")
+        for i, word in enumerate(words):
+            text = word if i == len(words) - 1 else word + " "
+            self.wfile.write(f"data: {json.dumps(_candidate(text))}\r\n\r\n".encode())
+            self.wfile.flush()
+            time.sleep(0.01)
+        self.close_connection = True
+
+
+class FakeGeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that time out hang up before the delayed response is written; that is expected here
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def make_server(port=0, **state_kwargs):
+    """A FakeGeminiServer on 127.0.0.1 (port 0 = any free port); call serve_forever() on it."""
+    handler = type("Handler", (FakeGeminiHandler,), {"state": FakeGeminiState(**state_kwargs)})
+    server = FakeGeminiServer(("127.0.0.1", port), handler)
+    server.state = handler.state
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before each response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with 503")
+    args = parser.parse_args()
+    server = make_server(args.port, latency=args.latency, error_rate=args.error_rate)
+    print(f"Fake Gemini on http://127.0.0.1:{server.server_address[1]} "
+          f"(latency {args.latency}s, error rate {args.error_rate})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
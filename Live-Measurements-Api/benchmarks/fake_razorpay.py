@@ -0,0 +1,117 @@
+"""
+A local stand-in for the Razorpay orders API, for timing /create-order and
+/verify-payment without a real account or network.
+
+Serves POST /v1/orders (HTTP/1.1 keep-alive) with a configurable delay and counts
+orders created and TCP connections accepted. Point the API at it with
+
+    python benchmarks/fake_razorpay.py --port 8766 --latency 0.15
+    RAZORPAY_KEY_ID=rzp_test RAZORPAY_KEY_SECRET=secret \\
+        RAZORPAY_BASE_URL=http://127.0.0.1:8766/v1 python api/index.py
+
+GET /stats returns the counters.
+"""
+import argparse
+import json
+import socket
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeRazorpayState:
+    def __init__(self, latency=0.15):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.orders = 0
+        self.connections = 0
+
+    def stats(self):
+        with self.lock:
+            return {"orders": self.orders, "connections": self.connections}
+
+
+class FakeRazorpayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None  # Set by make_server
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without this Nagle + delayed ACK adds ~40 ms to each call
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.state.lock:
+            self.state.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._json(200, self.state.stats())
+        else:
+            self._json(404, {"error": {"code": "BAD_REQUEST_ERROR", "description": "Not found"}})
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        if self.path.split("?", 1)[0] != "/v1/orders":
+            self._json(404, {"error": {"code": "BAD_REQUEST_ERROR", "description": "Not found"}})
+            return
+        time.sleep(self.state.latency)
+        with self.state.lock:
+            self.state.orders += 1
+        self._json(200, {
+            "id": f"order_{uuid.uuid4().hex[:14]}",
+            "entity": "order",
+            "amount": payload.get("amount"),
+            "amount_paid": 0,
+            "amount_due": payload.get("amount"),
+            "currency": payload.get("currency"),
+            "receipt": payload.get("receipt"),
+            "status": "created",
+            "attempts": 0,
+            "notes": [],
+            "created_at": int(time.time()),
+        })
+
+
+class FakeRazorpayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def make_server(port=0, **state_kwargs):
+    """A FakeRazorpayServer on 127.0.0.1 (port 0 = any free port); call serve_forever() on it."""
+    handler = type("Handler", (FakeRazorpayHandler,), {"state": FakeRazorpayState(**state_kwargs)})
+    server = FakeRazorpayServer(("127.0.0.1", port), handler)
+    server.state = handler.state
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.15, help="Seconds before each order is returned")
+    args = parser.parse_args()
+    server = make_server(args.port, latency=args.latency)
+    print(f"Fake Razorpay on http://127.0.0.1:{server.server_address[1]}/v1 (latency {args.latency}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Synthetic full-body fixtures for the benchmark suite.
+
+A front-facing figure is drawn procedurally at a few phone-like resolutions, so
+the pixels, the segmentation mask and all 33 pose landmarks are known exactly and
+are identical on every machine. The JPEGs are checked in under fixtures/ (the
+route and decode benchmarks read those bytes); regenerate them with
+
+    python benchmarks/fixtures.py --write
+
+The figure is a drawing, not a photo: Holistic may or may not detect a person in
+it. Pass --fixtures-dir to the benchmark to use your own (licensed) photos instead.
+"""
+import argparse
+import os
+
+import cv2
+import numpy as np
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+RESOLUTIONS = ("720x1280", "1080x1920", "3024x4032")
+
+# MediaPipe pose landmark index -> (dx, y): dx is the offset from the image center and
+# y the distance from the top, both as fractions of the image height. "Left" is the
+# subject's left, which appears on the image's right for a front-facing photo.
+_POSE_POINTS = {
+    0: (0.0, 0.10),                      # nose
+    1: (0.010, 0.09), 2: (0.014, 0.09), 3: (0.018, 0.09),     # left eye inner/center/outer
+    4: (-0.010, 0.09), 5: (-0.014, 0.09), 6: (-0.018, 0.09),  # right eye
+    7: (0.035, 0.095), 8: (-0.035, 0.095),                    # ears
+    9: (0.010, 0.115), 10: (-0.010, 0.115),                   # mouth
+    11: (0.10, 0.20), 12: (-0.10, 0.20),                      # shoulders
+    13: (0.14, 0.36), 14: (-0.14, 0.36),                      # elbows
+    15: (0.16, 0.50), 16: (-0.16, 0.50),                      # wrists
+    17: (0.17, 0.53), 18: (-0.17, 0.53),                      # pinkies
+    19: (0.165, 0.535), 20: (-0.165, 0.535),                  # index fingers
+    21: (0.155, 0.52), 22: (-0.155, 0.52),                    # thumbs
+    23: (0.07, 0.52), 24: (-0.07, 0.52),                      # hips
+    25: (0.07, 0.72), 26: (-0.07, 0.72),                      # knees
+    27: (0.07, 0.90), 28: (-0.07, 0.90),                      # ankles
+    29: (0.065, 0.92), 30: (-0.065, 0.92),                    # heels
+    31: (0.09, 0.93), 32: (-0.09, 0.93),                      # foot index
+}
+
+SKIN = (140, 170, 215)  # BGR
+TOP = (110, 60, 30)
+TROUSERS = (60, 55, 50)
+
+
+class FixtureLandmark:
+    __slots__ = ("x", "y", "z", "visibility")
+
+    def __init__(self, x, y, visibility=0.99):
+        self.x, self.y, self.z, self.visibility = x, y, 0.0, visibility
+
+
+class FixtureLandmarks:
+    def __init__(self, landmarks):
+        self.landmark = landmarks
+
+
+class FixtureResults:
+    """Shaped like a Holistic results object: pose_landmarks and segmentation_mask."""
+
+    def __init__(self, pose_landmarks, segmentation_mask):
+        self.pose_landmarks = pose_landmarks
+        self.segmentation_mask = segmentation_mask
+
+
+def parse_resolution(resolution):
+    width, height = (int(v) for v in resolution.lower().split("x"))
+    return width, height
+
+
+def _points(width, height):
+    return {i: (width / 2 + dx * height, y * height) for i, (dx, y) in _POSE_POINTS.items()}
+
+
+def render_figure(width, height):
+    """Returns (bgr_image uint8, segmentation_mask float32 in [0, 1], FixtureLandmarks)."""
+    pts = _points(width, height)
+    p = {i: (int(round(x)), int(round(y))) for i, (x, y) in pts.items()}
+    scale = height / 1000.0
+
+    image = np.empty((height, width, 3), np.uint8)
+    gradient = np.linspace(215, 175, height, dtype=np.float32)[:, None]
+    image[:] = np.stack([gradient, gradient + 5, gradient + 10], axis=-1).clip(0, 255).astype(np.uint8)
+    mask = np.zeros((height, width), np.uint8)
+
+    def limb(a, b, thickness, color):
+        for canvas, value in ((image, color), (mask, 255)):
+            cv2.line(canvas, p[a], p[b], value, max(1, int(thickness * scale)), cv2.LINE_AA)
+
+    def polygon(points, color):
+        poly = np.array(points, np.int32)
+        cv2.fillPoly(image, [poly], color, cv2.LINE_AA)
+        cv2.fillPoly(mask, [poly], 255, cv2.LINE_AA)
+
+    cx = width // 2
+    # Legs and feet
+    for hip, knee, ankle, toe in ((23, 25, 27, 31), (24, 26, 28, 32)):
+        limb(hip, knee, 70, TROUSERS)
+        limb(knee, ankle, 55, TROUSERS)
+        limb(ankle, toe, 25, (40, 40, 40))
+    # Torso: shoulders narrowing to a waist then out to the hips
+    waist_y = int(0.38 * height)
+    waist_dx = int(0.085 * height)
+    hip_dx = int(0.095 * height)
+    polygon([p[12], p[11], (cx + waist_dx, waist_y), (cx + hip_dx, p[23][1]),
+             (cx - hip_dx, p[24][1]), (cx - waist_dx, waist_y)], TOP)
+    # Arms
+    for shoulder, elbow, wrist, hand in ((11, 13, 15, 19), (12, 14, 16, 20)):
+        limb(shoulder, elbow, 45, TOP)
+        limb(elbow, wrist, 38, SKIN)
+        limb(wrist, hand, 30, SKIN)
+    # Neck and head
+    cv2.rectangle(image, (cx - int(0.02 * height), int(0.13 * height)), (cx + int(0.02 * height), p[11][1]), SKIN, -1)
+    cv2.rectangle(mask, (cx - int(0.02 * height), int(0.13 * height)), (cx + int(0.02 * height), p[11][1]), 255, -1)
+    head_axes = (int(0.045 * height), int(0.055 * height))
+    cv2.ellipse(image, (cx, int(0.09 * height)), head_axes, 0, 0, 360, SKIN, -1, cv2.LINE_AA)
+    cv2.ellipse(mask, (cx, int(0.09 * height)), head_axes, 0, 0, 360, 255, -1, cv2.LINE_AA)
+
+    # Soft edges, like Holistic's segmentation output
+    blur = max(3, int(5 * scale) | 1)
+    segmentation_mask = cv2.GaussianBlur(mask, (blur, blur), 0).astype(np.float32) / 255.0
+
+    landmarks = FixtureLandmarks([FixtureLandmark(x / width, y / height) for _, (x, y) in sorted(pts.items())])
+    return image, segmentation_mask, landmarks
+
+
+def fixture_path(resolution, fixtures_dir=FIXTURES_DIR):
+    return os.path.join(fixtures_dir, f"front_{resolution}.jpg")
+
+
+def load_fixture(resolution, fixtures_dir=FIXTURES_DIR):
+    """
+    (jpeg_bytes, frame, results) for one resolution. Landmarks and mask always come from
+    the renderer; the image bytes come from the checked-in JPEG when present.
+    """
+    width, height = parse_resolution(resolution)
+    image, segmentation_mask, landmarks = render_figure(width, height)
+    path = fixture_path(resolution, fixtures_dir)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            jpeg = f.read()
+    else:
+        jpeg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+    frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+    return jpeg, frame, FixtureResults(landmarks, segmentation_mask)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--write", action="store_true", help="Render and write the fixture JPEGs")
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS))
+    args = parser.parse_args()
+    if not args.write:
+        parser.print_help()
+        return
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    for resolution in args.resolutions:
+        image, _, _ = render_figure(*parse_resolution(resolution))
+        path = fixture_path(resolution)
+        cv2.imwrite(path, image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        print(f"Wrote {path} ({os.path.getsize(path) // 1024} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Streams a photo to the /live WebSocket as if it were a phone camera and reports the
+server's per-frame cost and how many frames the estimates took to converge.
+
+Each frame is the fixture shifted by a few random pixels and re-encoded, so the tracker
+sees small movement like a hand-held phone on a stand. Start the API first:
+
+    python api/index.py
+    python benchmarks/live_stream.py --url ws://127.0.0.1:5000/live --frames 120 --fps 10
+
+Needs simple-websocket (installed with flask-sock).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+from simple_websocket import Client
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_IMAGE = os.path.join(BENCH_DIR, "fixtures", "front_720x1280.jpg")
+
+
+def jittered_frames(image, count, jitter_px, quality, seed=0):
+    """JPEG bytes of `image` translated by up to jitter_px in x and y, one per frame."""
+    rng = np.random.default_rng(seed)
+    height, width = image.shape[:2]
+    frames = []
+    for _ in range(count):
+        dx, dy = rng.uniform(-jitter_px, jitter_px, size=2)
+        shifted = cv2.warpAffine(image, np.float32([[1, 0, dx], [0, 1, dy]]), (width, height),
+                                 borderMode=cv2.BORDER_REPLICATE)
+        frames.append(cv2.imencode(".jpg", shifted, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes())
+    return frames
+
+
+def percentile(values, q):
+    return round(float(np.percentile(values, q)), 1) if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="ws://127.0.0.1:5000/live")
+    parser.add_argument("--image", default=DEFAULT_IMAGE)
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--fps", type=float, default=10, help="Send rate; 0 sends each frame as soon as the last is answered")
+    parser.add_argument("--jitter", type=float, default=1.5, help="Max random shift per frame, in pixels")
+    parser.add_argument("--quality", type=int, default=80, help="JPEG quality of the sent frames")
+    parser.add_argument("--height-cm", type=float, default=170)
+    args = parser.parse_args()
+
+    image = cv2.imread(args.image)
+    if image is None:
+        print(f"Could not read {args.image}", file=sys.stderr)
+        return 1
+    frames = jittered_frames(image, args.frames, args.jitter, args.quality)
+
+    ws = Client.connect(f"{args.url}?height_cm={args.height_cm}")
+    ready = json.loads(ws.receive(timeout=30))
+    if ready.get("type") != "ready":
+        print(f"Server refused the session: {ready}", file=sys.stderr)
+        return 1
+
+    process_ms, track_ms, round_trip_ms = [], [], []
+    tracked = selected = 0
+    converged_at, last_estimate, hints = None, None, {}
+    started = time.perf_counter()
+    try:
+        for n, frame in enumerate(frames, 1):
+            sent = time.perf_counter()
+            ws.send(frame)
+            while True:
+                message = json.loads(ws.receive(timeout=30))
+                if message["type"] == "estimate":
+                    last_estimate = message
+                    if message["converged"] and converged_at is None:
+                        converged_at = n
+                elif message["type"] == "frame":
+                    break
+                else:
+                    print(f"Server error: {message}", file=sys.stderr)
+                    return 1
+            round_trip_ms.append((time.perf_counter() - sent) * 1000)
+            process_ms.append(message["process_ms"])
+            track_ms.append(message["track_ms"])
+            tracked += message["tracked"]
+            selected += message["selected"]
+            if message["hint"]:
+                hints[message["hint"]] = hints.get(message["hint"], 0) + 1
+            if args.fps > 0:
+                time.sleep(max(0.0, sent + 1 / args.fps - time.perf_counter()))
+    finally:
+        ws.close()
+    elapsed = time.perf_counter() - started
+
+    report = {
+        "frames": len(frames),
+        "frame_size": f"{image.shape[1]}x{image.shape[0]}",
+        "achieved_fps": round(len(frames) / elapsed, 1),
+        "tracked": tracked,
+        "selected": selected,
+        "server_process_ms": {"p50": percentile(process_ms, 50), "p95": percentile(process_ms, 95)},
+        "server_track_ms": {"p50": percentile(track_ms, 50), "p95": percentile(track_ms, 95)},
+        "round_trip_ms": {"p50": percentile(round_trip_ms, 50), "p95": percentile(round_trip_ms, 95)},
+        "converged_at_frame": converged_at,
+        "hints": hints,
+    }
+    if last_estimate:
+        report["final_estimate"] = {key: last_estimate[key] for key in ("samples", "confidence", "converged")}
+        report["final_estimate"]["measurements"] = {
+            key: value for key, value in last_estimate["measurements"].items()
+            if key in ("shoulder_width", "chest_circumference", "waist", "hip", "inseam")
+        }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Checks that measurement_kernel reproduces the scalar measurement code exactly, then
+times it on batches.
+
+The scalar calculate_measurements / calculate_side_measurements that the kernel replaced
+are kept verbatim in tests/scalar_measurements.py. Random subjects are built from the
+fixture figure: jittered landmarks (quantized to float32, as MediaPipe stores them), the
+fixture mask as-is, dilated or eroded, a synthetic depth map or none, user height or a
+given scale. Every subject must give byte-identical JSON from both implementations,
+warnings and measurement_quality included. The timings compare the scalar loop with the
+kernel on one (N, 33, 4) batch.
+
+    python benchmarks/measurement_throughput.py --subjects 2000 --batch 20000
+
+Imports api/index.py (the image models don't need to load). Exits 1 on any mismatch.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "api"))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "tests"))
+import index  # noqa: E402
+from fixtures import FixtureLandmark, FixtureLandmarks, FixtureResults, render_figure  # noqa: E402
+from index import DepthSummary  # noqa: E402
+from measurement_kernel import (  # noqa: E402
+    ImageProbes, height_scale, measure_landmarks, side_depths, stack_landmarks
+)
+from pipeline import synthetic_depth_map  # noqa: E402
+from scalar_measurements import scalar_measurements, scalar_side_measurements  # noqa: E402
+
+RESOLUTIONS = ((360, 640), (720, 1280), (1080, 1920))
+
+
+# --- Random subjects ---
+
+class Subject:
+    def __init__(self, results, width, height, depth_map, mask, user_height_cm, scale_factor):
+        self.results = results
+        self.width = width
+        self.height = height
+        self.depth_map = depth_map
+        self.mask = mask
+        self.user_height_cm = user_height_cm
+        self.scale_factor = scale_factor
+
+    def landmark_array(self):
+        return np.array([(lm.x, lm.y, lm.z, lm.visibility) for lm in self.results.pose_landmarks.landmark],
+                        dtype=np.float32)
+
+
+def random_subjects(count, rng):
+    # A few shared mask and depth variants; subjects differ by their landmarks
+    figures = {size: render_figure(*size) for size in RESOLUTIONS}
+    kernel = np.ones((1, 15), np.uint8)
+    masks = {size: (mask, cv2.dilate(mask, kernel), cv2.erode(mask, kernel), None)
+             for size, (_, mask, _) in figures.items()}
+    depth_maps = [synthetic_depth_map(size) * np.float32(scale) for size in (256, 384) for scale in (0.5, 1.0, 2.0)]
+    subjects = []
+    for _ in range(count):
+        width, height = RESOLUTIONS[rng.integers(len(RESOLUTIONS))]
+        base = figures[(width, height)][2]
+        # Mostly small jitter; sometimes large enough to trip the contour fallbacks and warnings
+        sigma = 0.004 if rng.random() < 0.6 else 0.06
+        landmarks = []
+        for lm in base.landmark:
+            x, y = np.float32([lm.x + rng.normal(0, sigma), lm.y + rng.normal(0, sigma)])
+            landmark = FixtureLandmark(float(x), float(y), float(np.float32(rng.uniform(0.3, 1.0))))
+            landmark.z = float(np.float32(rng.normal(0, 0.1)))
+            landmarks.append(landmark)
+        mask = masks[(width, height)][rng.integers(4)]
+        depth_map = depth_maps[rng.integers(len(depth_maps))] if rng.random() < 0.5 else None
+        user_height_cm = float(rng.uniform(140, 200)) if rng.random() < 0.8 else None
+        scale_factor = None if user_height_cm else float(rng.uniform(0.1, 0.5))
+        subjects.append(Subject(FixtureResults(FixtureLandmarks(landmarks), mask), width, height,
+                                depth_map, mask, user_height_cm, scale_factor))
+    return subjects
+
+
+def compare(subjects):
+    """Mismatching (index, scalar, kernel) triples, and how many subjects hit each branch."""
+    mismatches = []
+    coverage = {"warnings": 0, "fair": 0, "natural_waist": 0, "depth": 0, "mask": 0}
+    for i, s in enumerate(subjects):
+        def run(fn):
+            # Fresh silhouette/depth objects per call, so neither implementation sees the other's caches
+            depth = DepthSummary(s.depth_map) if s.depth_map is not None else None
+            front = fn(s.results, s.scale_factor, s.width, s.height, depth, s.mask, s.user_height_cm)
+            return json.dumps(front)
+
+        expected, actual = run(scalar_measurements), run(index.calculate_measurements)
+        front = json.loads(expected)
+        coverage["warnings"] += "warnings" in front
+        coverage["fair"] += front["measurement_quality"] == "fair"
+        coverage["natural_waist"] += "natural_waist" in front
+        coverage["depth"] += s.depth_map is not None
+        coverage["mask"] += s.mask is not None
+        side_expected = json.dumps(scalar_side_measurements(s.results, s.scale_factor or 0.05, s.width, s.height,
+                                                            s.user_height_cm))
+        side_actual = json.dumps(index.calculate_side_measurements(s.results, s.scale_factor or 0.05, s.width,
+                                                                   s.height, s.user_height_cm))
+        if expected != actual or side_expected != side_actual:
+            mismatches.append((i, expected + side_expected, actual + side_actual))
+    return mismatches, coverage
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subjects", type=int, default=2000, help="Random subjects compared one by one")
+    parser.add_argument("--batch", type=int, default=20000, help="Subjects in the timed kernel batch")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)  # Fallback warnings would dominate the scalar timings
+
+    rng = np.random.default_rng(args.seed)
+    subjects = random_subjects(args.subjects, rng)
+    mismatches, coverage = compare(subjects)
+    print(f"equivalence: {args.subjects - len(mismatches)}/{args.subjects} subjects identical "
+          f"(subjects with {', '.join(f'{key}: {count}' for key, count in coverage.items())})")
+    for i, expected, actual in mismatches[:5]:
+        print(f"  subject {i}\n    scalar {expected}\n    kernel {actual}")
+
+    # Landmarks-only timing (no mask or depth): the scalar loop vs one kernel call
+    timed = [subjects[i % len(subjects)] for i in range(args.batch)]
+    scalar_count = min(args.batch, 5000)
+    started = time.perf_counter()
+    for s in timed[:scalar_count]:
+        scalar_measurements(s.results, s.scale_factor, s.width, s.height, None, None, s.user_height_cm)
+    scalar_rate = scalar_count / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    batch = stack_landmarks([s.landmark_array() for s in timed])
+    convert_seconds = time.perf_counter() - started
+    widths = np.array([s.width for s in timed])
+    heights = np.array([s.height for s in timed])
+    heights_cm = np.array([s.user_height_cm or 170.0 for s in timed])
+    started = time.perf_counter()
+    scale = height_scale(batch, heights, heights_cm)
+    result = measure_landmarks(batch, widths, heights, scale, ImageProbes.none(len(timed)))
+    side_depths(batch, widths, scale)
+    kernel_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    result.rows()
+    rows_seconds = time.perf_counter() - started
+
+    print(json.dumps({
+        "scalar_subjects_per_s": round(scalar_rate),
+        "kernel_subjects_per_s": round(len(timed) / kernel_seconds),
+        "kernel_with_dicts_subjects_per_s": round(len(timed) / (kernel_seconds + rows_seconds)),
+        "landmarks_to_array_ms": round(convert_seconds * 1000, 1),
+        "batch": len(timed),
+    }, indent=2))
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Latency of /create-order and /verify-payment against benchmarks/fake_razorpay.py, in process:
+
+  new_order       a fresh Idempotency-Key each time (one Razorpay round trip)
+  repeated_order  the same key again (answered from the idempotency cache)
+  double_click    N requests with one key at once (one Razorpay order between them)
+  verify_payment  a valid checkout signature (local HMAC)
+
+    python benchmarks/payment_latency.py --latency 0.15 --runs 50
+
+Imports api/index.py (the image models don't need to load).
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(BENCH_DIR, "..", "api")
+KEY_SECRET = "bench_secret"
+
+
+def summarize(timings):
+    from pipeline import percentile
+
+    timings = sorted(timings)
+    return (f"p50 {percentile(timings, 50) * 1000:8.3f} ms   p95 {percentile(timings, 95) * 1000:8.3f} ms"
+            f"   ({len(timings)} runs)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.15, help="Fake Razorpay response delay in seconds")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10, help="Same-key requests sent at once for double_click")
+    args = parser.parse_args()
+
+    sys.path.insert(0, BENCH_DIR)
+    from fake_razorpay import make_server
+
+    server = make_server(latency=args.latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ.update({
+        "RAZORPAY_KEY_ID": "rzp_test_bench",
+        "RAZORPAY_KEY_SECRET": KEY_SECRET,
+        "RAZORPAY_BASE_URL": f"http://127.0.0.1:{server.server_address[1]}/v1",
+    })
+    sys.path.insert(0, API_DIR)
+    import index
+    from payments import payment_signature
+
+    client = index.app.test_client()
+    state = server.state
+
+    def post(path, body, idempotency_key=None):
+        start = time.perf_counter()
+        response = client.post(path, json=body, headers={"Idempotency-Key": idempotency_key} if idempotency_key else {})
+        elapsed = time.perf_counter() - start
+        assert response.status_code == 200, (path, response.status_code, response.get_json())
+        return response, elapsed
+
+    print(f"Fake Razorpay latency: {args.latency * 1000:.0f} ms\n")
+
+    timings, order_ids = [], []
+    for i in range(args.runs):
+        response, elapsed = post("/create-order", {"amount": 49900}, f"bench-{i}")
+        timings.append(elapsed)
+        order_ids.append(response.get_json()["id"])
+    print(f"{'new_order':<16}{summarize(timings)}")
+
+    timings = [post("/create-order", {"amount": 49900}, "bench-0")[1] for _ in range(args.runs)]
+    print(f"{'repeated_order':<16}{summarize(timings)}")
+
+    orders_before = state.orders
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        responses = list(pool.map(lambda _: post("/create-order", {"amount": 129900}, "double-click"),
+                                  range(args.concurrency)))
+    ids = {response.get_json()["id"] for response, _ in responses}
+    print(f"{'double_click':<16}{args.concurrency} requests -> {state.orders - orders_before} Razorpay order(s), "
+          f"{len(ids)} distinct id(s), slowest {max(t for _, t in responses) * 1000:.1f} ms")
+
+    timings = []
+    for i in range(args.runs):
+        payment_id = f"pay_bench{i}"
+        timings.append(post("/verify-payment", {
+            "razorpay_order_id": order_ids[i],
+            "razorpay_payment_id": payment_id,
+            "razorpay_signature": payment_signature(order_ids[i], payment_id, KEY_SECRET),
+        })[1])
+    print(f"{'verify_payment':<16}{summarize(timings)}")
+
+    print(f"\nfake server: {state.stats()}  (connections opened for {state.orders} orders)")
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
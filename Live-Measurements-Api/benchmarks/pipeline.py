@@ -0,0 +1,247 @@
+"""
+Benchmark suite for the measurement pipeline, with a saved baseline to catch regressions.
+
+Cases (each resolution in benchmarks/fixtures/, each case in its own subprocess so
+peak RSS is per case):
+  validate_front_image        Holistic + landmark validation          (needs models)
+  estimate_depth              MiDaS at the default input size         (needs models)
+  get_width_from_segmentation one silhouette row scan on a fresh mask
+  calculate_measurements      front math with the fixture landmarks, mask and a synthetic depth map
+  measurements_route          POST /measurements through the Flask test client (needs models)
+
+Reports p50/p95/p99 latency, throughput, peak RSS and peak traced allocations.
+Imports api/index.py, so it needs the same environment as the server (.env).
+
+    python benchmarks/pipeline.py                          # run, compare with benchmarks/baseline.json
+    python benchmarks/pipeline.py --save-baseline          # run and record a new baseline
+    python benchmarks/pipeline.py --cases calculate_measurements --runs 200
+
+Exits with status 1 if any case's p50/p95 latency or peak RSS exceeds the baseline
+by more than the tolerance. Baselines are only comparable on the same hardware.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(BENCH_DIR, "..", "api")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+CASES = (
+    "validate_front_image",
+    "estimate_depth",
+    "get_width_from_segmentation",
+    "calculate_measurements",
+    "measurements_route",
+)
+MODEL_CASES = {"validate_front_image", "estimate_depth", "measurements_route"}
+USER_HEIGHT_CM = 175.0
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def synthetic_depth_map(size=384):
+    """Smooth radial depth (nearer at the center), the shape MiDaS returns for a centered subject."""
+    import numpy as np
+
+    ys, xs = np.mgrid[0:size, 0:size].astype(np.float32) / size - 0.5
+    return (1.0 - np.sqrt(xs ** 2 + ys ** 2)).astype(np.float32) * 1000
+
+
+def build_case(case, resolution, fixtures_dir):
+    """The zero-argument callable timed for one case; imports index lazily."""
+    sys.path.insert(0, API_DIR)
+    sys.path.insert(0, BENCH_DIR)
+    import index
+    from fixtures import load_fixture
+
+    jpeg, frame, results = load_fixture(resolution, fixtures_dir)
+    height, width = frame.shape[:2]
+
+    if case in MODEL_CASES and not index.model_registry.wait_ready(("holistic", "midas"), 600):
+        status = {name: entry["error"] or entry["state"] for name, entry in index.model_registry.status().items()
+                  if entry["required"] and entry["state"] != "ready"}
+        raise RuntimeError(f"models not ready: {status}")
+
+    if case == "validate_front_image":
+        return lambda: index.validate_front_image(frame)
+    if case == "estimate_depth":
+        return lambda: index.estimate_depth(frame)
+    if case == "get_width_from_segmentation":
+        landmarks = results.pose_landmarks.landmark
+        row = int((landmarks[11].y + (landmarks[23].y - landmarks[11].y) * 0.35) * height)
+        center_x = (landmarks[23].x + landmarks[24].x) / 2
+        return lambda: index.get_width_from_segmentation(results.segmentation_mask, row, center_x, width)
+    if case == "calculate_measurements":
+        _, scale_factor = index.calculate_distance_using_height(results.pose_landmarks.landmark, height, USER_HEIGHT_CM)
+        depth_map = synthetic_depth_map()
+        return lambda: index.calculate_measurements(
+            results, scale_factor, width, height, depth_map, results.segmentation_mask, USER_HEIGHT_CM
+        )
+    if case == "measurements_route":
+        client = index.app.test_client()
+        status_codes = {}
+
+        def post():
+            response = client.post("/measurements", data={
+                "front": (io.BytesIO(jpeg), "front.jpg"),
+                "height_cm": str(USER_HEIGHT_CM),
+            }, content_type="multipart/form-data")
+            status_codes[response.status_code] = status_codes.get(response.status_code, 0) + 1
+
+        post.status_codes = status_codes
+        return post
+    raise ValueError(f"Unknown case: {case}")
+
+
+def run_case(case, resolution, runs, warmup, fixtures_dir):
+    """Runs in the child process; returns the result dict printed as the last stdout line."""
+    try:
+        fn = build_case(case, resolution, fixtures_dir)
+    except RuntimeError as e:
+        return {"case": case, "resolution": resolution, "skipped": str(e)}
+
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    # One extra call under tracemalloc (kept out of the timed loop; it slows allocation down)
+    tracemalloc.start()
+    fn()
+    _, peak_alloc = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    result = {
+        "case": case,
+        "resolution": resolution,
+        "runs": runs,
+        "p50_ms": round(percentile(timings, 50) * 1000, 3),
+        "p95_ms": round(percentile(timings, 95) * 1000, 3),
+        "p99_ms": round(percentile(timings, 99) * 1000, 3),
+        "throughput_per_s": round(runs / sum(timings), 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_alloc_mb": round(peak_alloc / (1024 * 1024), 2),
+    }
+    status_codes = getattr(fn, "status_codes", None)
+    if status_codes is not None:
+        result["status_codes"] = {str(code): count for code, count in sorted(status_codes.items())}
+    return result
+
+
+def environment():
+    info = {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count(),
+            "depth_backend": os.getenv("DEPTH_BACKEND", "torch")}
+    try:
+        import torch
+        info["torch"] = torch.__version__
+    except ImportError:
+        pass
+    return info
+
+
+def compare(results, baseline, tolerance, memory_tolerance):
+    """Regression messages for every case slower or bigger than the baseline allows."""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get("results", {}).get(key)
+        if previous is None or "skipped" in current or "skipped" in previous:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            if current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{key} {metric}: {previous[metric]} -> {current[metric]} "
+                                   f"(+{(current[metric] / previous[metric] - 1) * 100:.0f}%, limit {tolerance * 100:.0f}%)")
+        if current["peak_rss_mb"] > previous["peak_rss_mb"] * (1 + memory_tolerance):
+            regressions.append(f"{key} peak_rss_mb: {previous['peak_rss_mb']} -> {current['peak_rss_mb']} "
+                               f"(limit {memory_tolerance * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    sys.path.insert(0, BENCH_DIR)
+    from fixtures import FIXTURES_DIR, RESOLUTIONS
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS))
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--fixtures-dir", default=FIXTURES_DIR, help="Directory of front_<W>x<H>.jpg images")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p50/p95 slowdown (0.25 = 25%%)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.15, help="Allowed peak RSS growth")
+    parser.add_argument("--output", help="Also write the results JSON here")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--resolution", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case, args.resolution, args.runs, args.warmup, args.fixtures_dir)))
+        return 0
+
+    results = {}
+    for case in args.cases:
+        for resolution in args.resolutions:
+            out = subprocess.run(
+                [sys.executable, __file__, "--case", case, "--resolution", resolution, "--runs", str(args.runs),
+                 "--warmup", str(args.warmup), "--fixtures-dir", args.fixtures_dir],
+                # The child's last stdout line is its result; keep the route's event log off stdout
+                check=True, capture_output=True, text=True, env={**os.environ, "EVENT_LOG": "off"}
+            ).stdout
+            results[f"{case}@{resolution}"] = json.loads(out.strip().splitlines()[-1])
+
+    print(f"{'case':<30}{'resolution':>11}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>9}{'RSS MB':>9}{'alloc MB':>10}")
+    for row in results.values():
+        if "skipped" in row:
+            print(f"{row['case']:<30}{row['resolution']:>11}  skipped: {row['skipped']}")
+            continue
+        print(f"{row['case']:<30}{row['resolution']:>11}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}"
+              f"{row['throughput_per_s']:>9}{row['peak_rss_mb']:>9}{row['peak_alloc_mb']:>10}"
+              + (f"  status {row['status_codes']}" if "status_codes" in row else ""))
+
+    report = {"environment": environment(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("environment") != report["environment"]:
+        print(f"\nWARNING: baseline was recorded on {baseline.get('environment')}, this run is {report['environment']}")
+    regressions = compare(results, baseline, args.tolerance, args.memory_tolerance)
+    if regressions:
+        print("\nPERFORMANCE REGRESSION vs baseline:", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        return 1
+    print(f"\nNo regressions vs {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
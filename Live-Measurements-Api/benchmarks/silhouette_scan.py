@@ -0,0 +1,112 @@
+"""
+Micro-benchmark: vectorized SilhouetteProfile vs the original per-pixel loop scan.
+
+Uses synthetic segmentation masks (an ellipse-shaped body with noise), checks that
+both implementations return identical widths, then times:
+  - rows: answering the four measurement rows (chest, waist, hip, thigh)
+  - band: the narrowest row across a chest-to-hip band (natural waist search)
+
+    python benchmarks/silhouette_scan.py --width 1080 --height 1920 --runs 50
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+from silhouette import SilhouetteProfile  # noqa: E402
+
+
+def loop_width_from_segmentation(segmentation_mask, height_px, center_x, image_width):
+    """The original get_width_from_segmentation, kept verbatim for comparison."""
+    if segmentation_mask is None:
+        return 0
+    mask_height, mask_width = segmentation_mask.shape
+    if height_px >= mask_height:
+        height_px = mask_height - 1
+    center_x_px = int(center_x * mask_width)
+    horizontal_line = segmentation_mask[height_px, :]
+    left_edge, right_edge = center_x_px, center_x_px
+    for i in range(center_x_px, 0, -1):
+        if horizontal_line[i] < 0.1:
+            left_edge = i
+            break
+    for i in range(center_x_px, mask_width):
+        if horizontal_line[i] < 0.1:
+            right_edge = i
+            break
+    width_px = right_edge - left_edge
+    width_px = int(width_px * (image_width / mask_width))
+    min_width = 0.05 * image_width
+    if width_px < min_width:
+        return 0
+    return width_px
+
+
+def synthetic_mask(width, height, rng):
+    yy, xx = np.mgrid[0:height, 0:width]
+    body = ((xx - width / 2) / (width * 0.22)) ** 2 + ((yy - height / 2) / (height * 0.45)) ** 2 <= 1.0
+    mask = body.astype(np.float32) * 0.9 + rng.random((height, width), dtype=np.float32) * 0.15
+    return mask
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=1080)
+    parser.add_argument("--height", type=int, default=1920)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    masks = [synthetic_mask(args.width, args.height, rng) for _ in range(4)]
+    # (row ratio, center) for chest, waist, hip, thigh; chest uses the shoulder center
+    queries = [(0.30, 0.50), (0.42, 0.51), (0.55, 0.51), (0.60, 0.51)]
+
+    for mask in masks:
+        for ratio in np.linspace(0, 1.1, 200):
+            for center in (0.0, 0.2, 0.5, 0.51, 0.8, 0.999):
+                row = int(ratio * args.height)
+                expected = loop_width_from_segmentation(mask, row, center, args.width)
+                # Fresh profile answers by row scan, the cached one from the full-height profile
+                fresh = SilhouetteProfile(mask).width_at(row, center, args.width)
+                cached = SilhouetteProfile(mask)
+                cached.edges(center)
+                assert expected == fresh == cached.width_at(row, center, args.width), (row, center, expected)
+
+    def run_loop(mask):
+        return [loop_width_from_segmentation(mask, int(r * args.height), c, args.width) for r, c in queries]
+
+    def run_profile(mask):
+        profile = SilhouetteProfile(mask)
+        return [profile.width_at(int(r * args.height), c, args.width) for r, c in queries]
+
+    band = (int(0.35 * args.height), int(0.55 * args.height))
+
+    def band_loop(mask):
+        widths = [loop_width_from_segmentation(mask, row, 0.51, args.width) for row in range(band[0], band[1] + 1)]
+        valid = [w for w in widths if w > 0]
+        return min(valid) if valid else 0
+
+    def band_profile(mask):
+        return SilhouetteProfile(mask).narrowest_row(band[0], band[1], 0.51, args.width)[1]
+
+    for mask in masks:
+        assert band_loop(mask) == band_profile(mask)
+
+    for name, fn in (("rows/loop", run_loop), ("rows/numpy", run_profile),
+                     ("band/loop", band_loop), ("band/numpy", band_profile)):
+        timings = []
+        for i in range(args.runs):
+            mask = masks[i % len(masks)]
+            start = time.perf_counter()
+            fn(mask)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(f"{name:<11} p50 {timings[len(timings) // 2]:8.3f} ms   "
+              f"p95 {timings[min(len(timings) - 1, int(len(timings) * 0.95))]:8.3f} ms   ({args.width}x{args.height})")
+
+
+if __name__ == "__main__":
+    main()
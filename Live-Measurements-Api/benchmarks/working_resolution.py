@@ -0,0 +1,188 @@
+"""
+Latency, memory and measurement drift of the front-photo preprocessing
+(WORKING_MAX_SIDE downscaling and the PERSON_CROP first pass).
+
+Every fixture is measured by measure_front_and_side under three configs, each
+resolution/config pair in its own subprocess so peak RSS is per case:
+  full          WORKING_MAX_SIDE=0,    PERSON_CROP=0   (the default pipeline)
+  working       WORKING_MAX_SIDE=1280, PERSON_CROP=0
+  working+crop  WORKING_MAX_SIDE=1280, PERSON_CROP=1
+Drift is each measurement's difference from "full" on the same photo.
+
+The fixture figure nearly fills its frame, where the crop is skipped (it would save
+almost nothing); --subject-scale shrinks it into a larger background, as in a photo
+taken from further back, so the crop has something to cut. Imports api/index.py, so
+it needs the same environment as the server (.env).
+
+    python benchmarks/working_resolution.py
+    python benchmarks/working_resolution.py --depth off --subject-scale 0.6 --runs 5
+    python benchmarks/working_resolution.py --fixtures-dir ~/photos   # front_<W>x<H>.jpg files
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(BENCH_DIR, "..", "api")
+sys.path.insert(0, BENCH_DIR)
+from fixtures import FIXTURES_DIR, RESOLUTIONS  # noqa: E402
+
+CONFIGS = {
+    "full": {"WORKING_MAX_SIDE": "0", "PERSON_CROP": "0"},
+    "working": {"WORKING_MAX_SIDE": "1280", "PERSON_CROP": "0"},
+    "working+crop": {"WORKING_MAX_SIDE": "1280", "PERSON_CROP": "1"},
+}
+USER_HEIGHT_CM = 175.0
+
+
+def fixture_jpeg(resolution, fixtures_dir, subject_scale):
+    """The fixture's JPEG bytes, with the figure shrunk to subject_scale of the frame if < 1."""
+    with open(os.path.join(fixtures_dir, f"front_{resolution}.jpg"), "rb") as f:
+        jpeg = f.read()
+    if subject_scale >= 1:
+        return jpeg
+    import cv2
+    import numpy as np
+
+    frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+    height, width = frame.shape[:2]
+    small = cv2.resize(frame, (round(width * subject_scale), round(height * subject_scale)),
+                       interpolation=cv2.INTER_AREA)
+    top = (height - small.shape[0]) // 2
+    left = (width - small.shape[1]) // 2
+    canvas = cv2.copyMakeBorder(small, top, height - small.shape[0] - top, left, width - small.shape[1] - left,
+                                cv2.BORDER_REPLICATE)
+    return cv2.imencode(".jpg", canvas, [cv2.IMWRITE_JPEG_QUALITY, 92])[1].tobytes()
+
+
+def run_case(config, resolution, runs, depth_mode, fixtures_dir, subject_scale):
+    """Runs in the child process (config already in the environment); returns the result dict."""
+    from werkzeug.datastructures import FileStorage
+
+    sys.path.insert(0, API_DIR)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import index
+
+    jpeg = fixture_jpeg(resolution, fixtures_dir, subject_scale)
+    models = ["holistic"] + (["midas"] if depth_mode != "off" else []) + \
+        (["person_detector"] if index.PERSON_CROP else [])
+    if not index.model_registry.wait_ready(models, 600):
+        status = {name: entry["error"] or entry["state"] for name, entry in index.model_registry.status().items()
+                  if name in models and entry["state"] != "ready"}
+        return {"config": config, "resolution": resolution, "skipped": f"models not ready: {status}"}
+
+    def measure():
+        return index.measure_front_and_side(FileStorage(stream=io.BytesIO(jpeg)), None, USER_HEIGHT_CM, depth_mode)
+
+    body, status = measure()  # Warm-up, and the result drift is computed from
+    rss_before_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        measure()
+        timings.append((time.perf_counter() - started) * 1000)
+    # One extra call under tracemalloc (NumPy/OpenCV buffers; MediaPipe's and torch's own arenas aren't traced)
+    tracemalloc.start()
+    measure()
+    _, peak_alloc = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    debug = body.get("debug_info", {})
+    return {
+        "config": config,
+        "resolution": resolution,
+        "status": status,
+        "error": body.get("error"),
+        "p50_ms": round(timings[len(timings) // 2], 1),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 1),
+        "peak_alloc_mb": round(peak_alloc / (1024 * 1024), 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "rss_growth_mb": round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before_kb) / 1024, 1),
+        "working_size": debug.get("working_size"),
+        "person_crop": debug.get("person_crop"),
+        "measurements": {key: value for key, value in body.get("measurements", {}).items()
+                         if isinstance(value, (int, float)) and not isinstance(value, bool)},
+    }
+
+
+def drift(measured, reference):
+    """Mean and max absolute difference (cm) and max relative difference (%) over shared measurements."""
+    keys = [key for key in reference if key in measured and reference[key]]
+    if not keys:
+        return None
+    deltas = [abs(measured[key] - reference[key]) for key in keys]
+    worst = max(keys, key=lambda key: abs(measured[key] - reference[key]) / abs(reference[key]))
+    return {
+        "mean_cm": round(sum(deltas) / len(deltas), 2),
+        "max_cm": round(max(deltas), 2),
+        "max_pct": round(abs(measured[worst] - reference[worst]) / abs(reference[worst]) * 100, 2),
+        "max_pct_measurement": worst,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS))
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGS), default=list(CONFIGS))
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--depth", choices=("off", "fast", "full"), default="full")
+    parser.add_argument("--subject-scale", type=float, default=1.0,
+                        help="Shrink the figure to this fraction of the frame (background fills the rest)")
+    parser.add_argument("--fixtures-dir", default=FIXTURES_DIR, help="Directory of front_<W>x<H>.jpg images")
+    parser.add_argument("--output", help="Also write the results JSON here")
+    parser.add_argument("--config", help=argparse.SUPPRESS)
+    parser.add_argument("--resolution", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.config:
+        print(json.dumps(run_case(args.config, args.resolution, args.runs, args.depth, args.fixtures_dir,
+                                  args.subject_scale)))
+        return 0
+
+    rows = []
+    for resolution in args.resolutions:
+        for config in args.configs:
+            env = {**os.environ, **CONFIGS[config], "RESULT_CACHE_ENTRIES": "0", "EVENT_LOG": "off"}
+            out = subprocess.run(
+                [sys.executable, __file__, "--config", config, "--resolution", resolution, "--runs", str(args.runs),
+                 "--depth", args.depth, "--subject-scale", str(args.subject_scale), "--fixtures-dir", args.fixtures_dir],
+                check=True, capture_output=True, text=True, env=env
+            ).stdout
+            rows.append(json.loads(out.strip().splitlines()[-1]))
+
+    references = {row["resolution"]: row["measurements"] for row in rows
+                  if row["config"] == "full" and row.get("status") == 200}
+    print(f"{'resolution':<11}{'config':<14}{'p50 ms':>9}{'p95 ms':>9}{'alloc MB':>10}{'RSS MB':>9}"
+          f"{'working':>11}  {'crop':<22}{'drift mean/max cm':>19}{'max %':>8}")
+    for row in rows:
+        if "skipped" in row:
+            print(f"{row['resolution']:<11}{row['config']:<14}  skipped: {row['skipped']}")
+            continue
+        if row["status"] != 200:
+            print(f"{row['resolution']:<11}{row['config']:<14}  status {row['status']}: {row['error']}")
+            continue
+        reference = references.get(row["resolution"])
+        row["drift"] = drift(row["measurements"], reference) if reference and row["config"] != "full" else None
+        working = "x".join(map(str, row["working_size"])) if row["working_size"] else "-"
+        crop = str(row["person_crop"]) if row["person_crop"] else "-"
+        shift = f"{row['drift']['mean_cm']}/{row['drift']['max_cm']}" if row["drift"] else "-"
+        pct = f"{row['drift']['max_pct']}" if row["drift"] else "-"
+        print(f"{row['resolution']:<11}{row['config']:<14}{row['p50_ms']:>9}{row['p95_ms']:>9}{row['peak_alloc_mb']:>10}"
+              f"{row['peak_rss_mb']:>9}{working:>11}  {crop:<22}{shift:>19}{pct:>8}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
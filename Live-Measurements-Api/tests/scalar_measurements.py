@@ -0,0 +1,352 @@
+"""
+The scalar calculate_measurements / calculate_side_measurements that measurement_kernel
+replaced, kept verbatim as the reference the kernel is checked against.
+
+What they used from index.py (the height scale, depth ratios at a point, the fallback
+counter and the MediaPipe landmark enum) is reproduced here, so importing this module
+doesn't load the app or any model.
+"""
+import logging
+
+import mediapipe as mp
+import numpy as np
+
+from metrics import MetricsRegistry
+from silhouette import SilhouetteProfile
+
+logger = logging.getLogger("scalar")
+mp_pose = mp.solutions.pose
+fallbacks_total = MetricsRegistry().counter(
+    "scalar_measurement_fallbacks_total", "Contour widths the scalar code ignored", ("measurement", "reason")
+)
+FOCAL_LENGTH = 600
+
+
+def calculate_distance_using_height(landmarks, image_height, user_height_cm):
+    """index.calculate_distance_using_height without its log line."""
+    nose_y = landmarks[mp_pose.PoseLandmark.NOSE.value].y * image_height
+    bottom_foot = max(
+        landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value].y,
+        landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value].y
+    ) * image_height
+    nose_to_ankle_px = abs(bottom_foot - nose_y)
+    person_height_px = nose_to_ankle_px / 0.88
+    distance = (user_height_cm * FOCAL_LENGTH) / person_height_px
+    scale_factor = user_height_cm / person_height_px
+    return distance, scale_factor
+
+
+class DepthSummary:
+    """index.DepthSummary over an uncropped depth map."""
+
+    def __init__(self, depth_map):
+        self.depth_map = depth_map
+        self.height, self.width = depth_map.shape[:2]
+        self.max_depth = np.max(depth_map)
+
+    def ratio_at(self, x, y, image_width, image_height):
+        """Circumference depth ratio at a landmark-space point (1.0 when outside the map)."""
+        y_scaled = int(int(y * image_height) * (self.height / image_height))
+        x_scaled = int(int(x * image_width) * (self.width / image_width))
+        if 0 <= y_scaled < self.height and 0 <= x_scaled < self.width:
+            return 1.0 + 0.5 * (1.0 - self.depth_map[y_scaled, x_scaled] / self.max_depth)
+        return 1.0
+
+
+def scalar_side_measurements(results, scale_factor, image_width, image_height, user_height_cm=None):
+    """
+    Extract depth measurements from side view for accurate circumference calculations.
+    Returns depth data for chest, waist, and hip.
+    In a SIDE/PROFILE view:
+    - X-axis = depth (front-to-back of body)
+    - Y-axis = vertical position
+    """
+    landmarks = results.pose_landmarks.landmark
+    
+    # If user's height is provided, use it to get a more accurate scale factor
+    if user_height_cm:
+        _, scale_factor = calculate_distance_using_height(landmarks, image_height, user_height_cm)
+    
+    def pixel_to_cm(value):
+        return round(value * scale_factor, 2)
+    
+    # Get key landmarks
+    left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
+    right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
+    left_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
+    right_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value]
+    nose = landmarks[mp_pose.PoseLandmark.NOSE.value]
+    
+    # In side view, we measure the visible HORIZONTAL span (X-axis) which represents body depth
+    # The person is facing sideways, so front-to-back depth is visible as left-right span
+    
+    # CHEST DEPTH - Measure from front (nose/chest front) to back (spine area)
+    # Use the max and min X positions at shoulder height to get full depth
+    shoulder_y = (left_shoulder.y + right_shoulder.y) / 2
+    
+    # For side view, the depth is the horizontal distance visible
+    # Take the shoulder with larger x (front of chest) and smaller x (back)
+    front_x = max(left_shoulder.x, right_shoulder.x, nose.x)
+    back_x = min(left_shoulder.x, right_shoulder.x)
+    
+    chest_depth_px = abs(front_x - back_x) * image_width
+    # Chest depth should be approximately 60-70% of width, add 20% buffer for accuracy
+    chest_depth_cm = pixel_to_cm(chest_depth_px) * 1.2
+    
+    # WAIST DEPTH - Estimate from torso curvature
+    # Waist is narrower than chest, typically 80-90% of chest depth
+    waist_depth_cm = chest_depth_cm * 0.85
+    
+    # HIP DEPTH - Similar to chest or slightly larger
+    front_hip_x = max(left_hip.x, right_hip.x)
+    back_hip_x = min(left_hip.x, right_hip.x)
+    hip_depth_px = abs(front_hip_x - back_hip_x) * image_width
+    hip_depth_cm = pixel_to_cm(hip_depth_px) * 1.15
+    
+    return {
+        "chest_depth_cm": chest_depth_cm,
+        "waist_depth_cm": waist_depth_cm,
+        "hip_depth_cm": hip_depth_cm
+    }
+
+def scalar_measurements(results, scale_factor, image_width, image_height, depth_map, segmentation_mask=None, user_height_cm=None, side_depth_data=None):
+    landmarks = results.pose_landmarks.landmark
+    # depth_map may be a raw MiDaS array, a DepthSummary, or None when depth is off
+    depth = DepthSummary(depth_map) if isinstance(depth_map, np.ndarray) else depth_map
+    # One silhouette analyzer per mask answers every measurement row (a prebuilt profile may be passed in)
+    silhouette = SilhouetteProfile(segmentation_mask) if isinstance(segmentation_mask, np.ndarray) else segmentation_mask
+
+    # If user's height is provided, use it to get a more accurate scale factor
+    if user_height_cm:
+        _, scale_factor = calculate_distance_using_height(landmarks, image_height, user_height_cm)
+
+    def pixel_to_cm(value):
+        return round(value * scale_factor, 2)
+    
+    def calculate_circumference(width_px, depth_ratio=1.0):
+        """
+        Estimate circumference using width and depth adjustment.
+        Using a simplified elliptical approximation: C Γëê 2╧Ç * sqrt((a┬▓ + b┬▓)/2)
+        where a is half the width and b is estimated depth
+        """
+        width_cm = width_px * scale_factor
+        estimated_depth_cm = width_cm * depth_ratio * 0.7  # Depth is typically ~70% of width for torso
+        half_width = width_cm / 2
+        half_depth = estimated_depth_cm / 2
+        return round(2 * np.pi * np.sqrt((half_width**2 + half_depth**2) / 2), 2)
+
+    measurements = {}
+
+    # Get key landmarks
+    left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
+    right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
+    left_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
+    right_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value]
+    left_knee = landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value]
+    left_ankle = landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value]
+    left_wrist = landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value]
+    nose = landmarks[mp_pose.PoseLandmark.NOSE.value]
+    left_ear = landmarks[mp_pose.PoseLandmark.LEFT_EAR.value]
+
+    # SHOULDER WIDTH - Most reliable measurement
+    shoulder_width_px = abs(left_shoulder.x - right_shoulder.x) * image_width
+    
+    # Apply a slight correction factor for shoulders (they're usually detected well)
+    shoulder_correction = 1.1  # 10% wider
+    shoulder_width_px *= shoulder_correction
+    
+    measurements["shoulder_width"] = pixel_to_cm(shoulder_width_px)
+
+    # CHEST/BUST MEASUREMENT
+    chest_y_ratio = 0.15  # Approximately 15% down from shoulder to hip
+    chest_y = left_shoulder.y + (left_hip.y - left_shoulder.y) * chest_y_ratio
+    
+    chest_correction = 1.08  # 8% wider - more conservative for varied body types
+    chest_width_px = abs((right_shoulder.x - left_shoulder.x) * image_width) * chest_correction
+    
+    if silhouette is not None:
+        chest_y_px = int(chest_y * image_height)
+        center_x = (left_shoulder.x + right_shoulder.x) / 2
+        detected_width = silhouette.width_at(chest_y_px, center_x, image_width)
+        if detected_width > 0:
+            # SAFETY CHECK: Only accept contour width if it's reasonable
+            # If detected width is > 1.5x the landmark width, it's likely catching background (chair/shadow)
+            landmark_width = abs(right_shoulder.x - left_shoulder.x) * image_width
+            if detected_width < landmark_width * 1.5:  # Allow some expansion but clamp explosions
+                 chest_width_px = max(chest_width_px, detected_width)
+            else:
+                 logger.warning(f"Ignored chest contour width {detected_width}px (too large vs {landmark_width}px)")
+                 fallbacks_total.inc(measurement="chest", reason="contour_too_wide")
+    
+    chest_depth_ratio = 1.0
+    if depth is not None:
+        chest_depth_ratio = depth.ratio_at((left_shoulder.x + right_shoulder.x) / 2, chest_y, image_width, image_height)
+    
+    measurements["chest_width"] = pixel_to_cm(chest_width_px)
+    measurements["chest_circumference"] = calculate_circumference(chest_width_px, chest_depth_ratio)
+
+    # WAIST MEASUREMENT
+    # Adjust waist_y_ratio to better reflect the natural waistline
+    waist_y_ratio = 0.35  # 35% down from shoulder to hip (higher than before)
+    waist_y = left_shoulder.y + (left_hip.y - left_shoulder.y) * waist_y_ratio
+    
+    # Use contour detection to dynamically estimate waist width
+    if silhouette is not None:
+        waist_y_px = int(waist_y * image_height)
+        center_x = (left_hip.x + right_hip.x) / 2
+        detected_width = silhouette.width_at(waist_y_px, center_x, image_width)
+        
+        # Calculate expected width from landmarks for safety check
+        hip_landmark_width = abs(right_hip.x - left_hip.x) * image_width
+        
+        if detected_width > 0 and detected_width < hip_landmark_width * 1.5:
+             # If valid and reasonable, use it
+             waist_width_px = detected_width
+        else:
+             logger.warning(f"Ignored waist contour width {detected_width}px (unreasonable)")
+             fallbacks_total.inc(measurement="waist", reason="contour_missing" if detected_width <= 0 else "contour_too_wide")
+             # Fallback to hip width if contour detection fails or is unsafe
+             waist_width_px = hip_landmark_width * 0.9  # 90% of hip width
+    else:
+        # Fallback to hip width if no frame is provided
+        waist_width_px = abs(right_hip.x - left_hip.x) * image_width * 0.9  # 90% of hip width
+    
+    # Apply correction factor to waist width
+    waist_correction = 1.05  # 5% wider - more conservative for varied body types
+    waist_width_px *= waist_correction
+    
+    # Get depth adjustment for waist if available
+    waist_depth_ratio = 1.0
+    if depth is not None:
+        waist_depth_ratio = depth.ratio_at((left_hip.x + right_hip.x) / 2, waist_y, image_width, image_height)
+    
+    measurements["waist_width"] = pixel_to_cm(waist_width_px)
+    measurements["waist"] = calculate_circumference(waist_width_px, waist_depth_ratio)
+
+    # NATURAL WAIST - narrowest silhouette row between 25% and 50% of shoulder-to-hip
+    # Comes from the same width profile, so it costs no extra inference
+    if silhouette is not None:
+        band_start_px = int((left_shoulder.y + (left_hip.y - left_shoulder.y) * 0.25) * image_height)
+        band_end_px = int((left_shoulder.y + (left_hip.y - left_shoulder.y) * 0.50) * image_height)
+        _, natural_waist_px = silhouette.narrowest_row(
+            band_start_px, band_end_px, (left_hip.x + right_hip.x) / 2, image_width
+        )
+        hip_landmark_width = abs(right_hip.x - left_hip.x) * image_width
+        if natural_waist_px > 0 and natural_waist_px < hip_landmark_width * 1.5:
+            natural_waist_px *= waist_correction
+            measurements["natural_waist_width"] = pixel_to_cm(natural_waist_px)
+            measurements["natural_waist"] = calculate_circumference(natural_waist_px, waist_depth_ratio)
+
+    # HIP MEASUREMENT
+    hip_correction = 1.20  # 20% wider - more conservative for varied body types
+    hip_width_px = abs(left_hip.x * image_width - right_hip.x * image_width) * hip_correction
+    
+    if silhouette is not None:
+        hip_y_offset = 0.1  # 10% down from hip landmarks
+        hip_y = left_hip.y + (left_knee.y - left_hip.y) * hip_y_offset
+        hip_y_px = int(hip_y * image_height)
+        center_x = (left_hip.x + right_hip.x) / 2
+        detected_width = silhouette.width_at(hip_y_px, center_x, image_width)
+        
+        # SAFETY CHECK for Hips
+        landmark_hip_width = abs(left_hip.x * image_width - right_hip.x * image_width)
+        
+        if detected_width > 0 and detected_width < landmark_hip_width * 2.0: # Hips can be wider, but 2x is limit
+            hip_width_px = max(hip_width_px, detected_width)
+        else:
+            logger.warning(f"Ignored hip contour width {detected_width}px (too large vs {landmark_hip_width}px)")
+            fallbacks_total.inc(measurement="hip", reason="contour_missing" if detected_width <= 0 else "contour_too_wide")
+    
+    hip_depth_ratio = 1.0
+    if depth is not None:
+        hip_depth_ratio = depth.ratio_at((left_hip.x + right_hip.x) / 2, left_hip.y, image_width, image_height)
+    
+    measurements["hip_width"] = pixel_to_cm(hip_width_px)
+    measurements["hip"] = calculate_circumference(hip_width_px, hip_depth_ratio)
+
+    # NECK - Use distance from nose to ear
+    neck_width_px = abs(nose.x - left_ear.x) * image_width * 2.0
+    measurements["neck"] = calculate_circumference(neck_width_px, 1.0)
+    measurements["neck_width"] = pixel_to_cm(neck_width_px)
+
+    # ARM LENGTH - Shoulder to wrist
+    arm_length_px = abs(left_shoulder.y - left_wrist.y) * image_height
+    measurements["arm_length"] = pixel_to_cm(arm_length_px)
+
+    # SHIRT LENGTH - Shoulder to hip with 20% extension
+    shirt_length_px = abs(left_shoulder.y - left_hip.y) * image_height * 1.20
+    measurements["shirt_length"] = pixel_to_cm(shirt_length_px)
+
+    # THIGH CIRCUMFERENCE (improved with depth information)
+    thigh_y_ratio = 0.2  # 20% down from hip to knee
+    thigh_y = left_hip.y + (left_knee.y - left_hip.y) * thigh_y_ratio
+    
+    # Apply correction factor for thigh width
+    thigh_correction = 1.2  # Thighs are typically wider than what can be estimated from front view
+    thigh_width_px = hip_width_px * 0.5 * thigh_correction  # Base thigh width on hip width
+    
+    # Use contour detection if segmentation mask is available
+    if silhouette is not None:
+        thigh_y_px = int(thigh_y * image_height)
+        # Use center between hips for thigh measurement
+        thigh_center_x = (left_hip.x + right_hip.x) / 2
+        detected_width = silhouette.width_at(thigh_y_px, thigh_center_x, image_width)
+        
+        logger.info(f"Thigh detected_width: {detected_width}px")
+        
+        # Use detected width if reasonable, otherwise use hip-based estimate
+        hip_landmark_width = abs(left_hip.x - right_hip.x) * image_width
+        if detected_width > 0:
+            # Accept if it's at least 30% of hip width (very permissive)
+            if detected_width > hip_landmark_width * 0.3:
+                thigh_width_px = detected_width * thigh_correction
+                logger.info(f"Using detected thigh width: {thigh_width_px}px")
+            else:
+                logger.warning(f"Thigh width {detected_width}px too small, using hip-based estimate")
+                fallbacks_total.inc(measurement="thigh", reason="contour_too_narrow")
+    
+    # If depth map is available, use it for thigh measurement
+    thigh_depth_ratio = 1.0
+    if depth is not None:
+        thigh_depth_ratio = depth.ratio_at(left_hip.x, thigh_y, image_width, image_height)
+    
+    measurements["thigh"] = pixel_to_cm(thigh_width_px)
+    measurements["thigh_circumference"] = calculate_circumference(thigh_width_px, thigh_depth_ratio)
+
+
+    # TROUSER LENGTH - Hip to ankle
+    trouser_length_px = abs(left_hip.y - left_ankle.y) * image_height
+    measurements["trouser_length"] = pixel_to_cm(trouser_length_px)
+
+    # INSEAM - Knee to ankle (more accurate for pants)
+    inseam_px = abs(left_knee.y - left_ankle.y) * image_height
+    measurements["inseam"] = pixel_to_cm(inseam_px)
+
+    # ANATOMICAL VALIDATION
+    warnings = []
+    
+    # Check chest to waist ratio (should be reasonable)
+    chest_circ = measurements.get("chest_circumference", 0)
+    waist_circ = measurements.get("waist", 0)
+    
+    if chest_circ > 0 and waist_circ > 0:
+        ratio = chest_circ / waist_circ
+        if ratio > 2.5:
+            warnings.append("Waist measurement seems too small compared to chest. Please retake photo with arms slightly away from body.")
+        elif ratio < 0.9:
+            warnings.append("Chest measurement seems too small. Please ensure full torso is visible in photo.")
+    
+    
+    # Check shoulder width vs chest (shoulder should be wider than chest circumference / ╧Ç)
+    shoulder_width = measurements.get("shoulder_width", 0)
+    if shoulder_width > 0 and chest_circ > 0:
+        expected_chest_width = chest_circ / 3.14  # Approximate width from circumference
+        if shoulder_width < expected_chest_width * 0.7:
+            warnings.append("Shoulder measurement seems narrow. Ensure you're facing camera directly.")
+    
+    if warnings:
+        measurements["warnings"] = warnings
+    
+    measurements["measurement_quality"] = "excellent" if not warnings else "good" if len(warnings) == 1 else "fair"
+
+    return measurements
@@ -0,0 +1,38 @@
+import pytest
+
+from bulk_measure import load_subjects
+
+
+def touch(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"")
+
+
+def test_directory_ids_are_paths_under_the_root(tmp_path):
+    touch(tmp_path / "001" / "front.jpg")
+    touch(tmp_path / "a" / "001" / "front.jpg")
+    touch(tmp_path / "b" / "001" / "front.png")
+    touch(tmp_path / "b" / "001" / "side.jpg")
+    touch(tmp_path / "c" / "side.jpg")  # No front photo: not a subject
+
+    subjects = load_subjects(str(tmp_path))
+
+    assert [subject.id for subject in subjects] == ["001", "a/001", "b/001"]
+    assert subjects[2].side.endswith("side.jpg")
+
+
+def test_manifest_heights_match_directory_ids(tmp_path):
+    touch(tmp_path / "001" / "front.jpg")
+    (tmp_path / "manifest.csv").write_text("id,height_cm\n001,180\n")
+
+    (subject,) = load_subjects(str(tmp_path))
+
+    assert subject.height_cm == "180"
+
+
+def test_duplicate_manifest_ids_stop_the_run(tmp_path):
+    manifest = tmp_path / "subjects.csv"
+    manifest.write_text("id,front\nx,one.jpg\nx,two.jpg\n")
+
+    with pytest.raises(SystemExit, match="Duplicate subject ids"):
+        load_subjects(str(manifest))
@@ -0,0 +1,76 @@
+import pytest
+
+from chat_faq import FaqIndex, content_tokens, normalize_question
+
+# The fact sheet part of the chatbot's system instruction (api/index.py)
+INSTRUCTION = """You are the specialized AI Assistant for 'YOUNGIN'.
+
+1. **AI Sizing Technology**:
+   - We use advanced computer vision (MediaPipe) and depth estimation (MiDaS) to calculate body measurements from a single photo.
+   - **Privacy First**: User photos are processed in-memory for seconds and then discarded. We store only the measurement data (numbers), never the images.
+   - Accuracy: Our system is calibrated to within 98% accuracy. We recommend wearing tight-fitting clothes for best results.
+
+2. **Custom Design Studio**:
+   - Users can design t-shirts, hoodies, and pants from scratch.
+   - Features: Drag-and-drop assets, upload custom images, change fabric colors, and view in real-time.
+   - We use high-fidelity fabric rendering.
+
+3. **Fabric Quality & Production**:
+   - We source only premium, sustainable fabrics (Organic Cotton, Bamboo blends, Italian Silk).
+   - All garments are cut-and-sew, made to order based on the user's specific measurements.
+   - Production time: 3-5 business days.
+
+4. **Shipping & Accounts**:
+   - Global shipping available (Standard: 7-10 days, Express: 2-3 days).
+   - Users must log in to save designs and see their measurement profile.
+
+**Guidelines**:
+- Be concise but polite.
+"""
+
+
+@pytest.fixture
+def index():
+    return FaqIndex.from_instruction(INSTRUCTION)
+
+
+def test_parses_only_the_numbered_sections(index):
+    assert len(index) == 11
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("How long does shipping take?", "Global shipping available"),
+    ("How long does express shipping take?", "Global shipping available"),
+    ("Do you store my photos?", "Privacy First"),
+    ("How long is production time?", "Production time"),
+    ("Can I design hoodies?", "Users can design"),
+    ("Do I need to log in to save designs?", "Users must log in"),
+])
+def test_covered_questions_are_answered_locally(index, question, expected):
+    assert index.answer(question).startswith(expected)
+
+
+@pytest.mark.parametrize("question", [
+    "How much does express shipping cost?",
+    "Can I cancel express shipping?",
+    "Is express shipping available to India?",
+])
+def test_words_outside_the_facts_go_to_the_model(index, question):
+    assert index.answer(question) is None
+
+
+def test_vague_and_long_questions_go_to_the_model(index):
+    assert index.answer("Hello!") is None
+    assert index.answer("shipping fabric design photo production accuracy login hoodie cotton silk") is None
+
+
+def test_stats_count_lookups_and_hits(index):
+    index.answer("How long does shipping take?")
+    index.answer("Can I cancel express shipping?")
+    assert index.stats() == {"facts": 11, "lookups": 2, "hits": 1, "hit_rate": 0.5}
+
+
+def test_normalization_and_stemming():
+    assert normalize_question("  How LONG does   shipping take?! ") == "how long does shipping take"
+    assert content_tokens("How long does shipping take?") == {"ship"}
+    assert content_tokens("fabrics and photos") == {"fabric", "photo"}
@@ -0,0 +1,115 @@
+import threading
+
+import numpy as np
+import pytest
+
+from depth_batcher import DepthBatcher
+
+
+class RecordingModel:
+    """Stands in for MiDaS: depth = the first input channel times 2, and it records each batch's shape."""
+
+    def __init__(self, gate=None):
+        self.shapes = []
+        self.gate = gate
+
+    def __call__(self, batch):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.shapes.append(batch.shape)
+        return batch[:, 0] * 2.0
+
+
+def depth_input(value, size):
+    return np.full((1, 3, size, size), value, dtype=np.float32)
+
+
+def test_single_request_gets_its_depth_map():
+    model = RecordingModel()
+    batcher = DepthBatcher(model, max_batch_size=4, max_wait_ms=0)
+
+    depth = batcher.infer(depth_input(1.5, 8), timeout=5)
+
+    assert depth.shape == (8, 8)
+    assert np.all(depth == 3.0)
+    assert model.shapes == [(1, 3, 8, 8)]
+
+
+def test_concurrent_requests_share_a_pass_per_input_size():
+    model = RecordingModel()
+    batcher = DepthBatcher(model, max_batch_size=8, max_wait_ms=300)
+
+    futures = [batcher.submit(depth_input(value, 8)) for value in (1.0, 2.0, 3.0)]
+    futures.append(batcher.submit(depth_input(4.0, 16)))
+    results = [future.result(5) for future in futures]
+
+    assert sorted(model.shapes) == [(1, 3, 16, 16), (3, 3, 8, 8)]
+    for value, depth in zip((1.0, 2.0, 3.0, 4.0), results):
+        assert np.all(depth == value * 2)
+    assert batcher.stats()["batch_size_histogram"] == {"1": 1, "3": 1}
+
+
+def test_batched_results_own_their_memory():
+    model = RecordingModel()
+    batcher = DepthBatcher(model, max_batch_size=4, max_wait_ms=300)
+
+    results = [future.result(5) for future in [batcher.submit(depth_input(v, 8)) for v in (1.0, 2.0)]]
+
+    assert model.shapes == [(2, 3, 8, 8)]
+    for depth in results:
+        assert depth.base is None
+        assert depth.nbytes == 8 * 8 * 4
+
+
+def test_batches_are_capped_at_max_batch_size():
+    gate = threading.Event()
+    model = RecordingModel(gate)
+    batcher = DepthBatcher(model, max_batch_size=2, max_wait_ms=300)
+
+    futures = [batcher.submit(depth_input(1.0, 8)) for _ in range(5)]
+    gate.set()
+    for future in futures:
+        future.result(5)
+
+    assert all(shape[0] <= 2 for shape in model.shapes)
+    assert sum(shape[0] for shape in model.shapes) == 5
+
+
+def test_a_failed_pass_fails_every_request_in_it():
+    calls = []
+
+    def fails_once(batch):
+        calls.append(batch.shape)
+        if len(calls) == 1:
+            raise RuntimeError("out of memory")
+        return batch[:, 0]
+
+    batcher = DepthBatcher(fails_once, max_batch_size=4, max_wait_ms=300)
+    futures = [batcher.submit(depth_input(1.0, 8)) for _ in range(2)]
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="out of memory"):
+            future.result(5)
+    # The worker survives and serves the next request
+    assert batcher.infer(depth_input(1.0, 8), timeout=5).shape == (8, 8)
+
+
+def test_short_output_fails_the_batch_and_keeps_the_worker():
+    def batch_of_one_only(batch):
+        return batch[:1, 0]  # Like an export with a fixed batch dimension of 1
+
+    batcher = DepthBatcher(batch_of_one_only, max_batch_size=4, max_wait_ms=300)
+    futures = [batcher.submit(depth_input(1.0, 8)) for _ in range(2)]
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="1 maps for a batch of 2"):
+            future.result(5)
+    assert batcher.infer(depth_input(2.0, 8), timeout=5).shape == (8, 8)
+
+
+def test_a_failed_round_never_ends_the_worker():
+    batcher = DepthBatcher(RecordingModel(), max_batch_size=4, max_wait_ms=0)
+
+    with pytest.raises(AttributeError):
+        batcher.infer(None, timeout=5)  # Not an array: fails before any pass runs
+    assert np.all(batcher.infer(depth_input(1.0, 8), timeout=5) == 2.0)
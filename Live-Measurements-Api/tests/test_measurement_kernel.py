@@ -0,0 +1,132 @@
+import json
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+from measurement_kernel import (
+    NUM_LANDMARKS, height_scale, measure_landmarks, probe_images, side_depths, stack_landmarks
+)
+from scalar_measurements import DepthSummary, scalar_measurements, scalar_side_measurements
+from silhouette import SilhouetteProfile
+
+# A standing front pose: landmark -> (dx from the image center, y), as fractions of the image
+# height. Only the landmarks the measurements read; the rest stay at the image center.
+POSE = {
+    0: (0.0, 0.10), 7: (0.035, 0.095), 11: (0.10, 0.20), 12: (-0.10, 0.20), 15: (0.16, 0.50),
+    23: (0.07, 0.52), 24: (-0.07, 0.52), 25: (0.07, 0.72), 26: (-0.07, 0.72), 27: (0.07, 0.90), 28: (-0.07, 0.90),
+}
+SIZES = ((360, 640), (720, 1280))
+
+
+def body_mask(width, height):
+    """A soft-edged torso and legs around POSE, like a Holistic segmentation mask."""
+    def point(i):
+        dx, y = POSE[i]
+        return int(width / 2 + dx * height), int(y * height)
+
+    mask = np.zeros((height, width), np.uint8)
+    cx = width // 2
+    waist = (int(0.085 * height), int(0.38 * height))
+    hips = int(0.095 * height)
+    torso = [point(12), point(11), (cx + waist[0], waist[1]), (cx + hips, point(23)[1]),
+             (cx - hips, point(24)[1]), (cx - waist[0], waist[1])]
+    cv2.fillPoly(mask, [np.array(torso, np.int32)], 255)
+    for hip, knee, ankle in ((23, 25, 27), (24, 26, 28)):
+        cv2.line(mask, point(hip), point(knee), 255, int(0.07 * height))
+        cv2.line(mask, point(knee), point(ankle), 255, int(0.055 * height))
+    return cv2.GaussianBlur(mask, (5, 5), 0).astype(np.float32) / 255.0
+
+
+def depth_map(size):
+    """Radial float32 depth, nearer at the center, the shape MiDaS gives a centered subject."""
+    ys, xs = np.mgrid[0:size, 0:size].astype(np.float32) / size - 0.5
+    return (1.0 - np.sqrt(xs ** 2 + ys ** 2)).astype(np.float32) * 1000
+
+
+def as_results(landmarks):
+    """A (33, 4) array as the Holistic results object the scalar code reads."""
+    points = [SimpleNamespace(x=float(x), y=float(y), z=float(z), visibility=float(v)) for x, y, z, v in landmarks]
+    return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=points))
+
+
+@pytest.fixture(scope="module")
+def subjects():
+    rng = np.random.default_rng(0)
+    kernel = np.ones((1, 15), np.uint8)
+    masks = {}
+    for width, height in SIZES:
+        mask = body_mask(width, height)
+        masks[(width, height)] = (mask, cv2.dilate(mask, kernel), cv2.erode(mask, kernel), None)
+    depth_maps = [depth_map(size) * np.float32(scale) for size in (256, 384) for scale in (0.5, 2.0)]
+
+    subjects = []
+    for _ in range(300):
+        width, height = SIZES[rng.integers(len(SIZES))]
+        landmarks = np.full((NUM_LANDMARKS, 4), 0.5, np.float32)
+        for i, (dx, y) in POSE.items():
+            landmarks[i, :2] = (0.5 + dx * height / width, y)
+        # Mostly small jitter; sometimes large enough to trip the contour fallbacks and warnings
+        landmarks[:, :2] += rng.normal(0, 0.004 if rng.random() < 0.6 else 0.06, (NUM_LANDMARKS, 2))
+        landmarks[:, 2] = rng.normal(0, 0.1, NUM_LANDMARKS)
+        landmarks[:, 3] = rng.uniform(0.3, 1.0, NUM_LANDMARKS)
+        user_height_cm = float(rng.uniform(140, 200)) if rng.random() < 0.8 else None
+        subjects.append(SimpleNamespace(
+            landmarks=landmarks, width=width, height=height,
+            mask=masks[(width, height)][rng.integers(4)],
+            depth_map=depth_maps[rng.integers(len(depth_maps))] if rng.random() < 0.5 else None,
+            user_height_cm=user_height_cm,
+            scale_factor=None if user_height_cm else float(rng.uniform(0.1, 0.5)),
+        ))
+    return subjects
+
+
+def kernel_batch(subjects):
+    landmarks = stack_landmarks([s.landmarks for s in subjects])
+    widths = np.array([s.width for s in subjects])
+    heights = np.array([s.height for s in subjects])
+    from_height = height_scale(landmarks, heights, np.array([s.user_height_cm or 1.0 for s in subjects]))
+    scale = np.array([from_height[i] if s.user_height_cm else s.scale_factor for i, s in enumerate(subjects)])
+    return landmarks, widths, heights, scale
+
+
+def test_batch_matches_the_scalar_code(subjects):
+    landmarks, widths, heights, scale = kernel_batch(subjects)
+    probes = probe_images(
+        landmarks, widths, heights,
+        [SilhouetteProfile(s.mask) if s.mask is not None else None for s in subjects],
+        [DepthSummary(s.depth_map) if s.depth_map is not None else None for s in subjects],
+    )
+
+    batch = measure_landmarks(landmarks, widths, heights, scale, probes)
+
+    rows = batch.rows()
+    for i, s in enumerate(subjects):
+        expected = scalar_measurements(as_results(s.landmarks), s.scale_factor, s.width, s.height, s.depth_map,
+                                       s.mask, s.user_height_cm)
+        assert json.dumps(rows[i]) == json.dumps(expected), i
+    # The random subjects reach the warning, natural-waist and contour-fallback branches
+    assert any("warnings" in row for row in rows)
+    assert any("natural_waist" in row for row in rows)
+    assert any(batch.fallback_reasons(i) for i in range(len(batch)))
+
+
+def test_side_depths_match_the_scalar_code(subjects):
+    landmarks, widths, _, scale = kernel_batch(subjects)
+
+    depths = side_depths(landmarks, widths, scale)
+
+    for i, s in enumerate(subjects):
+        expected = scalar_side_measurements(as_results(s.landmarks), s.scale_factor, s.width, s.height,
+                                            s.user_height_cm)
+        assert {key: float(values[i]) for key, values in depths.items()} == expected, i
+
+
+def test_single_subject_is_a_batch_of_one(subjects):
+    landmarks, widths, heights, scale = kernel_batch(subjects[:5])
+
+    rows = measure_landmarks(landmarks, widths, heights, scale).rows()
+
+    for i in range(5):
+        assert measure_landmarks(landmarks[i], widths[i], heights[i], scale[i]).rows() == [rows[i]]
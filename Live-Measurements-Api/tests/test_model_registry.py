@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+from model_registry import ModelNotReady, ModelRegistry
+
+
+def test_load_then_warm_marks_ready():
+    registry = ModelRegistry()
+    warmed = []
+    registry.register("midas", lambda: "weights", warmed.append)
+
+    registry.start(background=False)
+
+    assert registry.get("midas") == "weights"
+    assert warmed == ["weights"]
+    assert registry.status()["midas"]["state"] == "ready"
+    assert registry.ready
+
+
+def test_get_loads_lazily_once():
+    registry = ModelRegistry()
+    calls = []
+    registry.register("holistic", lambda: calls.append(1) or "graph")
+
+    assert registry.get("holistic") == "graph"
+    assert registry.get("holistic") == "graph"
+    assert calls == [1]
+
+
+def test_failed_load_raises_and_reports_the_error():
+    registry = ModelRegistry()
+
+    def broken():
+        raise OSError("weights not found")
+
+    registry.register("midas", broken)
+    registry.start(background=False)
+
+    with pytest.raises(ModelNotReady, match="weights not found"):
+        registry.get("midas")
+    assert registry.status()["midas"]["state"] == "failed"
+    assert not registry.wait_ready(["midas"], 0)
+
+
+def test_optional_models_do_not_gate_readiness():
+    def no_key():
+        raise ValueError("GEMINI_API_KEY must be set")
+
+    registry = ModelRegistry()
+    registry.register("holistic", lambda: "graph")
+    registry.register("gemini", no_key, required=False)
+    registry.start(background=False)
+
+    assert registry.ready
+    assert registry.wait_ready(timeout=0)
+
+
+def test_get_times_out_while_loading():
+    registry = ModelRegistry()
+    release = threading.Event()
+    registry.register("midas", lambda: release.wait(5) and "weights")
+    registry.start()
+
+    with pytest.raises(ModelNotReady, match="still"):
+        registry.get("midas", timeout=0.05)
+    release.set()
+    assert registry.get("midas", timeout=5) == "weights"
+
+
+def test_preloaded_model_is_only_warmed_by_start():
+    registry = ModelRegistry()
+    loads, warms = [], []
+    registry.register("midas", lambda: loads.append(1) or "weights", warms.append)
+
+    registry.load("midas", warm=False)  # As in a preforking master
+    assert registry.status()["midas"]["state"] == "loaded"
+    registry.start(background=False)  # As in each worker after the fork
+
+    assert loads == [1]
+    assert warms == ["weights"]
+    assert registry.get("midas") == "weights"
@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+
+from payments import IdempotencyConflict, IdempotentOrders, payment_signature, verify_payment_signature
+
+
+class FakeOrders:
+    """Counts create calls and hands out distinct order ids."""
+
+    def __init__(self, delay=None):
+        self.calls = 0
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        if self.delay is not None:
+            self.delay.wait(5)
+        with self._lock:
+            self.calls += 1
+            return {"id": f"order_{self.calls}", "amount": 49900}
+
+
+def test_identical_carts_without_a_key_get_separate_orders():
+    orders, create = IdempotentOrders(), FakeOrders()
+    cart = {"amount": 49900, "currency": "USD"}
+
+    first, first_source = orders.create(cart, create)
+    second, second_source = orders.create(dict(cart), create)
+
+    assert first["id"] != second["id"]
+    assert (first_source, second_source) == ("created", "created")
+    assert create.calls == 2
+
+
+def test_same_key_replays_the_order():
+    orders, create = IdempotentOrders(), FakeOrders()
+    cart = {"amount": 49900, "currency": "USD"}
+
+    first, _ = orders.create(cart, create, "checkout-1")
+    again, source = orders.create(cart, create, "checkout-1")
+
+    assert again == first
+    assert source == "replayed"
+    assert create.calls == 1
+
+
+def test_keys_are_scoped_per_client_key():
+    orders, create = IdempotentOrders(), FakeOrders()
+    cart = {"amount": 49900, "currency": "USD"}
+
+    first, _ = orders.create(cart, create, "customer-a")
+    second, _ = orders.create(cart, create, "customer-b")
+
+    assert first["id"] != second["id"]
+    assert create.calls == 2
+
+
+def test_reused_key_with_another_payload_conflicts():
+    orders, create = IdempotentOrders(), FakeOrders()
+    orders.create({"amount": 49900}, create, "checkout-1")
+
+    with pytest.raises(IdempotencyConflict):
+        orders.create({"amount": 99900}, create, "checkout-1")
+
+
+def test_failures_are_not_cached():
+    orders = IdempotentOrders()
+
+    def failing():
+        raise RuntimeError("razorpay down")
+
+    with pytest.raises(RuntimeError):
+        orders.create({"amount": 49900}, failing, "checkout-1")
+    order, source = orders.create({"amount": 49900}, FakeOrders(), "checkout-1")
+    assert (order["id"], source) == ("order_1", "created")
+
+
+def test_concurrent_duplicates_share_one_call():
+    release = threading.Event()
+    orders, create = IdempotentOrders(), FakeOrders(delay=release)
+    results = []
+
+    def click():
+        results.append(orders.create({"amount": 49900}, create, "double-click"))
+
+    threads = [threading.Thread(target=click) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert create.calls == 1
+    assert {order["id"] for order, _ in results} == {"order_1"}
+
+
+def test_payment_signature_round_trip():
+    signature = payment_signature("order_1", "pay_1", "secret")
+    assert verify_payment_signature("order_1", "pay_1", signature, "secret")
+    assert not verify_payment_signature("order_1", "pay_2", signature, "secret")
+    assert not verify_payment_signature("order_1", "pay_1", None, "secret")
@@ -0,0 +1,102 @@
+import numpy as np
+
+from result_cache import ArtifactCache, ImageArtifacts, artifact_key, image_digest
+from silhouette import SilhouetteProfile
+
+
+class Depth:
+    """Shaped like index.DepthSummary for nbytes."""
+
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+
+def test_bytes_track_puts_replacements_and_evictions():
+    cache = ArtifactCache(max_entries=10, max_bytes=100)
+
+    cache.put("a", "A", 40)
+    cache.put("b", "B", 40)
+    assert cache.stats()["bytes"] == 80
+
+    cache.put("a", "A2", 10)  # Replacing an entry swaps its size
+    assert cache.stats()["bytes"] == 50
+
+    cache.put("c", "C", 60)  # Over max_bytes: the least recently used entry ("b") goes
+    assert cache.get("b") is None
+    assert cache.get("a") == "A2"
+    assert cache.stats()["bytes"] == 70
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entry_larger_than_the_cap_is_not_stored():
+    cache = ArtifactCache(max_bytes=100)
+    cache.put("big", "x", 101)
+    assert cache.get("big") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_entry_count_cap_evicts_least_recently_used():
+    cache = ArtifactCache(max_entries=2)
+    cache.put("a", 1, 1)
+    cache.put("b", 2, 1)
+    cache.get("a")
+    cache.put("c", 3, 1)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_expired_entries_miss_and_release_their_bytes():
+    cache = ArtifactCache(ttl_seconds=600)
+    cache.put("short", "x", 30, ttl_seconds=-1)
+    cache.put("long", "y", 20)
+    assert cache.get("short") is None
+    assert cache.get("long") == "y"
+    assert cache.stats()["bytes"] == 20
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ArtifactCache(max_entries=0)
+    cache.put("a", 1, 1)
+    assert cache.get("a") is None
+
+
+def test_artifact_nbytes_counts_silhouette_and_depth_maps():
+    mask = np.zeros((64, 48), dtype=np.float32)
+    mask[8:56, 12:36] = 1.0
+    profile = SilhouetteProfile(mask)
+    profile.width_at(32, 0.5, 48)
+    artifacts = ImageArtifacts(pose_landmarks=None)
+    artifacts.silhouette = profile.compact()
+    artifacts.depth = {"fast": Depth(256 * 256 * 4), "off": None}
+
+    assert artifacts.nbytes == 8 * 1024 + artifacts.silhouette.nbytes + 256 * 256 * 4
+    assert artifacts.silhouette.nbytes > 0
+
+
+def test_extended_copies_leave_the_cached_artifacts_alone():
+    profile = SilhouetteProfile(np.ones((8, 8), np.float32)).compact()
+    cached = ImageArtifacts(pose_landmarks=None)
+    cached.depth = {"fast": Depth(100)}
+
+    with_full = cached.extended(profile, "full", Depth(200))
+    again = with_full.extended(SilhouetteProfile(np.ones((8, 8), np.float32)).compact(), "off", None)
+
+    assert cached.silhouette is None and list(cached.depth) == ["fast"]
+    assert with_full.silhouette is profile and list(with_full.depth) == ["fast", "full"]
+    assert again.silhouette is profile  # The first profile stays
+    assert again.pose is cached.pose
+    assert again.nbytes == 8 * 1024 + 300
+
+
+def test_keys_follow_pixels_and_role():
+    frame = np.zeros((4, 6, 3), dtype=np.uint8)
+    same = frame.copy()
+    other = frame.copy()
+    other[0, 0, 0] = 1
+
+    assert image_digest(frame) == image_digest(same)
+    assert image_digest(frame) != image_digest(other)
+    assert image_digest(frame) != image_digest(frame.reshape(6, 4, 3))
+    assert image_digest(frame[:, ::2]) == image_digest(np.ascontiguousarray(frame[:, ::2]))
+    # The same bytes as a side photo never answer a front lookup (no silhouette or crop there)
+    assert artifact_key("front", frame) != artifact_key("side", frame)
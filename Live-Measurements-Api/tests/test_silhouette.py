@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from silhouette import SilhouetteProfile
+
+
+def body_mask():
+    """A 100x80 mask: rows 10-89 hold a body spanning columns 20-59."""
+    mask = np.zeros((100, 80), np.float32)
+    mask[10:90, 20:60] = 1.0
+    return mask
+
+
+def test_compact_answers_every_row_at_the_queried_centers():
+    profile = SilhouetteProfile(body_mask())
+    before = profile.width_at(50, 0.5, 800)  # Scans one row only
+
+    compact = profile.compact()
+
+    assert compact.mask is None
+    assert compact.width_at(50, 0.5, 800) == before == 410  # Edges at the first background columns, 19 and 60
+    # Rows that weren't scanned before compact() come from the full-height profile
+    assert compact.width_at(20, 0.5, 800) == SilhouetteProfile(body_mask()).width_at(20, 0.5, 800)
+    assert compact.narrowest_row(30, 70, 0.5, 800) == (30, 410)
+
+
+def test_compact_rejects_centers_it_never_scanned():
+    profile = SilhouetteProfile(body_mask())
+    profile.width_at(50, 0.5, 800)
+    compact = profile.compact()
+
+    with pytest.raises(LookupError, match="no scan around column 24"):
+        compact.width_at(50, 0.3, 800)
+    with pytest.raises(LookupError):
+        compact.narrowest_row(30, 70, 0.3, 800)
+    # The failed lookups leave the compact profile as it was
+    assert compact.compact().nbytes == compact.nbytes
@@ -0,0 +1,31 @@
+import pytest
+
+from upstream import CircuitBreaker, CircuitOpenError, UpstreamBusyError, UpstreamGuard
+
+
+def test_held_slots_count_toward_the_call_limit():
+    guard = UpstreamGuard("gemini", max_concurrency=1, queue_timeout=0.01)
+
+    guard.acquire()  # e.g. an open stream
+    with pytest.raises(UpstreamBusyError):
+        guard.call(lambda: "reply")
+    with pytest.raises(UpstreamBusyError):
+        guard.acquire()
+    guard.breaker.record(True)
+    guard.release()
+
+    assert guard.call(lambda: "reply") == "reply"
+    assert guard.busy == 2
+
+
+def test_open_breaker_refuses_without_taking_a_slot():
+    guard = UpstreamGuard("gemini", max_concurrency=1, queue_timeout=0.01,
+                          breaker=CircuitBreaker(min_calls=1, open_seconds=60))
+    guard.acquire()
+    guard.breaker.record(False)  # Opens the breaker
+    guard.release()
+
+    with pytest.raises(CircuitOpenError):
+        guard.acquire()
+    assert guard.breaker.stats()["state"] == "open"
+    assert guard._slots.acquire(blocking=False)  # The refused call left its slot free
@@ -299,6 +299,10 @@ async function initiateCheckout() {
 
     try {
         const amount = Math.round(cart.total * 100); // Convert to paise/cents
+        // One key per checkout attempt: a retried or double-sent request gets the same order back
+        const idempotencyKey = (window.crypto && crypto.randomUUID)
+            ? crypto.randomUUID()
+            : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
 
         // 1. Create Order
         // Dynamic API URL Construction
@@ -321,7 +325,8 @@ async function initiateCheckout() {
         const response = await fetch(`${API_URL}/create-order`, {
             method: "POST",
             headers: {
-                "Content-Type": "application/json"
+                "Content-Type": "application/json",
+                "Idempotency-Key": idempotencyKey
             },
             body: JSON.stringify({ amount: amount, currency: "USD" })
         });